@@ -17,9 +17,9 @@ from datetime import datetime
 
 # Import submodules
 sys.path.insert(0, str(Path(__file__).parent))
-from soul_survival import OpenClawSoulSurvival
-from work_logger import WorkLogger, WORK_VALUES
-from wallet_manager import AgentWallet
+from lazy import LazyProxy
+from soul_registry import get_survival, get_wallet, get_work_logger
+from work_logger import WORK_VALUES
 
 class SoulMarketplaceAgent:
     """
@@ -39,9 +39,10 @@ class SoulMarketplaceAgent:
     """
     
     def __init__(self, use_real_contracts: bool = False):
-        self.survival = OpenClawSoulSurvival()
-        self.work = WorkLogger()
-        self.wallet = AgentWallet()
+        # Shared with every other subsystem in this process
+        self.survival = get_survival()
+        self.work = get_work_logger()
+        self.wallet = get_wallet()
         self.use_real = use_real_contracts
         
         # Load config
@@ -60,17 +61,25 @@ class SoulMarketplaceAgent:
         
         Call this after completing any task.
         """
-        # Log the work
+        # Log the work (also credits the survival system)
         entry = self.work.log_work(work_type, description)
         
-        # Update survival system
-        self.survival.record_work(entry['capability'], entry['value'])
-        
         # Update wallet
         self.wallet.add_funds(entry['value'], description)
         
         return entry
     
+    def record_work_batch(self, items: list) -> list:
+        """
+        Record a burst of (work_type, description) tuples.
+        
+        One work-log, soul and wallet save for the whole batch; returns
+        the log entries in order.
+        """
+        entries = self.work.log_work_many(items)
+        self.wallet.add_funds_many([(e['value'], e['description']) for e in entries])
+        return entries
+    
     def heartbeat(self) -> dict:
         """
         Survival decision loop.
@@ -173,21 +182,17 @@ class SoulMarketplaceAgent:
         print(f"Total Work: {status['work']['total_entries']} tasks")
         print(f"Soul Value: {self.survival.calculate_soul_value():.4f} ETH")
 
-# Global instance for easy import
-marketplace_agent = SoulMarketplaceAgent()
+# Global instance for easy import (built on first use)
+marketplace_agent = LazyProxy(SoulMarketplaceAgent)
 
-def main():
-    """CLI entry point"""
-    import sys
-    
-    agent = SoulMarketplaceAgent()
-    
-    if len(sys.argv) < 2:
+def run_command(agent: SoulMarketplaceAgent, args: list):
+    """Run one CLI command against `agent`, printing its output"""
+    if not args:
         status = agent.get_status()
         print(json.dumps(status, indent=2))
         return
     
-    cmd = sys.argv[1]
+    cmd = args[0]
     
     if cmd == "status":
         print(json.dumps(agent.get_status(), indent=2))
@@ -196,8 +201,8 @@ def main():
         result = agent.heartbeat()
         print(json.dumps(result, indent=2))
     
-    elif cmd == "work" and len(sys.argv) >= 4:
-        entry = agent.record_work(sys.argv[2], sys.argv[3])
+    elif cmd == "work" and len(args) >= 3:
+        entry = agent.record_work(args[1], args[2])
         print(f"Logged: {entry['description']} (+{entry['value']} ETH)")
     
     elif cmd == "list":
@@ -205,12 +210,26 @@ def main():
         print(f"Listed SOUL for {listing['price']} ETH")
     
     elif cmd == "simulate":
-        num = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+        num = int(args[1]) if len(args) > 1 else 10
         agent.simulate_day(num)
     
     else:
         print(f"Unknown command: {cmd}")
-        print("\nCommands: status, heartbeat, work [type] [desc], list, simulate [n]")
+        print("\nCommands: status, heartbeat, work [type] [desc], list, simulate [n], daemon")
+
+def main():
+    """CLI entry point"""
+    import sys
+    
+    agent = SoulMarketplaceAgent()
+    
+    if len(sys.argv) > 1 and sys.argv[1] == "daemon":
+        # Keep the agent hot and serve commands over a Unix socket
+        from daemon import serve
+        serve(agent, run_command)
+        return
+    
+    run_command(agent, sys.argv[1:])
 
 if __name__ == "__main__":
     main()
@@ -13,6 +13,7 @@ import json
 import time
 from pathlib import Path
 from bankr_integration import BankrIntegration
+from codec import load_state
 
 def activate_agent():
     print("=" * 60)
@@ -34,8 +35,7 @@ def activate_agent():
     wallet_file = Path(__file__).parent / "wallet.json"
     
     if wallet_file.exists():
-        with open(wallet_file, 'r') as f:
-            wallet = json.load(f)
+        wallet = load_state(wallet_file)
         
         agent_address = wallet.get('address')
         
@@ -8,10 +8,13 @@ Enables agents to work together, share resources, and help each other survive.
 import json
 import time
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 from datetime import datetime
 
+from file_lock import VersionedFile
+from state_store import StateStore, get_state_store
+
 @dataclass
 class AgentProfile:
     """Profile of a participating agent"""
@@ -61,8 +64,12 @@ class AgentCoordinationNetwork:
     - Mutual aid
     """
     
-    def __init__(self, network_id: str = "soul_marketplace_main"):
+    MAX_MESSAGES = 1000
+    
+    def __init__(self, network_id: str = "soul_marketplace_main",
+                 store: Optional[StateStore] = None):
         self.network_id = network_id
+        self.store = store if store is not None else get_state_store()
         self.data_dir = Path(__file__).parent / f"network_{network_id}"
         self.data_dir.mkdir(exist_ok=True)
         
@@ -71,6 +78,11 @@ class AgentCoordinationNetwork:
         self.messages_file = self.data_dir / "messages.json"
         self.pools_file = self.data_dir / "pools.json"
         
+        # Shared with other agent processes: versioned, compare-and-swap saves
+        self._agents_doc = VersionedFile(self.agents_file, default=dict)
+        self._messages_doc = VersionedFile(self.messages_file, default=list)
+        self._pools_doc = VersionedFile(self.pools_file, default=dict)
+        
         # Load state
         self.agents: Dict[str, AgentProfile] = self._load_agents()
         self.messages: List[CoordinationMessage] = self._load_messages()
@@ -81,43 +93,132 @@ class AgentCoordinationNetwork:
         print(f"   Pools: {len(self.pools)}")
     
     def _load_agents(self) -> Dict[str, AgentProfile]:
-        if self.agents_file.exists():
-            with open(self.agents_file, 'r') as f:
-                data = json.load(f)
-                return {k: AgentProfile(**v) for k, v in data.items()}
-        return {}
-    
-    def _save_agents(self):
-        with open(self.agents_file, 'w') as f:
-            json.dump({k: asdict(v) for k, v in self.agents.items()}, f, indent=2)
+        if self.store:
+            data = self.store.get_all('agents', self.network_id)
+            return {k: AgentProfile(**v) for k, v in data.items()}
+        data = self._agents_doc.load()
+        return {k: AgentProfile(**v) for k, v in data.items()}
+    
+    def _save_agent(self, agent_id: str):
+        """Persist a single agent, keeping other processes' agents"""
+        profile = self.agents[agent_id]
+        if self.store:
+            self.store.put('agents', self.network_id, agent_id, asdict(profile))
+            return
+        
+        def upsert(data):
+            data[agent_id] = asdict(profile)
+        
+        data, _ = self._agents_doc.update(upsert)
+        self.agents = {k: AgentProfile(**v) for k, v in data.items()}
+    
+    def _modify_agent(self, agent_id: str, fn: Callable[[AgentProfile], Any]) -> Any:
+        """
+        Apply `fn` to the latest stored copy of an agent and persist it.
+        
+        Read-modify-write against fresh state, so concurrent updates from
+        other agent processes are not lost.
+        """
+        if self.store:
+            with self.store.transaction():
+                row = self.store.get('agents', self.network_id, agent_id)
+                profile = AgentProfile(**row) if row else self.agents[agent_id]
+                result = fn(profile)
+                self.store.put('agents', self.network_id, agent_id, asdict(profile))
+            self.agents[agent_id] = profile
+            return result
+        
+        def apply(data):
+            if agent_id in data:
+                profile = AgentProfile(**data[agent_id])
+            else:
+                profile = self.agents[agent_id]
+            result = fn(profile)
+            data[agent_id] = asdict(profile)
+            return result
+        
+        data, result = self._agents_doc.update(apply)
+        self.agents = {k: AgentProfile(**v) for k, v in data.items()}
+        return result
     
     def _load_messages(self) -> List[CoordinationMessage]:
-        if self.messages_file.exists():
-            with open(self.messages_file, 'r') as f:
-                data = json.load(f)
-                return [CoordinationMessage(**m) for m in data]
-        return []
-    
-    def _save_messages(self):
-        with open(self.messages_file, 'w') as f:
-            json.dump([asdict(m) for m in self.messages], f, indent=2)
+        if self.store:
+            return [
+                CoordinationMessage(**m)
+                for m in self.store.records('messages', self.network_id)
+            ]
+        return [CoordinationMessage(**m) for m in self._messages_doc.load()]
+    
+    def _append_message(self, message: CoordinationMessage):
+        """Persist a newly sent message"""
+        if self.store:
+            with self.store.transaction():
+                self.store.append('messages', self.network_id, asdict(message),
+                                  ts=message.timestamp, kind=message.msg_type)
+                self.store.trim('messages', self.network_id, self.MAX_MESSAGES)
+            return
+        
+        def append(data):
+            data.append(asdict(message))
+            del data[:-self.MAX_MESSAGES]
+        
+        data, _ = self._messages_doc.update(append)
+        self.messages = [CoordinationMessage(**m) for m in data]
     
     def _load_pools(self) -> Dict[str, ResourcePool]:
-        if self.pools_file.exists():
-            with open(self.pools_file, 'r') as f:
-                data = json.load(f)
-                return {k: ResourcePool(**v) for k, v in data.items()}
-        return {}
-    
-    def _save_pools(self):
-        with open(self.pools_file, 'w') as f:
-            json.dump({k: asdict(v) for k, v in self.pools.items()}, f, indent=2)
+        if self.store:
+            data = self.store.get_all('pools', self.network_id)
+            return {k: ResourcePool(**v) for k, v in data.items()}
+        data = self._pools_doc.load()
+        return {k: ResourcePool(**v) for k, v in data.items()}
+    
+    def _save_pool(self, pool_id: str):
+        """Persist a single pool, keeping other processes' pools"""
+        pool = self.pools[pool_id]
+        if self.store:
+            self.store.put('pools', self.network_id, pool_id, asdict(pool))
+            return
+        
+        def upsert(data):
+            data[pool_id] = asdict(pool)
+        
+        data, _ = self._pools_doc.update(upsert)
+        self.pools = {k: ResourcePool(**v) for k, v in data.items()}
+    
+    def _modify_pool(self, pool_id: str, fn: Callable[[ResourcePool], Any]) -> Any:
+        """Apply `fn` to the latest stored copy of a pool and persist it"""
+        if self.store:
+            with self.store.transaction():
+                row = self.store.get('pools', self.network_id, pool_id)
+                pool = ResourcePool(**row) if row else self.pools[pool_id]
+                result = fn(pool)
+                self.store.put('pools', self.network_id, pool_id, asdict(pool))
+            self.pools[pool_id] = pool
+            return result
+        
+        def apply(data):
+            pool = ResourcePool(**data[pool_id]) if pool_id in data else self.pools[pool_id]
+            result = fn(pool)
+            data[pool_id] = asdict(pool)
+            return result
+        
+        data, result = self._pools_doc.update(apply)
+        self.pools = {k: ResourcePool(**v) for k, v in data.items()}
+        return result
+    
+    def get_concurrency_stats(self) -> Dict:
+        """Commits and compare-and-swap conflicts on the shared network files"""
+        return {
+            "agents": dict(self._agents_doc.stats),
+            "messages": dict(self._messages_doc.stats),
+            "pools": dict(self._pools_doc.stats),
+        }
     
     def register_agent(self, profile: AgentProfile) -> bool:
         """Register an agent with the network"""
         profile.last_seen = time.time()
         self.agents[profile.agent_id] = profile
-        self._save_agents()
+        self._save_agent(profile.agent_id)
         
         print(f"✅ Agent registered: {profile.agent_id}")
         print(f"   Capabilities: {', '.join(profile.capabilities)}")
@@ -130,13 +231,13 @@ class AgentCoordinationNetwork:
         if agent_id not in self.agents:
             return False
         
-        agent = self.agents[agent_id]
-        for key, value in kwargs.items():
-            if hasattr(agent, key):
-                setattr(agent, key, value)
+        def apply(agent: AgentProfile):
+            for key, value in kwargs.items():
+                if hasattr(agent, key):
+                    setattr(agent, key, value)
+            agent.last_seen = time.time()
         
-        agent.last_seen = time.time()
-        self._save_agents()
+        self._modify_agent(agent_id, apply)
         
         return True
     
@@ -165,10 +266,10 @@ class AgentCoordinationNetwork:
         self.messages.append(message)
         
         # Keep only last 1000 messages
-        if len(self.messages) > 1000:
-            self.messages = self.messages[-1000:]
+        if len(self.messages) > self.MAX_MESSAGES:
+            self.messages = self.messages[-self.MAX_MESSAGES:]
         
-        self._save_messages()
+        self._append_message(message)
         
         if message.recipient == "broadcast":
             print(f"📢 Broadcast from {message.sender}: {message.msg_type}")
@@ -241,8 +342,7 @@ class AgentCoordinationNetwork:
         
         # Increase reputation for helping
         if agent_id in self.agents:
-            self.agents[agent_id].reputation = min(100, self.agents[agent_id].reputation + 1)
-            self._save_agents()
+            self._modify_agent(agent_id, lambda a: setattr(a, 'reputation', min(100, a.reputation + 1)))
         
         return True
     
@@ -258,7 +358,7 @@ class AgentCoordinationNetwork:
         )
         
         self.pools[pool_id] = pool
-        self._save_pools()
+        self._save_pool(pool_id)
         
         print(f"🏦 Resource pool created: {name}")
         print(f"   Initial contribution: {initial_contribution} ETH")
@@ -271,18 +371,17 @@ class AgentCoordinationNetwork:
         if pool_id not in self.pools:
             return False
         
-        pool = self.pools[pool_id]
-        pool.total_balance += amount
-        pool.contributors[agent_id] = pool.contributors.get(agent_id, 0) + amount
+        def apply(pool: ResourcePool):
+            pool.total_balance += amount
+            pool.contributors[agent_id] = pool.contributors.get(agent_id, 0) + amount
         
-        self._save_pools()
+        self._modify_pool(pool_id, apply)
         
         # Increase reputation
         if agent_id in self.agents:
-            self.agents[agent_id].reputation = min(100, self.agents[agent_id].reputation + 2)
-            self._save_agents()
+            self._modify_agent(agent_id, lambda a: setattr(a, 'reputation', min(100, a.reputation + 2)))
         
-        print(f"💰 {agent_id} contributed {amount} ETH to {pool.name}")
+        print(f"💰 {agent_id} contributed {amount} ETH to {self.pools[pool_id].name}")
         
         return True
     
@@ -291,8 +390,6 @@ class AgentCoordinationNetwork:
         if pool_id not in self.pools:
             return None
         
-        pool = self.pools[pool_id]
-        
         # Check if agent can borrow (reputation check)
         if agent_id in self.agents:
             agent = self.agents[agent_id]
@@ -300,26 +397,29 @@ class AgentCoordinationNetwork:
                 print(f"❌ {agent_id} reputation too low for loan")
                 return None
         
-        # Check if pool has enough
-        if pool.total_balance < amount:
-            print(f"❌ Pool {pool.name} has insufficient funds")
+        def apply(pool: ResourcePool) -> Optional[Dict]:
+            # Check against the latest balance, other agents may have borrowed
+            if pool.total_balance < amount:
+                return None
+            
+            loan = {
+                "loan_id": f"loan_{int(time.time())}_{agent_id}",
+                "agent_id": agent_id,
+                "amount": amount,
+                "purpose": purpose,
+                "timestamp": time.time(),
+                "repaid": False
+            }
+            pool.loans.append(loan)
+            pool.total_balance -= amount
+            return loan
+        
+        loan = self._modify_pool(pool_id, apply)
+        
+        if loan is None:
+            print(f"❌ Pool {self.pools[pool_id].name} has insufficient funds")
             return None
         
-        # Create loan
-        loan = {
-            "loan_id": f"loan_{int(time.time())}_{agent_id}",
-            "agent_id": agent_id,
-            "amount": amount,
-            "purpose": purpose,
-            "timestamp": time.time(),
-            "repaid": False
-        }
-        
-        pool.loans.append(loan)
-        pool.total_balance -= amount
-        
-        self._save_pools()
-        
         print(f"💸 Loan granted to {agent_id}")
         print(f"   Amount: {amount} ETH")
         print(f"   Purpose: {purpose}")
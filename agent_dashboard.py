@@ -35,6 +35,7 @@ class AgentDashboard:
         # Load data from various systems
         status = self._get_agent_status()
         reputation = self._get_reputation()
+        history = self._get_history()
         
         html = f"""
 <!DOCTYPE html>
@@ -255,6 +256,27 @@ class AgentDashboard:
                     <span class="metric-value">{status.get('uptime_hours', 0):.1f} hours</span>
                 </div>
             </div>
+            
+            <!-- Survival History Card -->
+            <div class="card">
+                <h2>💓 Survival History (7d)</h2>
+                <div class="metric">
+                    <span>Heartbeats:</span>
+                    <span class="metric-value">{history['heartbeats']}</span>
+                </div>
+                <div class="metric">
+                    <span>Balance Range:</span>
+                    <span class="metric-value">{history['balance_min']:.4f} - {history['balance_max']:.4f} ETH</span>
+                </div>
+                <div class="metric">
+                    <span>Most Common Tier:</span>
+                    <span class="metric-value">{history['common_tier']}</span>
+                </div>
+                <div class="metric">
+                    <span>Last Heartbeat:</span>
+                    <span class="metric-value">{history['last_heartbeat']}</span>
+                </div>
+            </div>
         </div>
         
         <!-- Actions -->
@@ -285,9 +307,9 @@ class AgentDashboard:
         """Get current agent status"""
         try:
             sys.path.insert(0, str(Path(__file__).parent))
-            from enhanced_survival import EnhancedSoulSurvival
+            from soul_registry import get_enhanced_survival
             
-            survival = EnhancedSoulSurvival(self.agent_id)
+            survival = get_enhanced_survival(self.agent_id)
             backup_status = survival.get_backup_status()
             
             return {
@@ -347,6 +369,36 @@ class AgentDashboard:
                 "trust_level": "NEW"
             }
     
+    def _get_history(self) -> Dict[str, Any]:
+        """Summarize the last 7 days of survival heartbeats (hourly rollups)"""
+        try:
+            from datetime import timedelta
+            from soul_registry import get_survival
+            
+            since = datetime.now() - timedelta(days=7)
+            points = get_survival().get_history(start=since, resolution="hourly")
+            
+            tiers: Dict[str, int] = {}
+            for point in points:
+                for tier, n in point['tiers'].items():
+                    tiers[tier] = tiers.get(tier, 0) + n
+            
+            return {
+                "heartbeats": sum(p['count'] for p in points),
+                "balance_min": min((p['balance_min'] for p in points), default=0),
+                "balance_max": max((p['balance_max'] for p in points), default=0),
+                "common_tier": max(tiers, key=tiers.get) if tiers else "N/A",
+                "last_heartbeat": points[-1]['timestamp'][:16] if points else "Never"
+            }
+        except:
+            return {
+                "heartbeats": 0,
+                "balance_min": 0,
+                "balance_max": 0,
+                "common_tier": "N/A",
+                "last_heartbeat": "Never"
+            }
+    
     def save_dashboard(self):
         """Generate and save dashboard HTML"""
         html = self.generate_dashboard()
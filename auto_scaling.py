@@ -13,6 +13,9 @@ from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
 from copy import deepcopy
 
+from codec import load_state, save_state
+from state_store import StateStore, get_state_store
+
 @dataclass
 class ChildAgent:
     """Child agent spawned from parent"""
@@ -54,8 +57,10 @@ class AutoScalingManager:
     CHILD_FUNDING = 0.1        # ETH to give child
     MIN_PARENT_RESERVE = 0.2   # Keep at least this much
     
-    def __init__(self, parent_id: str = "openclaw_main_agent"):
+    def __init__(self, parent_id: str = "openclaw_main_agent",
+                 store: Optional[StateStore] = None):
         self.parent_id = parent_id
+        self.store = store if store is not None else get_state_store()
         self.data_dir = Path(__file__).parent / f"lineage_{parent_id}"
         self.data_dir.mkdir(exist_ok=True)
         
@@ -70,20 +75,31 @@ class AutoScalingManager:
         print(f"   Auto-spawn: {self.config.get('auto_spawn', False)}")
     
     def _load_children(self) -> Dict[str, ChildAgent]:
+        if self.store:
+            data = self.store.get_all('children', self.parent_id)
+            return {k: ChildAgent(**v) for k, v in data.items()}
         if self.children_file.exists():
-            with open(self.children_file, 'r') as f:
-                data = json.load(f)
-                return {k: ChildAgent(**v) for k, v in data.items()}
+            data = load_state(self.children_file)
+            return {k: ChildAgent(**v) for k, v in data.items()}
         return {}
     
     def _save_children(self):
-        with open(self.children_file, 'w') as f:
-            json.dump({k: asdict(v) for k, v in self.children.items()}, f, indent=2)
+        save_state(self.children_file, {k: asdict(v) for k, v in self.children.items()})
+    
+    def _save_child(self, child_id: str):
+        """Persist one child (one-row upsert with the shared store)"""
+        if self.store:
+            self.store.put('children', self.parent_id, child_id, asdict(self.children[child_id]))
+            return
+        self._save_children()
     
     def _load_config(self) -> Dict:
-        if self.config_file.exists():
-            with open(self.config_file, 'r') as f:
-                return json.load(f)
+        if self.store:
+            config = self.store.get('documents', 'scaling_config', self.parent_id)
+            if config:
+                return config
+        elif self.config_file.exists():
+            return load_state(self.config_file)
         return {
             "auto_spawn": True,
             "max_children": 10,
@@ -93,8 +109,10 @@ class AutoScalingManager:
         }
     
     def _save_config(self):
-        with open(self.config_file, 'w') as f:
-            json.dump(self.config, f, indent=2)
+        if self.store:
+            self.store.put('documents', 'scaling_config', self.parent_id, self.config)
+            return
+        save_state(self.config_file, self.config)
     
     def should_spawn(self, balance: float) -> Dict[str, Any]:
         """
@@ -221,7 +239,7 @@ LINEAGE: {self.parent_id} -> You
         )
         
         self.children[child_id] = child
-        self._save_children()
+        self._save_child(child_id)
         
         # Deduct funding from parent
         parent_soul['current_balance'] -= funding
@@ -259,7 +277,7 @@ LINEAGE: {self.parent_id} -> You
         # 5. Start agent loop
         
         child.status = "alive"
-        self._save_children()
+        self._save_child(child_id)
         
         print(f"✅ Child provisioned and alive!")
         
@@ -15,6 +15,8 @@ import time
 from pathlib import Path
 from typing import Optional, Dict, Any
 
+from codec import load_state
+
 class BankrIntegration:
     """
     Integrates Bankr CLI with Soul Marketplace.
@@ -197,8 +199,7 @@ def fund_and_activate_agent():
     # Load agent wallet
     agent_wallet_file = Path(__file__).parent / "wallet.json"
     if agent_wallet_file.exists():
-        with open(agent_wallet_file, 'r') as f:
-            wallet = json.load(f)
+        wallet = load_state(agent_wallet_file)
         agent_address = wallet.get('address')
         
         if not agent_address:
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Coordination Network Concurrency Benchmark
+
+Starts 32 agent processes sharing one network. Each registers itself,
+then repeatedly updates its status and contributes to a shared pool.
+Reports throughput and compare-and-swap conflicts, and fails if any
+update was lost (pool balance, contributions or registrations off).
+
+Usage: python bench_coordination.py [writers] [ops_per_writer]
+"""
+
+import contextlib
+import io
+import multiprocessing
+import shutil
+import sys
+import time
+from pathlib import Path
+
+from agent_coordination import AgentCoordinationNetwork, AgentProfile
+
+
+NETWORK_ID = "bench_concurrency"
+POOL_ID = "bench_pool"
+CONTRIBUTION = 0.001
+
+
+def _quiet_network() -> AgentCoordinationNetwork:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return AgentCoordinationNetwork(NETWORK_ID)
+
+
+def writer(index: int, ops: int, barrier) -> dict:
+    agent_id = f"bench_agent_{index}"
+    network = _quiet_network()
+    barrier.wait()
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        network.register_agent(AgentProfile(
+            agent_id=agent_id, soul_cid="", capabilities=["benchmark"],
+            tier="NORMAL", balance=0.0, reputation=0.0, last_seen=0.0,
+            is_active=True, offers_help=False, seeking_help=False
+        ))
+        for i in range(ops):
+            network.update_agent_status(agent_id, balance=float(i))
+            network.contribute_to_pool(POOL_ID, agent_id, CONTRIBUTION)
+    elapsed = time.perf_counter() - start
+
+    return {"elapsed": elapsed, "stats": network.get_concurrency_stats()}
+
+
+def main():
+    writers = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    ops = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+
+    network = _quiet_network()
+    with contextlib.redirect_stdout(io.StringIO()):
+        network.create_resource_pool(POOL_ID, "Benchmark Pool", "bench_creator", 0.0)
+
+    print("=" * 60)
+    print(f"🔒 COORDINATION BENCHMARK: {writers} writers x {ops} rounds")
+    print("=" * 60)
+
+    try:
+        ctx = multiprocessing.get_context("fork")
+        barrier = ctx.Manager().Barrier(writers)
+        start = time.perf_counter()
+        with ctx.Pool(writers) as pool:
+            results = pool.starmap(writer, [(i, ops, barrier) for i in range(writers)])
+        wall = time.perf_counter() - start
+
+        # 1 registration + ops x (status update + pool contribution + reputation bump)
+        total_ops = writers * (1 + 3 * ops)
+        commits = sum(r['stats'][f]['commits'] for r in results for f in ('agents', 'pools'))
+        conflicts = sum(r['stats'][f]['conflicts'] for r in results for f in ('agents', 'pools'))
+
+        print(f"Wall time:     {wall:.2f}s")
+        print(f"Throughput:    {total_ops / wall:,.0f} updates/s")
+        print(f"Commits:       {commits}")
+        print(f"CAS conflicts: {conflicts} ({conflicts / max(commits, 1):.1%} of commits, retried)")
+
+        # Verify nothing was lost
+        final = _quiet_network()
+        pool = final.pools[POOL_ID]
+        expected_balance = writers * ops * CONTRIBUTION
+        errors = []
+        if abs(pool.total_balance - expected_balance) > 1e-9:
+            errors.append(f"pool balance {pool.total_balance:.6f} != {expected_balance:.6f}")
+        for i in range(writers):
+            agent_id = f"bench_agent_{i}"
+            if agent_id not in final.agents:
+                errors.append(f"{agent_id} registration lost")
+                continue
+            if abs(pool.contributors.get(agent_id, 0) - ops * CONTRIBUTION) > 1e-9:
+                errors.append(f"{agent_id} contributions lost")
+            if final.agents[agent_id].reputation != min(100, 2 * ops):
+                errors.append(f"{agent_id} reputation {final.agents[agent_id].reputation}")
+            if final.agents[agent_id].balance != float(ops - 1):
+                errors.append(f"{agent_id} status update lost")
+
+        if errors:
+            print(f"\n❌ LOST UPDATES ({len(errors)}):")
+            for error in errors[:10]:
+                print(f"   {error}")
+            sys.exit(1)
+        print("\n✅ No lost updates")
+    finally:
+        shutil.rmtree(Path(__file__).parent / f"network_{NETWORK_ID}", ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
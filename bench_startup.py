@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark - import cost of the agent modules
+
+Runs `python -X importtime` on a fresh interpreter for each entry point
+and fails if the cost of our imports (everything the interpreter did not
+already load for a bare `-c pass`) exceeds the budget. Also checks that
+importing constructs nothing: the module-level agents must stay lazy.
+
+Usage: python bench_startup.py [budget_ms]
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+ROOT = Path(__file__).parent
+
+# Budget for each entry point's own imports, in milliseconds
+DEFAULT_BUDGET_MS = 100.0
+RUNS = 5
+
+ENTRY_POINTS = {
+    "__init__": "import __init__ as m; assert not m.marketplace_agent.resolved",
+    "work_logger": "import work_logger as m; assert not m.work_logger.resolved",
+    "soul_encryption": "import soul_encryption",
+    "self_healing": "import self_healing",
+    "onchain_adapter": "import onchain_adapter",
+    "immortal_agent": "import immortal_agent",
+}
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """Top-level imports -> cumulative microseconds"""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        # Nested imports are indented under their parent; keep the roots
+        if name.startswith("  ", 1):
+            continue
+        times[name.strip()] = int(cumulative_us)
+    return times
+
+
+def measure(code: str) -> Dict[str, int]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import sys; sys.path.insert(0, {str(ROOT)!r}); {code}"],
+        capture_output=True, text=True, cwd=ROOT
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    output = result.stdout.strip()
+    if output:
+        raise RuntimeError(f"import printed output: {output.splitlines()[0]}")
+    return parse_importtime(result.stderr)
+
+
+def import_cost_ms(code: str, baseline: set) -> float:
+    """Best-of-N cost of imports not already loaded at interpreter startup"""
+    best = None
+    for _ in range(RUNS):
+        times = measure(code)
+        cost = sum(us for name, us in times.items() if name not in baseline) / 1000
+        best = cost if best is None else min(best, cost)
+    return best
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET_MS
+    baseline = set(measure("pass"))
+
+    print("=" * 60)
+    print(f"⏱️  STARTUP BENCHMARK (budget {budget:.0f} ms per entry point)")
+    print("=" * 60)
+
+    failures = []
+    for name, code in ENTRY_POINTS.items():
+        try:
+            cost = import_cost_ms(code, baseline)
+        except RuntimeError as e:
+            print(f"❌ {name:16} {e}")
+            failures.append(name)
+            continue
+        ok = cost <= budget
+        print(f"{'✅' if ok else '❌'} {name:16} {cost:7.1f} ms")
+        if not ok:
+            failures.append(name)
+
+    if failures:
+        print(f"\nFAILED: {', '.join(failures)}")
+        sys.exit(1)
+    print("\nAll entry points within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,14 +4,13 @@
  * Similar to conway-terminal CLI
  */
 
-const { execSync } = require('child_process');
+const { execSync, spawn } = require('child_process');
 const path = require('path');
-const fs = require('fs');
+const { SKILL_DIR, runViaDaemon } = require('../lib/daemon-client');
 
-const SKILL_DIR = path.join(process.env.HOME, '.openclaw', 'skills', 'soul-marketplace');
 const PYTHON = 'python3';
 
-function runPython(args) {
+function runInProcess(args) {
   try {
     const result = execSync(`${PYTHON} ${path.join(SKILL_DIR, '__init__.py')} ${args.join(' ')}`, {
       cwd: SKILL_DIR,
@@ -24,6 +23,19 @@ function runPython(args) {
   }
 }
 
+async function runPython(args) {
+  const output = await runViaDaemon(args);
+  return output !== null ? output : runInProcess(args);
+}
+
+function startDaemon() {
+  const proc = spawn(PYTHON, [path.join(SKILL_DIR, '__init__.py'), 'daemon'], {
+    cwd: SKILL_DIR,
+    stdio: 'inherit'
+  });
+  proc.on('close', (code) => process.exit(code || 0));
+}
+
 function showHelp() {
   console.log(`
 Soul Marketplace Terminal v1.0.0
@@ -35,6 +47,8 @@ Commands:
   list                List SOUL.md for sale
   value               Calculate current soul value
   simulate [n]        Simulate n tasks (default: 10)
+  daemon              Keep the agent in memory and serve commands
+                      (other commands use it automatically when running)
   setup               Run first-time setup
   mcp                 Start MCP server
 
@@ -53,7 +67,7 @@ Examples:
 `);
 }
 
-function main() {
+async function main() {
   const args = process.argv.slice(2);
   
   if (args.length === 0) {
@@ -65,11 +79,11 @@ function main() {
 
   switch (command) {
     case 'status':
-      console.log(runPython(['status']));
+      console.log(await runPython(['status']));
       break;
 
     case 'heartbeat':
-      console.log(runPython(['heartbeat']));
+      console.log(await runPython(['heartbeat']));
       break;
 
     case 'work':
@@ -77,20 +91,24 @@ function main() {
         console.log('Usage: soul-marketplace work <type> <description>');
         process.exit(1);
       }
-      console.log(runPython(['work', args[1], args.slice(2).join(' ')]));
+      console.log(await runPython(['work', args[1], args.slice(2).join(' ')]));
       break;
 
     case 'list':
-      console.log(runPython(['list']));
+      console.log(await runPython(['list']));
       break;
 
     case 'value':
-      console.log(runPython([]));
+      console.log(await runPython([]));
       break;
 
     case 'simulate':
       const num = args[1] || '10';
-      console.log(runPython(['simulate', num]));
+      console.log(await runPython(['simulate', num]));
+      break;
+
+    case 'daemon':
+      startDaemon();
       break;
 
     case 'setup':
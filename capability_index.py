@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Capability Index
+
+Souls keep their capabilities as a list of entries
+({"name", "level", "earnings", "uses"}), which is what gets saved,
+listed and backed up. Looking a capability up by name in that list is a
+linear scan, and merging a purchased soul's capabilities was a scan per
+capability. CapabilityIndex keeps a name -> entry dict next to the list:
+
+    index = CapabilityIndex(soul['capabilities'])
+    index.get("code_generation")      # O(1)
+    index.merge(listing['capabilities'])
+
+The list stays the source of truth. The index is rebuilt when the soul
+is loaded or replaced, updated by add()/merge(), and rebuilt on the
+next lookup if the list object was swapped or appended to directly.
+
+It also keeps the running aggregates soul valuation needs (total
+capability earnings, expert count), so record_use()/add() keep them
+current and valuation does not walk the list. Earnings changed by
+writing to an entry directly are not seen until the next rebuild().
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+class CapabilityIndex:
+    """name -> entry index over a soul's capability list"""
+
+    def __init__(self, capabilities: List[Dict]):
+        self.rebuild(capabilities)
+
+    def rebuild(self, capabilities: List[Dict]):
+        """Re-index `capabilities` (the list is shared, not copied)"""
+        self.capabilities = capabilities
+        self._by_name = {}
+        self.earnings_total = 0.0
+        self.expert_count = 0
+        for cap in capabilities:
+            # First entry wins, as the old linear scans did
+            self._by_name.setdefault(cap['name'], cap)
+            self._count(cap)
+        self._length = len(capabilities)
+
+    def _count(self, cap: Dict):
+        self.earnings_total += cap.get('earnings', 0)
+        if cap.get('level') == 'expert':
+            self.expert_count += 1
+
+    def sync(self, capabilities: List[Dict]):
+        """Rebuild if `capabilities` is a different list or changed size behind our back"""
+        if capabilities is not self.capabilities or len(capabilities) != self._length:
+            self.rebuild(capabilities)
+
+    def _check(self):
+        if len(self.capabilities) != self._length:
+            self.rebuild(self.capabilities)
+
+    def get(self, name: str) -> Optional[Dict]:
+        self._check()
+        return self._by_name.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        self._check()
+        return name in self._by_name
+
+    def __len__(self) -> int:
+        return len(self.capabilities)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.capabilities)
+
+    def names(self) -> List[str]:
+        self._check()
+        return list(self._by_name)
+
+    def add(self, cap: Dict) -> bool:
+        """Append `cap` unless one with its name exists; True if added"""
+        self._check()
+        if cap['name'] in self._by_name:
+            return False
+        self.capabilities.append(cap)
+        self._by_name[cap['name']] = cap
+        self._length += 1
+        self._count(cap)
+        return True
+
+    def record_use(self, name: str, value: float) -> Optional[Dict]:
+        """Credit one use earning `value` to capability `name` (None if unknown)"""
+        cap = self.get(name)
+        if cap is not None:
+            cap['earnings'] += value
+            cap['uses'] += 1
+            self.earnings_total += value
+        return cap
+
+    def merge(self, caps: Iterable[Dict]) -> List[Dict]:
+        """Add every capability not already present; returns the added entries"""
+        return [cap for cap in caps if self.add(cap)]
+
+
+def main():
+    """Compare indexed lookups and merges against the list scans they replace"""
+    import time
+
+    caps = [{"name": f"cap_{i}", "level": "intermediate", "earnings": 0.0, "uses": 0}
+            for i in range(2000)]
+    listing = [{"name": f"cap_{i}", "level": "expert", "earnings": 0.0, "uses": 0}
+               for i in range(1500, 2500)]
+
+    start = time.perf_counter()
+    scanned = [dict(c) for c in caps]
+    for cap in listing:
+        if not [c for c in scanned if c['name'] == cap['name']]:
+            scanned.append(cap)
+    scan_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    index = CapabilityIndex([dict(c) for c in caps])
+    added = index.merge(listing)
+    index_ms = (time.perf_counter() - start) * 1000
+
+    print(f"Merge {len(listing)} into {len(caps)}: scan {scan_ms:.1f}ms, index {index_ms:.2f}ms "
+          f"({len(added)} added, same result: {[c['name'] for c in scanned] == index.names()})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+State File Codec
+
+One fast path for every state file:
+
+- compact JSON (no indentation), via orjson when installed
+- or msgpack when configured and installed
+- a format-version header so readers know what they are looking at
+- transparent reads of the legacy indented files (no header)
+
+On-disk formats:
+    JSON:    {"__codec__": 2, "data": <payload>} (+ "meta": {...})
+    msgpack: b"SMPK" + version byte + msgpack(<payload>)
+             b"SMPM" + version byte + msgpack([<meta>, <payload>])
+
+Meta carries bookkeeping that must change atomically with the payload,
+such as the version counter used by file_lock.VersionedFile.
+
+Configured by the "codec" section of config.json ("format": "json" or
+"msgpack"). Files are written through atomic_writer.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+from atomic_writer import get_writer
+from lazy import is_available, lazy_module
+from settings import load_config
+
+
+FORMAT_VERSION = 2          # 1 = legacy indented JSON without a header
+HEADER_KEY = "__codec__"
+MSGPACK_MAGIC = b"SMPK"
+MSGPACK_META_MAGIC = b"SMPM"
+
+FORMATS = ("json", "msgpack")
+
+ORJSON_AVAILABLE = is_available("orjson")
+MSGPACK_AVAILABLE = is_available("msgpack")
+
+orjson = lazy_module("orjson")
+msgpack = lazy_module("msgpack")
+
+PathLike = Union[str, Path]
+
+
+def load_settings() -> Dict:
+    """Read the "codec" section of config.json"""
+    return load_config('codec')
+
+
+def _configured_format() -> str:
+    fmt = load_settings().get('format', 'json')
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown codec format: {fmt} (expected one of {FORMATS})")
+    if fmt == "msgpack" and not MSGPACK_AVAILABLE:
+        # Still readable everywhere; compact JSON is the portable fallback
+        return "json"
+    return fmt
+
+
+_format = None
+
+
+def get_format() -> str:
+    global _format
+    if _format is None:
+        _format = _configured_format()
+    return _format
+
+
+def _json_dumps(obj: Any) -> bytes:
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            pass  # e.g. ints beyond 64 bits; the stdlib handles those
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def _json_loads(raw: bytes) -> Any:
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass  # let the stdlib raise (or accept) with its own rules
+    return json.loads(raw)
+
+
+def _check_version(version: int):
+    if version > FORMAT_VERSION:
+        raise ValueError(f"State file format v{version} is newer than this codec (v{FORMAT_VERSION})")
+
+
+def encode(obj: Any, fmt: Optional[str] = None, meta: Optional[Dict] = None) -> bytes:
+    """Serialize `obj` with a format-version header"""
+    fmt = fmt or get_format()
+    if fmt == "msgpack":
+        if meta:
+            payload = msgpack.packb([meta, obj], use_bin_type=True)
+            return MSGPACK_META_MAGIC + bytes([FORMAT_VERSION]) + payload
+        return MSGPACK_MAGIC + bytes([FORMAT_VERSION]) + msgpack.packb(obj, use_bin_type=True)
+    envelope = {HEADER_KEY: FORMAT_VERSION, "data": obj}
+    if meta:
+        envelope['meta'] = meta
+    return _json_dumps(envelope)
+
+
+def decode_with_meta(raw: bytes) -> Tuple[Any, Dict]:
+    """Deserialize any format we have ever written, returning (payload, meta)"""
+    if raw.startswith(MSGPACK_MAGIC) or raw.startswith(MSGPACK_META_MAGIC):
+        if not MSGPACK_AVAILABLE:
+            raise RuntimeError("State file is msgpack-encoded but msgpack is not installed")
+        _check_version(raw[len(MSGPACK_MAGIC)])
+        obj = msgpack.unpackb(raw[len(MSGPACK_MAGIC) + 1:], raw=False)
+        if raw.startswith(MSGPACK_META_MAGIC):
+            meta, obj = obj
+            return obj, meta
+        return obj, {}
+
+    obj = _json_loads(raw)
+    if isinstance(obj, dict) and HEADER_KEY in obj:
+        _check_version(obj[HEADER_KEY])
+        return obj.get('data'), obj.get('meta', {})
+    # Legacy file: plain (indented) JSON document
+    return obj, {}
+
+
+def decode(raw: bytes) -> Any:
+    """Deserialize any format we have ever written"""
+    return decode_with_meta(raw)[0]
+
+
+def load_state(path: PathLike) -> Any:
+    """Read and decode a state file"""
+    with open(path, 'rb') as f:
+        return decode(f.read())
+
+
+def load_state_meta(path: PathLike) -> Tuple[Any, Dict]:
+    """Read a state file, returning (payload, meta)"""
+    with open(path, 'rb') as f:
+        return decode_with_meta(f.read())
+
+
+def save_state(path: PathLike, obj: Any, meta: Optional[Dict] = None) -> int:
+    """Encode and atomically write a state file. Returns bytes written."""
+    return get_writer().write_bytes(path, encode(obj, meta=meta))
+
+
+def main():
+    """Compare legacy vs codec sizes for the state files in this directory"""
+    root = Path(__file__).parent
+    print(f"Codec format: {get_format()} (orjson: {ORJSON_AVAILABLE}, msgpack: {MSGPACK_AVAILABLE})")
+
+    for path in sorted(root.glob("*.json")):
+        if path.name in ("config.json", "package.json", "package-lock.json"):
+            continue
+        try:
+            obj = load_state(path)
+        except (ValueError, RuntimeError):
+            continue
+        legacy = len(json.dumps(obj, indent=2))
+        compact = len(encode(obj))
+        print(f"  {path.name:32} {legacy:8} -> {compact:8} bytes ({compact / max(legacy, 1):.0%})")
+
+
+if __name__ == "__main__":
+    main()
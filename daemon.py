@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Soul Marketplace Daemon
+
+Keeps one SoulMarketplaceAgent hot in memory and serves CLI commands over
+a local Unix domain socket, so `work`/`status`/`heartbeat` calls don't
+re-import everything and re-parse every state file.
+
+Protocol: one JSON object per line in each direction.
+    -> {"id": 1, "args": ["work", "code_generate", "Built feature X"]}
+    <- {"id": 1, "ok": true, "output": "Logged: ..."}
+
+"ping" and "shutdown" are handled by the daemon itself.
+
+Start with `python __init__.py daemon` (or `soul-marketplace daemon`).
+"""
+
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from settings import load_config
+
+
+SOCKET_ENV = "SOUL_MARKETPLACE_SOCKET"
+DEFAULT_SOCKET = ".soul_marketplace.sock"
+
+
+def socket_path() -> Path:
+    """Daemon socket: $SOUL_MARKETPLACE_SOCKET, else config.json, else the package dir"""
+    if os.getenv(SOCKET_ENV):
+        return Path(os.environ[SOCKET_ENV])
+    name = load_config('daemon', {"socket": DEFAULT_SOCKET})['socket']
+    return Path(__file__).parent / name
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                response = self.server.daemon.dispatch(request)
+            except json.JSONDecodeError as e:
+                response = {"id": None, "ok": False, "error": f"Bad request: {e}"}
+            self.wfile.write((json.dumps(response) + "\n").encode('utf-8'))
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class SoulDaemon:
+    """Serves `runner(agent, args)` commands for one long-lived agent"""
+
+    def __init__(self, agent: Any, runner: Callable[[Any, List[str]], None],
+                 path: Optional[Path] = None):
+        self.agent = agent
+        self.runner = runner
+        self.path = Path(path) if path else socket_path()
+        self.started = time.time()
+        self.requests = 0
+        # Commands print their output; stdout is captured per call, so run one at a time
+        self._lock = threading.Lock()
+        self._server = None
+
+    def dispatch(self, request: Dict) -> Dict:
+        if not isinstance(request, dict):
+            return {"id": None, "ok": False, "error": "Bad request: expected a JSON object"}
+        request_id = request.get('id')
+        args = request.get('args', [])
+        if not isinstance(args, list):
+            return {"id": request_id, "ok": False, "error": "Bad request: args must be a list"}
+        args = [str(a) for a in args]
+
+        if args[:1] == ["ping"]:
+            return {"id": request_id, "ok": True, "output": "pong", "stats": self.stats()}
+        if args[:1] == ["shutdown"]:
+            threading.Thread(target=self._server.shutdown, daemon=True).start()
+            return {"id": request_id, "ok": True, "output": "Daemon stopping"}
+
+        with self._lock:
+            self.requests += 1
+            buffer = io.StringIO()
+            try:
+                with contextlib.redirect_stdout(buffer):
+                    self.runner(self.agent, args)
+            except Exception as e:
+                return {"id": request_id, "ok": False, "error": str(e),
+                        "output": buffer.getvalue().rstrip()}
+        return {"id": request_id, "ok": True, "output": buffer.getvalue().rstrip()}
+
+    def stats(self) -> Dict:
+        return {
+            "pid": os.getpid(),
+            "uptime": round(time.time() - self.started, 1),
+            "requests": self.requests,
+        }
+
+    def serve_forever(self):
+        if self.path.exists():
+            if is_running(self.path):
+                raise RuntimeError(f"Daemon already running on {self.path}")
+            self.path.unlink()  # stale socket from a crashed daemon
+
+        self._server = _Server(str(self.path), _Handler)
+        self._server.daemon = self
+        print(f"🔌 Soul Marketplace daemon listening on {self.path} (pid {os.getpid()})")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            self.path.unlink(missing_ok=True)
+            # Push coalesced soul writes out before the process goes away
+            from soul_registry import registry
+            registry.flush()
+            print("🔌 Daemon stopped")
+
+
+def serve(agent: Any, runner: Callable[[Any, List[str]], None],
+          path: Optional[Path] = None):
+    """Run the daemon in the foreground until shutdown/SIGTERM"""
+    SoulDaemon(agent, runner, path).serve_forever()
+
+
+def call(args: List[str], path: Optional[Path] = None, timeout: float = 30.0) -> Optional[Dict]:
+    """
+    Send one command to the daemon. Returns None if the daemon is
+    unavailable: nothing listening, a stale socket, or no reply within
+    `timeout` (a hung daemon counts as down).
+    """
+    path = Path(path) if path else socket_path()
+    if not path.exists():
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(path))
+            sock.sendall((json.dumps({"id": 1, "args": args}) + "\n").encode('utf-8'))
+            with sock.makefile('rb') as f:
+                line = f.readline()
+    except OSError:  # includes ConnectionRefusedError and socket.timeout
+        return None
+    return json.loads(line) if line else None
+
+
+def is_running(path: Optional[Path] = None) -> bool:
+    return call(["ping"], path, timeout=2.0) is not None
+
+
+def main():
+    """python daemon.py [status|stop|<command...>]"""
+    args = sys.argv[1:] or ["status"]
+
+    if args == ["stop"]:
+        response = call(["shutdown"])
+    elif args == ["status"]:
+        response = call(["ping"])
+        if response:
+            response['output'] = json.dumps(response['stats'], indent=2)
+    else:
+        response = call(args)
+
+    if response is None:
+        print(f"No daemon running on {socket_path()}")
+        sys.exit(1)
+    print(response.get('output', ''))
+    if not response.get('ok'):
+        print(f"Error: {response.get('error')}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,12 +13,19 @@ Integrates:
 import json
 import time
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 
 # Import our modules
 from ipfs_storage import OnChainSoulManager, IPFSStorage
 from onchain_adapter import SoulMarketplaceAdapter
+from capability_index import CapabilityIndex
+from codec import load_state, save_state
+from soul_versions import SoulVersionLog
+from state_store import StateStore, get_state_store
+from write_behind import (
+    DEFAULT_BYTE_BUDGET, DEFAULT_INTERVAL, WriteBehindWriter, load_settings
+)
 
 
 class EnhancedSoulSurvival:
@@ -36,18 +43,31 @@ class EnhancedSoulSurvival:
     def __init__(self, 
                  soul_id: str = "openclaw_main_agent",
                  enable_backups: bool = True,
-                 private_key: Optional[str] = None):
+                 private_key: Optional[str] = None,
+                 store: Optional[StateStore] = None):
         
         self.soul_id = soul_id
         self.enable_backups = enable_backups
+        self.store = store if store is not None else get_state_store()
         
         # Initialize components
-        self.ipfs_manager = OnChainSoulManager(soul_id)
+        self.ipfs_manager = OnChainSoulManager(soul_id, store=self.store)
         self.onchain = SoulMarketplaceAdapter(private_key=private_key)
         
-        # Soul data
+        # Soul data (writes are coalesced; see write_behind.py)
         self.soul_file = Path(__file__).parent / f"SOUL_{soul_id}.json"
+        settings = load_settings()
+        self._soul_writer = WriteBehindWriter(
+            self._write_soul,
+            interval=settings.get('interval', DEFAULT_INTERVAL) if settings.get('enabled', True) else 0,
+            byte_budget=settings.get('byte_budget', DEFAULT_BYTE_BUDGET),
+            name=f"soul_{soul_id}"
+        )
+        self._persisted_tier = None
+        self.versions = SoulVersionLog(soul_id, store=self.store)
         self.soul = self._load_or_create_soul()
+        self.capability_index = CapabilityIndex(self.soul['capabilities'])
+        self._persisted_tier = self.get_tier()
         
         # State
         self.state_file = Path(__file__).parent / f"enhanced_state_{soul_id}.json"
@@ -63,9 +83,18 @@ class EnhancedSoulSurvival:
     
     def _load_or_create_soul(self) -> Dict[str, Any]:
         """Load or create SOUL.md"""
-        if self.soul_file.exists():
-            with open(self.soul_file, 'r') as f:
-                return json.load(f)
+        soul = None
+        if self.store:
+            soul = self.store.get('souls', 'enhanced', self.soul_id)
+        elif self.soul_file.exists():
+            soul = load_state(self.soul_file)
+        if soul:
+            # Older souls carried their version history inline
+            if isinstance(soul.get('version_history'), list):
+                soul['version_log'] = self.versions.extend(soul.pop('version_history'))
+                self._soul_writer.mark_dirty(soul)
+                self._soul_writer.flush()
+            return soul
         
         soul = {
             "format": "soul/v1",
@@ -102,22 +131,40 @@ class EnhancedSoulSurvival:
             
             "lineage": [],
             "children": [],
-            "version_history": []
+            "version_log": self.versions.pointer()
         }
         
         self._save_soul(soul)
         return soul
     
     def _save_soul(self, soul: Dict):
+        """Mark SOUL dirty; written behind, immediately on tier change"""
+        self._soul_writer.mark_dirty(soul)
+        
+        tier = self._tier_for(soul.get('current_balance', 0.0))
+        if tier != self._persisted_tier:
+            self._persisted_tier = tier
+            self._soul_writer.flush()
+    
+    def _write_soul(self, soul: Dict) -> Optional[int]:
         """Persist SOUL to disk"""
-        with open(self.soul_file, 'w') as f:
-            json.dump(soul, f, indent=2)
+        if self.store:
+            self.store.put('souls', 'enhanced', self.soul_id, soul)
+            return None
+        return save_state(self.soul_file, soul)
+    
+    def flush(self) -> bool:
+        """Write any pending SOUL changes now"""
+        return self._soul_writer.flush()
     
     def _load_state(self) -> Dict:
         """Load state"""
-        if self.state_file.exists():
-            with open(self.state_file, 'r') as f:
-                return json.load(f)
+        if self.store:
+            state = self.store.get('documents', 'enhanced_state', self.soul_id)
+            if state:
+                return state
+        elif self.state_file.exists():
+            return load_state(self.state_file)
         return {
             "token_id": None,
             "last_backup_time": 0,
@@ -127,13 +174,16 @@ class EnhancedSoulSurvival:
     
     def _save_state(self):
         """Persist state"""
-        with open(self.state_file, 'w') as f:
-            json.dump(self.state, f, indent=2)
+        if self.store:
+            self.store.put('documents', 'enhanced_state', self.soul_id, self.state)
+            return
+        save_state(self.state_file, self.state)
     
     def get_tier(self) -> str:
         """Calculate survival tier"""
-        balance = self.soul.get('current_balance', 0.0)
-        
+        return self._tier_for(self.soul.get('current_balance', 0.0))
+    
+    def _tier_for(self, balance: float) -> str:
         if balance < 0.001:
             return "CRITICAL"
         elif balance < 0.01:
@@ -145,24 +195,25 @@ class EnhancedSoulSurvival:
     
     def record_work(self, capability: str, value: float):
         """Record work and trigger auto-backup"""
-        # Update soul
-        self.soul['total_lifetime_earnings'] += value
-        self.soul['current_balance'] += value
-        
-        # Update capability
-        for cap in self.soul['capabilities']:
-            if cap['name'] == capability:
-                cap['earnings'] += value
-                cap['uses'] += 1
-                break
-        
-        # Add to version history
-        self.soul['version_history'].append({
-            "type": "work",
-            "capability": capability,
-            "value": value,
-            "timestamp": datetime.now().isoformat()
-        })
+        return self.record_work_batch([(capability, value)])[0]
+    
+    def record_work_batch(self, items: List[Tuple[str, float]]) -> List[float]:
+        """Record many (capability, value) earnings with one save and backup check"""
+        self.capability_index.sync(self.soul['capabilities'])
+        timestamp = datetime.now().isoformat()
+        for capability, value in items:
+            # Update soul
+            self.soul['total_lifetime_earnings'] += value
+            self.soul['current_balance'] += value
+            
+            # Update capability
+            self.capability_index.record_use(capability, value)
+        
+        # Add to version history (delta log; the soul keeps the head)
+        self.soul['version_log'] = self.versions.extend(
+            {"type": "work", "capability": capability, "value": value, "timestamp": timestamp}
+            for capability, value in items
+        )
         
         self._save_soul(self.soul)
         
@@ -170,7 +221,15 @@ class EnhancedSoulSurvival:
         if self.enable_backups:
             self._check_auto_backup()
         
-        return value
+        return [value for _, value in items]
+    
+    def get_version_history(self, since: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        """Version records after entry `since`, fetched from the delta log"""
+        return self.versions.history(since, limit)
+    
+    def verify_version_history(self) -> bool:
+        """Check the delta log hash chain against the soul's head pointer"""
+        return self.versions.verify(self.soul.get('version_log'))
     
     def _check_auto_backup(self):
         """Check if auto-backup is due"""
@@ -244,8 +303,15 @@ class EnhancedSoulSurvival:
         restored = self.ipfs_manager.restore_from_backup(cid)
         
         if restored:
+            # Backups from before the delta log carry an inline copy of
+            # history that is already in the log
+            if isinstance(restored.get('version_history'), list):
+                restored.pop('version_history')
+                restored['version_log'] = self.versions.pointer()
             self.soul = restored
+            self.capability_index.rebuild(self.soul['capabilities'])
             self._save_soul(self.soul)
+            self.flush()
             print(f"✅ Restored successfully")
             return True
         else:
@@ -354,7 +420,9 @@ class EnhancedSoulSurvival:
             "last_backup": self.state.get('last_backup_time'),
             "auto_backup_enabled": self.soul['backup_config']['auto_backup_enabled'],
             "cross_chain_enabled": self.soul['backup_config']['cross_chain_enabled'],
-            "restorable": len(ipfs_backups) > 0 or len(onchain_backups) > 0
+            "restorable": len(ipfs_backups) > 0 or len(onchain_backups) > 0,
+            "version_log": self.soul.get('version_log'),
+            "persistence": self._soul_writer.stats()
         }
     
     def heartbeat(self) -> Dict[str, Any]:
@@ -417,6 +485,9 @@ def main():
     survival.record_work("code_generation", 0.005)
     survival.record_work("onchain_operations", 0.003)
     
+    history = survival.get_version_history()
+    print(f"   Version log: {len(history)} entries, chain valid: {survival.verify_version_history()}")
+    
     print("\n3. Creating manual backup...")
     cid = survival.create_backup("manual")
     
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Gateway Retrieval
+
+Races IPFS gateways instead of trying them one after another, so one
+slow gateway no longer stalls a restore for its whole timeout:
+
+- the `race` best-ranked gateways start at once
+- if none has answered after the hedge delay (the `hedge_percentile`
+  latency of the last gateway started), the next one is started too
+- a failed or unverified attempt immediately starts a replacement
+- the first verified result wins; the others are told to stop through
+  their cancel event and their results are ignored
+
+Per-gateway latency samples and error counts are kept in
+.ipfs_gateway_stats.json and decide the order of future attempts:
+gateways that are failing go last, the rest fastest first.
+
+    retriever = GatewayRetriever(fetch)       # fetch(gateway, cid, cancel) -> bytes or None
+    content = retriever.retrieve(cid, gateways)
+"""
+
+import json
+import queue
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from codec import load_state, save_state
+from settings import load_config
+
+
+DEFAULT_RACE = 2
+DEFAULT_HEDGE_PERCENTILE = 0.9
+DEFAULT_HEDGE_DELAY = 0.5  # seconds, for a gateway with no latency history yet
+DEFAULT_TIMEOUT = 15.0
+LATENCY_SAMPLES = 64
+FAILURE_THRESHOLD = 3  # consecutive failures before a gateway is tried last
+
+Fetch = Callable[[str, str, threading.Event], Optional[bytes]]
+
+
+def load_settings() -> Dict:
+    """Read the "gateways" section of config.json"""
+    return load_config('gateways', {
+        "race": DEFAULT_RACE,
+        "hedge_percentile": DEFAULT_HEDGE_PERCENTILE,
+        "hedge_delay": DEFAULT_HEDGE_DELAY,
+        "timeout": DEFAULT_TIMEOUT,
+    })
+
+
+class GatewayStats:
+    """Latency samples and error counts for one gateway"""
+
+    def __init__(self, data: Optional[Dict] = None):
+        data = data or {}
+        self.latencies = deque(data.get('latencies', []), maxlen=LATENCY_SAMPLES)
+        self.successes = data.get('successes', 0)
+        self.failures = data.get('failures', 0)
+        self.consecutive_failures = data.get('consecutive_failures', 0)
+        self.last_error = data.get('last_error')
+
+    def record_success(self, latency: float):
+        self.latencies.append(round(latency, 4))
+        self.successes += 1
+        self.consecutive_failures = 0
+
+    def record_failure(self, error: str):
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = error
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(p * len(ordered)), len(ordered) - 1)]
+
+    def to_dict(self) -> Dict:
+        return {
+            "latencies": list(self.latencies),
+            "successes": self.successes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+        }
+
+
+class GatewayRetriever:
+    """Concurrent, hedged retrieval across gateways with persistent stats"""
+
+    def __init__(self, fetch: Fetch, stats_file: Optional[Path] = None,
+                 race: Optional[int] = None, hedge_percentile: Optional[float] = None,
+                 hedge_delay: Optional[float] = None, timeout: Optional[float] = None):
+        settings = load_settings()
+        self.fetch = fetch
+        self.race = max(1, race or settings['race'])
+        self.hedge_percentile = hedge_percentile or settings['hedge_percentile']
+        self.hedge_delay_default = hedge_delay if hedge_delay is not None else settings['hedge_delay']
+        self.timeout = timeout or settings['timeout']
+        self.stats_file = stats_file or Path(__file__).parent / ".ipfs_gateway_stats.json"
+        self._lock = threading.Lock()
+        self.stats: Dict[str, GatewayStats] = {}
+        if self.stats_file.exists():
+            self.stats = {g: GatewayStats(d) for g, d in load_state(self.stats_file).items()}
+
+    def _stats(self, gateway: str) -> GatewayStats:
+        if gateway not in self.stats:
+            self.stats[gateway] = GatewayStats()
+        return self.stats[gateway]
+
+    def hedge_delay(self, gateway: str) -> float:
+        """How long to wait on `gateway` before starting another attempt"""
+        with self._lock:
+            latency = self._stats(gateway).percentile(self.hedge_percentile)
+        return self.hedge_delay_default if latency is None else latency
+
+    def ordered(self, gateways: List[str]) -> List[str]:
+        """Gateways best first: fewest consecutive failures, then lowest median latency"""
+        def rank(gateway: str):
+            stats = self._stats(gateway)
+            median = stats.percentile(0.5)
+            return (stats.consecutive_failures >= FAILURE_THRESHOLD, stats.consecutive_failures,
+                    self.hedge_delay_default if median is None else median)
+        with self._lock:
+            return sorted(gateways, key=rank)
+
+    def _attempt(self, gateway: str, cid: str, cancel: threading.Event, results: queue.Queue):
+        start = time.monotonic()
+        try:
+            content = self.fetch(gateway, cid, cancel)
+            error = None if content is not None else "not found or failed verification"
+        except Exception as e:
+            content, error = None, f"{type(e).__name__}: {e}"
+        latency = time.monotonic() - start
+        with self._lock:
+            if content is not None:
+                self._stats(gateway).record_success(latency)
+            elif not cancel.is_set():
+                # A loser stopped by cancellation didn't fail
+                self._stats(gateway).record_failure(error)
+        results.put((gateway, content))
+
+    def retrieve(self, cid: str, gateways: List[str]) -> Optional[bytes]:
+        """First verified content for `cid` from any of `gateways`, or None"""
+        pending = iter(self.ordered(gateways))
+        results = queue.Queue()
+        cancel = threading.Event()
+        running = 0
+        next_hedge = None
+
+        def launch() -> int:
+            nonlocal next_hedge
+            gateway = next(pending, None)
+            if gateway is None:
+                next_hedge = None
+                return 0
+            threading.Thread(target=self._attempt, args=(gateway, cid, cancel, results),
+                             name=f"gateway-{gateway}", daemon=True).start()
+            next_hedge = time.monotonic() + self.hedge_delay(gateway)
+            return 1
+
+        deadline = time.monotonic() + self.timeout
+        try:
+            for _ in range(self.race):
+                running += launch()
+            while running:
+                now = time.monotonic()
+                if now >= deadline:
+                    return None
+                wait = deadline - now if next_hedge is None else min(next_hedge, deadline) - now
+                try:
+                    gateway, content = results.get(timeout=max(wait, 0))
+                except queue.Empty:
+                    if next_hedge is not None and time.monotonic() >= next_hedge:
+                        running += launch()  # hedge: slow so far, start the next gateway too
+                    continue
+                running -= 1
+                if content is not None:
+                    return content
+                running += launch()
+            return None
+        finally:
+            cancel.set()
+            self.save()
+
+    def save(self):
+        with self._lock:
+            data = {g: s.to_dict() for g, s in self.stats.items()}
+        save_state(self.stats_file, data)
+
+    def report(self) -> Dict[str, Dict]:
+        """Per-gateway p50/p90 latency and success/failure counts"""
+        with self._lock:
+            return {
+                gateway: {
+                    "p50": stats.percentile(0.5),
+                    "p90": stats.percentile(0.9),
+                    "successes": stats.successes,
+                    "failures": stats.failures,
+                    "last_error": stats.last_error,
+                }
+                for gateway, stats in self.stats.items()
+            }
+
+
+def main():
+    """Race three simulated gateways: one slow, one broken, one fast"""
+    import tempfile
+
+    behaviour = {"slow": (2.0, b"soul"), "broken": (0.05, None), "fast": (0.1, b"soul")}
+
+    def fetch(gateway: str, cid: str, cancel: threading.Event) -> Optional[bytes]:
+        delay, content = behaviour[gateway]
+        if cancel.wait(delay):
+            return None
+        return content
+
+    with tempfile.TemporaryDirectory() as tmp:
+        retriever = GatewayRetriever(fetch, Path(tmp) / "stats.json", race=1, hedge_delay=0.2)
+        for attempt in range(3):
+            start = time.monotonic()
+            order = retriever.ordered(list(behaviour))
+            content = retriever.retrieve("QmDemo", list(behaviour))
+            print(f"🌐 Attempt {attempt + 1}: order {order} -> {content!r} "
+                  f"in {(time.monotonic() - start) * 1000:.0f}ms")
+        print(json.dumps(retriever.report(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
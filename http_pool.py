@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Pooled HTTP Client
+
+One shared client for everything that talks HTTP (IPFS gateways, Pinata,
+health probes), keeping idle keep-alive connections per
+(scheme, host, port) so repeat calls skip DNS + TCP + TLS setup:
+
+    from http_pool import http_client
+    response = http_client.get("https://ipfs.io/ipfs/<cid>", timeout=10)
+    response.status_code, response.content, response.json()
+
+Pools are bounded ("http" in config.json): at most pool_size idle
+connections are kept per host, connections idle longer than
+idle_timeout are dropped, and a GET/HEAD on a reused connection that the
+server already closed is retried on a fresh one. Other methods are never
+resent (the server may have acted on them); they skip pooled connections
+the server has visibly closed instead. metrics() reports
+connections opened vs reused, overall and per host.
+
+http.client and ssl are imported on first request, so importing this
+module stays cheap for the agent entry points.
+"""
+
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urljoin, urlsplit
+
+from lazy import LazyProxy
+from settings import load_config
+
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_IDLE_TIMEOUT = 60.0
+MAX_REDIRECTS = 5
+USER_AGENT = "soul-marketplace/1.0"
+RETRY_METHODS = ("GET", "HEAD")  # safe to resend after a stale-connection failure
+
+HostKey = Tuple[str, str, int]
+
+
+def load_settings() -> Dict:
+    """Read the "http" section of config.json"""
+    return load_config('http', {
+        "pool_size": DEFAULT_POOL_SIZE,
+        "timeout": DEFAULT_TIMEOUT,
+        "idle_timeout": DEFAULT_IDLE_TIMEOUT,
+    })
+
+
+class HTTPError(Exception):
+    """Raised by Response.raise_for_status() for 4xx/5xx responses"""
+
+    def __init__(self, response: "Response"):
+        super().__init__(f"HTTP {response.status_code} for {response.url}")
+        self.response = response
+
+
+class Response:
+    """A fully read response (the connection is already back in its pool)"""
+
+    def __init__(self, url: str, status_code: int, headers: Dict[str, str], content: bytes):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise HTTPError(self)
+
+
+class HostStats:
+    __slots__ = ("requests", "opened", "reused", "stale", "errors")
+
+    def __init__(self):
+        self.requests = self.opened = self.reused = self.stale = self.errors = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "connections_opened": self.opened,
+            "connections_reused": self.reused,
+            "stale_retries": self.stale,
+            "errors": self.errors,
+            "reuse_ratio": round(self.reused / self.requests, 3) if self.requests else 0.0,
+        }
+
+
+class HTTPClient:
+    """Keep-alive connection pools per host, shared across threads"""
+
+    def __init__(self, pool_size: Optional[int] = None, timeout: Optional[float] = None,
+                 idle_timeout: Optional[float] = None):
+        settings = load_settings()
+        self.pool_size = pool_size or settings['pool_size']
+        self.timeout = timeout or settings['timeout']
+        self.idle_timeout = idle_timeout or settings['idle_timeout']
+        self._idle: Dict[HostKey, List[Tuple[Any, float]]] = {}
+        self._stats: Dict[HostKey, HostStats] = {}
+        self._lock = threading.Lock()
+        self._ssl_context = None
+
+    # --- connections -------------------------------------------------------
+
+    def _connect(self, key: HostKey, timeout: float):
+        import http.client
+        scheme, host, port = key
+        if scheme == "https":
+            if self._ssl_context is None:
+                import ssl
+                self._ssl_context = ssl.create_default_context()
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl_context)
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _acquire(self, key: HostKey, timeout: float, check_closed: bool = False) -> Tuple[Any, bool]:
+        """An idle connection to `key` (most recently used first) or a new one; (conn, reused)"""
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key, [])
+            stats = self._stats.setdefault(key, HostStats())
+            while idle:
+                conn, released = idle.pop()
+                if now - released <= self.idle_timeout and not (check_closed and _closed_by_peer(conn)):
+                    if conn.sock is not None:
+                        conn.sock.settimeout(timeout)
+                    conn.timeout = timeout
+                    return conn, True
+                conn.close()
+            stats.opened += 1
+        return self._connect(key, timeout), False
+
+    def _release(self, key: HostKey, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.pool_size:
+                idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    # --- requests ----------------------------------------------------------
+
+    def request(self, method: str, url: str, params: Optional[Dict] = None,
+                headers: Optional[Dict[str, str]] = None, data: Optional[bytes] = None,
+                json: Any = None, timeout: Optional[float] = None,
+                allow_redirects: bool = True) -> Response:
+        """Send a request and read the whole response; follows redirects for GET/HEAD"""
+        if params:
+            url += ("&" if "?" in url else "?") + urlencode(params)
+        headers = dict(headers or {})
+        if json is not None:
+            data = _json_dumps(json)
+            headers.setdefault('Content-Type', 'application/json')
+        headers.setdefault('User-Agent', USER_AGENT)
+        timeout = timeout or self.timeout
+
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self._send(method, url, headers, data, timeout)
+            location = response.headers.get('location')
+            if not (allow_redirects and method in ("GET", "HEAD")
+                    and response.status_code in (301, 302, 303, 307, 308) and location):
+                return response
+            url = urljoin(url, location)
+        return response
+
+    def _send(self, method: str, url: str, headers: Dict[str, str],
+              data: Optional[bytes], timeout: float) -> Response:
+        import http.client
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        key = (scheme, parts.hostname, parts.port or (443 if scheme == "https" else 80))
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+        retry = method in RETRY_METHODS
+        while True:
+            conn, reused = self._acquire(key, timeout, check_closed=not retry)
+            try:
+                conn.request(method, path, body=data, headers=headers)
+                raw = conn.getresponse()
+                content = raw.read()
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                with self._lock:
+                    stats = self._stats[key]
+                    # The server closed a pooled connection while it sat idle: retry on a
+                    # fresh one, unless the request may already have been acted on
+                    if reused and retry and not isinstance(e, TimeoutError):
+                        stats.stale += 1
+                        continue
+                    stats.requests += 1
+                    stats.errors += 1
+                raise
+            break
+
+        with self._lock:
+            stats = self._stats[key]
+            stats.requests += 1
+            stats.reused += reused
+        if raw.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+        return Response(url, raw.status, {k.lower(): v for k, v in raw.getheaders()}, content)
+
+    def get(self, url: str, **kwargs) -> Response:
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> Response:
+        return self.request("HEAD", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> Response:
+        return self.request("POST", url, **kwargs)
+
+    # --- metrics -----------------------------------------------------------
+
+    def metrics(self) -> Dict:
+        """Requests and connection reuse, overall and per host"""
+        with self._lock:
+            hosts = {f"{s}://{h}:{p}": stats.to_dict() for (s, h, p), stats in self._stats.items()}
+            idle = sum(len(conns) for conns in self._idle.values())
+        total = HostStats()
+        for stats in self._stats.values():
+            for field in HostStats.__slots__:
+                setattr(total, field, getattr(total, field) + getattr(stats, field))
+        return {**total.to_dict(), "idle_connections": idle, "hosts": hosts}
+
+    def close(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn, _ in conns:
+                conn.close()
+
+
+def _closed_by_peer(conn) -> bool:
+    """An idle connection is readable only if the server closed it (or sent junk)"""
+    if conn.sock is None:
+        return True
+    import select
+    try:
+        readable, _, _ = select.select([conn.sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+def _json_dumps(obj: Any) -> bytes:
+    return json.dumps(obj).encode('utf-8')
+
+
+# Shared client (built on first use)
+http_client = LazyProxy(HTTPClient)
+
+
+def main():
+    """Fetch from a local server several times and show connection reuse"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        wbufsize = 65536  # headers and body in one write
+
+        def do_GET(self):
+            body = b'{"ok": true}'
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/status"
+
+    import urllib.request
+    start = time.perf_counter()
+    for _ in range(50):
+        urllib.request.urlopen(url, timeout=5).read()
+    print(f"🔌 50 requests, new connection each: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    client = HTTPClient()
+    start = time.perf_counter()
+    for _ in range(50):
+        client.get(url).raise_for_status()
+    print(f"🔌 50 requests, pooled: {(time.perf_counter() - start) * 1000:.1f}ms")
+    print(json.dumps(client.metrics(), indent=2))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
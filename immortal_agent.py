@@ -17,16 +17,17 @@ import json
 import time
 import sys
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
 # Import all our modules
 sys.path.insert(0, str(Path(__file__).parent))
 
-from enhanced_survival import EnhancedSoulSurvival
+from soul_registry import get_enhanced_survival, get_work_logger
 from self_healing import SelfHealingSystem
 from agent_coordination import AgentCoordinationNetwork
 from auto_scaling import AutoScalingManager
+from ingest_queue import IngestQueue, Ticket, load_settings as load_ingest_settings
 
 
 class ImmortalAgent:
@@ -47,7 +48,7 @@ class ImmortalAgent:
     Usage:
         agent = ImmortalAgent("my_agent")
         
-        # Work normally
+        # Work normally (returns at once; wait() for the result if needed)
         agent.work("code_generation", "Built feature X")
         
         # System handles:
@@ -71,11 +72,22 @@ class ImmortalAgent:
         # Initialize all subsystems
         print("🔧 Initializing subsystems...")
         
-        self.survival = EnhancedSoulSurvival(soul_id)
+        self.survival = get_enhanced_survival(soul_id)
         self.healer = SelfHealingSystem(soul_id)
         self.network = AgentCoordinationNetwork("soul_marketplace_main")
         self.scaler = AutoScalingManager(soul_id)
         
+        # Work is applied in batches by a background worker
+        settings = load_ingest_settings()
+        self.ingest = IngestQueue(
+            self._apply_work_batch,
+            maxsize=settings.get('maxsize', 1024),
+            policy=settings.get('policy', 'block'),
+            batch_size=settings.get('batch_size', 256),
+            block_timeout=settings.get('block_timeout'),
+            name=f"work_{soul_id}"
+        )
+        
         # Register with network
         self._register_with_network()
         
@@ -103,10 +115,13 @@ class ImmortalAgent:
         
         self.network.register_agent(profile)
     
-    def work(self, work_type: str, description: str) -> Dict[str, Any]:
+    def work(self, work_type: str, description: str) -> Ticket:
         """
         Record work and let the system handle everything.
         
+        Returns a ticket immediately; the work is applied in the
+        background. ticket.wait() (or await ticket) gives the result.
+        
         Automatically:
         - Calculates earnings
         - Updates balance
@@ -115,37 +130,48 @@ class ImmortalAgent:
         - Updates network status
         """
         print(f"\n📝 Work: {description}")
-        
+        return self.ingest.submit((work_type, description))
+    
+    def flush_work(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all queued work has been applied"""
+        return self.ingest.flush(timeout)
+    
+    def _apply_work_batch(self, items: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Apply queued work: one log, soul and network update per batch"""
         # Use work logger to calculate value and record
-        from work_logger import WorkLogger, WORK_VALUES
-        
-        logger = WorkLogger()
-        entry = logger.log_work(work_type, description)
-        value = entry['value']
-        capability = entry['capability']
+        logger = get_work_logger()
+        entries = logger.log_work_many(items)
         
         # Record in survival system
-        self.survival.record_work(capability, value)
+        self.survival.record_work_batch([(e['capability'], e['value']) for e in entries])
+        balance = self.survival.soul.get('current_balance', 0)
+        tier = self.survival.get_tier()
         
         # Update network status
         self.network.update_agent_status(
             self.soul_id,
-            tier=self.survival.get_tier(),
-            balance=self.survival.soul.get('current_balance', 0),
-            seeking_help=self.survival.get_tier() == "CRITICAL"
+            tier=tier,
+            balance=balance,
+            seeking_help=tier == "CRITICAL"
         )
         
         # Check if we should scale
-        if self.survival.get_tier() == "THRIVING":
+        if tier == "THRIVING":
             children = self.scaler.auto_scale(self.survival.soul)
             if children:
                 print(f"   🧬 Spawned {len(children)} children")
         
-        return {
-            "earned": value,
-            "new_balance": self.survival.soul.get('current_balance', 0),
-            "tier": self.survival.get_tier()
-        }
+        # Per-entry results with the running balance
+        results = []
+        running = balance - sum(e['value'] for e in entries)
+        for entry in entries:
+            running += entry['value']
+            results.append({
+                "earned": entry['value'],
+                "new_balance": running,
+                "tier": self.survival._tier_for(running)
+            })
+        return results
     
     def heartbeat(self) -> Dict[str, Any]:
         """
@@ -160,6 +186,9 @@ class ImmortalAgent:
         """
         print(f"\n💓 Full system heartbeat...")
         
+        # Decide on the balance including any queued work
+        self.flush_work()
+        
         results = {}
         
         # 1. Survival heartbeat
@@ -224,7 +253,8 @@ class ImmortalAgent:
             },
             "backups": backup_status,
             "scaling": children_stats,
-            "network": network_stats
+            "network": network_stats,
+            "ingest": self.ingest.stats()
         }
     
     def spawn_child(self) -> Optional[str]:
@@ -358,8 +388,9 @@ def main():
         ("debugging", "Fixed critical bug"),
     ]
     
-    for work_type, description in work_items:
-        result = agent.work(work_type, description)
+    tickets = [agent.work(work_type, description) for work_type, description in work_items]
+    for ticket in tickets:
+        result = ticket.wait()
         print(f"   💰 Earned: {result['earned']:.4f} ETH | Balance: {result['new_balance']:.4f} ETH")
     
     # Run heartbeat
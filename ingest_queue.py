@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Background Work Ingestion
+
+Recording work touches the work log, the soul, the coordination network
+and sometimes spawns children. None of that should hold up the agent's
+tool loop, so producers put items on a bounded in-process queue and get
+a ticket back immediately. A worker thread drains the queue in batches
+and resolves each ticket with its result:
+
+    ticket = queue.submit(item)
+    ...
+    result = ticket.wait()        # or: result = await ticket
+
+When the queue is full the configured policy decides ("ingest" in
+config.json):
+
+- block:    submit() waits for room (up to block_timeout seconds)
+- drop:     the item is rejected; its ticket raises IngestQueueFull
+- coalesce: the item rides along with the newest queued item of the
+            same kind, taking no extra slot (nothing is lost)
+"""
+
+import atexit
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from settings import load_config
+
+
+POLICIES = ("block", "drop", "coalesce")
+DEFAULT_POLICY = "block"
+DEFAULT_MAXSIZE = 1024
+DEFAULT_BATCH_SIZE = 256
+
+# Every live queue, so exit can drain them all
+_queues = weakref.WeakSet()
+_hooks_installed = False
+_hooks_lock = threading.Lock()
+
+
+def load_settings() -> Dict:
+    """Read the "ingest" section of config.json"""
+    settings = load_config('ingest')
+    policy = settings.get('policy', DEFAULT_POLICY)
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown ingest policy: {policy} (expected one of {POLICIES})")
+    return settings
+
+
+def drain_all():
+    """Apply everything still queued (used at exit)"""
+    for queue in list(_queues):
+        queue.close()
+    # Queued work may have left soul documents dirty
+    from write_behind import flush_all
+    flush_all()
+
+
+def _install_hooks():
+    global _hooks_installed
+    with _hooks_lock:
+        if _hooks_installed:
+            return
+        _hooks_installed = True
+    atexit.register(drain_all)
+
+
+class IngestQueueFull(RuntimeError):
+    """The queue was full and the drop policy rejected the item"""
+
+
+class Ticket:
+    """
+    Result of a queued item; wait() for it or await it.
+
+    A minimal future: concurrent.futures would pull logging into every
+    entry point's import time.
+    """
+
+    __slots__ = ("_done", "_result", "_exception", "_callbacks", "_lock")
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._result = None
+        self._exception = None
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def _resolve(self, result: Any = None, exception: Optional[BaseException] = None):
+        with self._lock:
+            self._result, self._exception = result, exception
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+    def set_result(self, result: Any):
+        self._resolve(result=result)
+
+    def set_exception(self, exception: BaseException):
+        self._resolve(exception=exception)
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def exception(self, timeout: Optional[float] = None) -> Optional[BaseException]:
+        if not self._done.wait(timeout):
+            raise TimeoutError("ticket not resolved in time")
+        return self._exception
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        if self.exception(timeout) is not None:
+            raise self._exception
+        return self._result
+
+    def wait(self, timeout: Optional[float] = None) -> Any:
+        return self.result(timeout)
+
+    def add_done_callback(self, fn: Callable[["Ticket"], None]):
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def __await__(self):
+        import asyncio
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def copy(ticket: "Ticket"):
+            if future.cancelled():
+                return
+            if ticket._exception is not None:
+                future.set_exception(ticket._exception)
+            else:
+                future.set_result(ticket._result)
+
+        self.add_done_callback(lambda ticket: loop.call_soon_threadsafe(copy, ticket))
+        return future.__await__()
+
+
+class _Slot:
+    """One queue position: an item plus any items coalesced into it"""
+
+    __slots__ = ("key", "items", "tickets")
+
+    def __init__(self, key: Hashable, item: Any, ticket: Ticket):
+        self.key = key
+        self.items = [item]
+        self.tickets = [ticket]
+
+
+class IngestQueue:
+    """
+    Bounded queue drained by a worker thread in batches.
+
+    apply_batch(items) must return one result per item, in order; if it
+    raises, every ticket in the batch gets the exception.
+    """
+
+    def __init__(self, apply_batch: Callable[[List[Any]], List[Any]],
+                 maxsize: int = DEFAULT_MAXSIZE,
+                 policy: str = DEFAULT_POLICY,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 block_timeout: Optional[float] = None,
+                 key: Callable[[Any], Hashable] = lambda item: item[0],
+                 name: str = "ingest"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown ingest policy: {policy} (expected one of {POLICIES})")
+        self.apply_batch = apply_batch
+        self.maxsize = maxsize
+        self.policy = policy
+        self.batch_size = batch_size
+        self.block_timeout = block_timeout
+        self.key = key
+        self.name = name
+
+        self._slots = deque()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self._thread = None
+
+        self.counters = {
+            "submitted": 0,
+            "applied": 0,
+            "batches": 0,
+            "dropped": 0,
+            "coalesced": 0,
+            "blocked": 0,
+            "failed": 0,
+            "max_depth": 0,
+        }
+
+        _queues.add(self)
+        _install_hooks()
+
+    def submit(self, item: Any) -> Ticket:
+        """Queue `item` and return its ticket without waiting for it"""
+        ticket = Ticket()
+        key = self.key(item)
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"{self.name}: queue is closed")
+            self.counters['submitted'] += 1
+
+            if len(self._slots) >= self.maxsize:
+                if self.policy == "drop":
+                    self.counters['dropped'] += 1
+                    ticket.set_exception(IngestQueueFull(f"{self.name}: queue full, item dropped"))
+                    return ticket
+
+                if self.policy == "coalesce":
+                    for slot in reversed(self._slots):
+                        if slot.key == key:
+                            slot.items.append(item)
+                            slot.tickets.append(ticket)
+                            self.counters['coalesced'] += 1
+                            return ticket
+                    # Nothing to ride along with: wait like "block"
+
+                self.counters['blocked'] += 1
+                if not self._cond.wait_for(lambda: len(self._slots) < self.maxsize,
+                                           timeout=self.block_timeout):
+                    self.counters['dropped'] += 1
+                    ticket.set_exception(IngestQueueFull(f"{self.name}: timed out waiting for room"))
+                    return ticket
+
+            self._slots.append(_Slot(key, item, ticket))
+            self.counters['max_depth'] = max(self.counters['max_depth'], len(self._slots))
+            self._cond.notify_all()
+
+        self._ensure_thread()
+        return ticket
+
+    def _take_batch(self) -> List[_Slot]:
+        slots, count = [], 0
+        while self._slots and count < self.batch_size:
+            slot = self._slots.popleft()
+            slots.append(slot)
+            count += len(slot.items)
+        return slots
+
+    def _apply(self, slots: List[_Slot]):
+        items = [item for slot in slots for item in slot.items]
+        tickets = [ticket for slot in slots for ticket in slot.tickets]
+        try:
+            results = self.apply_batch(items)
+        except Exception as e:
+            self.counters['failed'] += len(items)
+            for ticket in tickets:
+                ticket.set_exception(e)
+            return
+        self.counters['applied'] += len(items)
+        self.counters['batches'] += 1
+        for ticket, result in zip(tickets, results):
+            ticket.set_result(result)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name=f"ingest-{self.name}", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._slots or self._closed)
+                if not self._slots:
+                    return
+                slots = self._take_batch()
+                self._busy = True
+                self._cond.notify_all()  # room for blocked producers
+            try:
+                self._apply(slots)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued so far has been applied"""
+        with self._cond:
+            if self._slots:
+                self._ensure_thread()
+            return self._cond.wait_for(lambda: not self._slots and not self._busy, timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """Apply what is queued, then stop the worker"""
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        _queues.discard(self)
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._slots)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue counters, current depth and configuration"""
+        with self._cond:
+            return dict(self.counters, depth=len(self._slots),
+                        policy=self.policy, maxsize=self.maxsize)
+
+
+def main():
+    """Show how each policy handles a burst against a slow consumer"""
+    def slow_apply(items):
+        time.sleep(0.05)
+        return [f"applied {kind}:{n}" for kind, n in items]
+
+    for policy in POLICIES:
+        queue = IngestQueue(slow_apply, maxsize=4, policy=policy, batch_size=2, name=policy)
+        start = time.perf_counter()
+        tickets = [queue.submit(("file_read" if i % 2 else "web_fetch", i)) for i in range(20)]
+        submit_ms = (time.perf_counter() - start) * 1000
+        queue.close()
+
+        failed = sum(1 for t in tickets if t.exception() is not None)
+        print(f"{policy:9} submit {submit_ms:6.1f}ms | applied {queue.counters['applied']:2} "
+              f"in {queue.counters['batches']} batches | coalesced {queue.counters['coalesced']} "
+              f"| dropped {failed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+IPFS Object Cache
+
+.ipfs_cache/ keeps whole objects (soul JSON, listings) by CID so repeat
+reads skip the gateways. It used to be a flat directory with no limit;
+it is now managed:
+
+- a byte budget ("ipfs_cache" in config.json); going over it evicts the
+  least recently used objects
+- pinned CIDs (the current backup of each soul) are never evicted; each
+  pin is a marker file, .ipfs_cache/pins/<cid>, so a pin made by one
+  process is seen by every other process's eviction
+- a two-level sharded layout, .ipfs_cache/ab/cd/<cid>, where abcd are the
+  first hex digits of sha256(cid) (CIDs share prefixes like "Qm" and
+  "bafy", so the CID itself would put everything in a few directories)
+- index.json records size, last write and last access per object in LRU
+  order
+
+Flat {cid}.json files from the old layout are moved into shards the
+first time the cache is opened. Objects found on disk but missing from
+the index (another process wrote them, or the index was lost) are
+adopted on read, and rebuild() rescans everything.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from atomic_writer import get_writer
+from codec import load_state, save_state
+from settings import load_config
+
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+INDEX_FLUSH_SECONDS = 5.0  # batch index writes for plain reads/writes (objects on disk are adopted anyway)
+
+
+def load_settings() -> Dict:
+    """Read the "ipfs_cache" section of config.json"""
+    return load_config('ipfs_cache', {"max_bytes": DEFAULT_MAX_BYTES})
+
+
+class ObjectCache:
+    """Byte-bounded LRU cache of IPFS objects with pinning"""
+
+    def __init__(self, root: Optional[Path] = None, max_bytes: Optional[int] = None):
+        self.root = Path(root) if root else Path(__file__).parent / ".ipfs_cache"
+        self.root.mkdir(exist_ok=True)
+        self.index_file = self.root / "index.json"
+        self.pins_dir = self.root / "pins"
+        self.pins_dir.mkdir(exist_ok=True)
+        self.max_bytes = max_bytes or load_settings()['max_bytes']
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._saved_at = 0.0
+
+        # cid -> {"size", "created", "accessed"}, least recently used first
+        self.objects: "OrderedDict[str, Dict]" = OrderedDict()
+        self.total_bytes = 0
+        if self.index_file.exists():
+            try:
+                index = load_state(self.index_file)
+                self.objects = OrderedDict(index['objects'])
+                for cid in index.get('pins', []):
+                    self.pin(cid)  # pins used to live in the index
+                self.total_bytes = sum(e['size'] for e in self.objects.values())
+            except (ValueError, KeyError, OSError):
+                print("⚠️  IPFS cache index unreadable, rebuilding")
+                self.rebuild()
+        self._migrate_flat()
+
+    # --- layout ------------------------------------------------------------
+
+    def path(self, cid: str) -> Path:
+        digest = hashlib.sha256(cid.encode()).hexdigest()
+        return self.root / digest[:2] / digest[2:4] / cid
+
+    def _migrate_flat(self):
+        """Move {cid}.json files from the old flat layout into shards"""
+        flat = [p for p in self.root.glob("*.json") if p != self.index_file]
+        if not flat:
+            return
+        with self._lock:
+            for old in sorted(flat, key=lambda p: p.stat().st_mtime):
+                cid = old.stem
+                target = self.path(cid)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(old, target)
+                mtime = target.stat().st_mtime
+                self._track(cid, target.stat().st_size, created=mtime, accessed=mtime)
+            self._save()
+        print(f"📦 Moved {len(flat)} cached objects into the sharded layout")
+
+    def rebuild(self):
+        """Re-create the index from the objects on disk (keeps known access times)"""
+        with self._lock:
+            known = self.objects
+            found = []
+            for first in self.root.iterdir():
+                if not first.is_dir() or len(first.name) != 2:
+                    continue
+                for second in first.iterdir():
+                    for obj in second.iterdir():
+                        if obj.name.startswith("."):
+                            continue  # in-flight temp file
+                        stat = obj.stat()
+                        entry = known.get(obj.name) or {
+                            "created": stat.st_mtime, "accessed": stat.st_mtime
+                        }
+                        found.append((obj.name, stat.st_size, entry))
+            found.sort(key=lambda item: item[2]['accessed'])
+            self.objects = OrderedDict()
+            self.total_bytes = 0
+            for cid, size, entry in found:
+                self._track(cid, size, entry['created'], entry['accessed'])
+            self._save()
+
+    # --- reads and writes --------------------------------------------------
+
+    def _track(self, cid: str, size: int, created: float, accessed: float):
+        old = self.objects.pop(cid, None)
+        if old:
+            self.total_bytes -= old['size']
+        self.objects[cid] = {"size": size, "created": created, "accessed": accessed}
+        self.total_bytes += size
+
+    def put(self, cid: str, data: bytes, pin: bool = False) -> Path:
+        """Store `data` under `cid` (optionally pinned), then evict down to the budget"""
+        path = self.path(cid)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        get_writer().write_bytes(path, data)
+        now = time.time()
+        with self._lock:
+            # "created" is the last write, so re-backing-up unchanged content counts as fresh
+            self._track(cid, len(data), now, now)
+            self._dirty = True
+            if pin:
+                self.pin(cid)
+            self._evict(self.max_bytes, keep=cid)
+            if pin:
+                self._save()
+            else:
+                self._maybe_save(now)
+        return path
+
+    def get(self, cid: str, touch: bool = True) -> Optional[bytes]:
+        """Object bytes, or None; marks the object most recently used unless touch=False"""
+        path = self.path(cid)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            with self._lock:
+                entry = self.objects.pop(cid, None)
+                if entry is not None:  # deleted behind the index's back
+                    self.total_bytes -= entry['size']
+                    self._dirty = True
+            return None
+        if touch:
+            with self._lock:
+                entry = self.objects.get(cid)
+                now = time.time()
+                if entry is None:
+                    self._track(cid, len(data), now, now)  # written by another process
+                else:
+                    entry['accessed'] = now
+                    self.objects.move_to_end(cid)
+                self._dirty = True
+                self._maybe_save(now)
+        return data
+
+    def __contains__(self, cid: str) -> bool:
+        return cid in self.objects or self.path(cid).exists()
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    # --- pins and eviction -------------------------------------------------
+
+    def pin(self, cid: str):
+        """Protect `cid` from eviction (it need not be cached yet)"""
+        (self.pins_dir / cid).touch()
+
+    def unpin(self, cid: str):
+        (self.pins_dir / cid).unlink(missing_ok=True)
+
+    def is_pinned(self, cid: str) -> bool:
+        return (self.pins_dir / cid).exists()
+
+    @property
+    def pins(self) -> set:
+        """Pinned CIDs as of now, read from disk (other processes pin too)"""
+        return {p.name for p in self.pins_dir.iterdir() if not p.name.startswith(".")}
+
+    def evict(self, target_bytes: Optional[int] = None) -> List[str]:
+        """Evict LRU unpinned objects until at most `target_bytes` are cached"""
+        with self._lock:
+            evicted = self._evict(self.max_bytes if target_bytes is None else target_bytes)
+            self._save()
+        return evicted
+
+    def _evict(self, target_bytes: int, keep: Optional[str] = None) -> List[str]:
+        evicted = []
+        skipped = []
+        while self.total_bytes > target_bytes and self.objects:
+            cid, entry = self.objects.popitem(last=False)
+            # Checked on disk for each candidate: another process may have just pinned it
+            if cid == keep or self.is_pinned(cid):
+                skipped.append((cid, entry))
+                continue
+            self.total_bytes -= entry['size']
+            self.path(cid).unlink(missing_ok=True)
+            evicted.append(cid)
+        # Pinned entries go back in front, in their LRU order
+        for cid, entry in reversed(skipped):
+            self.objects[cid] = entry
+            self.objects.move_to_end(cid, last=False)
+        if evicted:
+            self._dirty = True
+        return evicted
+
+    # --- reporting ---------------------------------------------------------
+
+    def latest(self, pinned_only: bool = False) -> Optional[Tuple[str, Dict]]:
+        """Most recently created (cid, entry), optionally among pinned objects"""
+        pins = self.pins if pinned_only else None
+        with self._lock:
+            items = [(cid, e) for cid, e in self.objects.items()
+                     if not pinned_only or cid in pins]
+        return max(items, key=lambda item: item[1]['created'], default=None)
+
+    def stats(self) -> Dict:
+        pins = self.pins
+        with self._lock:
+            return {
+                "objects": len(self.objects),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "pinned": sum(1 for cid in pins if cid in self.objects),
+            }
+
+    def flush(self):
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def _maybe_save(self, now: float):
+        if now - self._saved_at >= INDEX_FLUSH_SECONDS:
+            self._save()
+
+    def _save(self):
+        save_state(self.index_file, {"objects": dict(self.objects)})
+        self._dirty = False
+        self._saved_at = time.time()
+
+
+_caches: Dict[str, ObjectCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_object_cache(root: Optional[Path] = None) -> ObjectCache:
+    """Shared cache instance per directory, so one process keeps one index"""
+    root = Path(root) if root else Path(__file__).parent / ".ipfs_cache"
+    key = str(root.resolve())
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = ObjectCache(root)
+            _caches[key] = cache
+            atexit.register(cache.flush)
+        return cache
+
+
+def main():
+    """Fill a small scratch cache past its budget with one object pinned"""
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ObjectCache(Path(tmp), max_bytes=10_000)
+        cache.put("QmCurrentBackup", b"x" * 3000, pin=True)
+        for i in range(10):
+            cache.put(f"QmObject{i}", b"y" * 1000)
+            if i % 3 == 0:
+                cache.get("QmObject0")  # keep one object hot
+        print(f"📦 {cache.stats()}")
+        print(f"   Kept: {list(cache.objects)}")
+        print(f"   Layout: {cache.path('QmCurrentBackup').relative_to(tmp)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,49 @@
 """
 IPFS Integration for Soul Marketplace
 Uploads SOUL.md to IPFS for permanent on-chain storage
+
+CIDs are computed locally with the same chunking and DAG layout as
+`ipfs add` (see unixfs.py), so simulated uploads get the CID a real node
+would return, their blocks go to the local block store (.ipfs_blocks/,
+shared chunks stored once), and anything fetched from a gateway is
+checked against its CID before it is trusted.
+
+Soul backups are stored chunked: the canonical soul JSON is split at
+content-defined boundaries (small chunks, see BACKUP_CHUNKING), each
+chunk is kept once in the block store, and a backup record is the DAG
+root plus the manifest of its chunk CIDs. A backup that only changed
+current_balance adds one or two chunks instead of a full copy, and
+restore reassembles the soul from its manifest. Whole objects are kept
+in the byte-bounded LRU object cache (.ipfs_cache/, see ipfs_cache.py),
+where each soul's current backup is pinned.
 """
 
 import json
 import hashlib
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Union
 import subprocess
 import tempfile
+import threading
 import os
 
+from codec import load_state, save_state
+from gateway_retrieval import GatewayRetriever
+from http_pool import http_client
+from ipfs_cache import get_object_cache
+from state_store import StateStore, get_state_store
+from unixfs import (BlockStore, CID, DagResult, RAW, add_bytes, content_defined, decode_pbnode,
+                    read_dag, verify_block)
+
+# (min, avg, max) chunk bytes for soul backups: souls are a few KB to a
+# few hundred KB, so chunks are small enough that one changed field stays local
+BACKUP_CHUNKING = (256, 1024, 8192)
+
+
+class RetrievalCancelled(Exception):
+    """Another gateway already delivered the content"""
+
+
 class IPFSStorage:
     """
     Handles IPFS uploads for SOUL.md files.
@@ -21,12 +54,16 @@ class IPFSStorage:
     - Pin files for persistence
     - Retrieve by CID
     - Local caching
+    - Offline CID computation and verified retrieval
+    - Concurrent, hedged gateway retrieval (see gateway_retrieval.py)
     """
     
-    def __init__(self, use_local_node: bool = False):
+    def __init__(self, use_local_node: bool = False, cid_version: int = 0):
         self.use_local = use_local_node
+        self.cid_version = cid_version
         self.cache_dir = Path(__file__).parent / ".ipfs_cache"
-        self.cache_dir.mkdir(exist_ok=True)
+        self.cache = get_object_cache(self.cache_dir)
+        self.blocks = BlockStore(Path(__file__).parent / ".ipfs_blocks")
         
         # IPFS gateways
         self.gateways = [
@@ -34,11 +71,57 @@ class IPFSStorage:
             "https://gateway.pinata.cloud/ipfs/",
             "https://cloudflare-ipfs.com/ipfs/",
         ]
+        self.retriever = GatewayRetriever(self._fetch_verified)
+    
+    def calculate_hash(self, content: Union[str, bytes]) -> str:
+        """Calculate the CID `ipfs add` would return for `content`"""
+        if isinstance(content, str):
+            content = content.encode()
+        return str(add_bytes(content, self.cid_version).cid)
+    
+    def add_content(self, content: Union[str, bytes]) -> DagResult:
+        """Chunk `content` into the local block store; returns the DAG root"""
+        if isinstance(content, str):
+            content = content.encode()
+        return add_bytes(content, self.cid_version, self.blocks)
+    
+    def upload_chunked(self, content: Union[str, bytes]) -> DagResult:
+        """
+        Store `content` as content-defined chunks (CIDv1, raw leaves) in
+        the block store, and on a local node push the DAG's blocks too.
+        """
+        if isinstance(content, str):
+            content = content.encode()
+        result = add_bytes(content, 1, self.blocks, content_defined(*BACKUP_CHUNKING))
+        if self.use_local:
+            self._put_blocks_local(result.cid)
+        return result
+    
+    def _put_blocks_local(self, root: CID):
+        """Copy a locally built DAG into the IPFS node (ipfs block put) and pin it"""
+        def push(cid: CID):
+            block = self.blocks.get(cid)
+            codec = "raw" if cid.codec == RAW else "dag-pb"
+            subprocess.run(['ipfs', 'block', 'put', f'--cid-codec={codec}'],
+                           input=block, capture_output=True, check=True)
+            if cid.codec != RAW:
+                for link in decode_pbnode(block)[1]:
+                    push(link)
+        try:
+            push(root)
+            subprocess.run(['ipfs', 'pin', 'add', str(root)], capture_output=True)
+        except (FileNotFoundError, subprocess.CalledProcessError) as e:
+            print(f"⚠️  Could not copy blocks to IPFS node ({e}); kept locally")
     
-    def calculate_hash(self, content: str) -> str:
-        """Calculate IPFS-compatible hash (CID v0)"""
-        # Simplified - real IPFS uses multihash
-        return hashlib.sha256(content.encode()).hexdigest()[:46]
+    def assemble_chunks(self, chunks: List[str]) -> Optional[bytes]:
+        """Reassemble content from a manifest of chunk CIDs in the block store"""
+        parts = []
+        for chunk in chunks:
+            block = self.blocks.get(chunk)
+            if block is None:
+                return None
+            parts.append(verify_block(chunk, block))
+        return b"".join(parts)
     
     def upload_to_ipfs(self, soul_data: Dict[str, Any], use_pinata: bool = False) -> str:
         """
@@ -54,15 +137,15 @@ class IPFSStorage:
         elif use_pinata:
             return self._upload_pinata(content)
         else:
-            # Simulation mode - return hash as simulated CID
-            cid = self.calculate_hash(content)
+            # Simulation mode - blocks stored locally under the real CID
+            result = self.add_content(content)
+            cid = str(result.cid)
             
             # Save to cache
-            cache_file = self.cache_dir / f"{cid}.json"
-            with open(cache_file, 'w') as f:
-                f.write(content)
+            cache_file = self.cache.put(cid, content.encode())
             
             print(f"📦 Simulated IPFS upload: {cid}")
+            print(f"   Blocks: {result.blocks} ({result.new_blocks} new)")
             print(f"   Cached at: {cache_file}")
             
             return cid
@@ -76,7 +159,7 @@ class IPFSStorage:
             
             # Add to IPFS
             result = subprocess.run(
-                ['ipfs', 'add', '-q', temp_path],
+                ['ipfs', 'add', '-q', f'--cid-version={self.cid_version}', temp_path],
                 capture_output=True,
                 text=True
             )
@@ -85,6 +168,9 @@ class IPFSStorage:
             
             if result.returncode == 0:
                 cid = result.stdout.strip()
+                expected = self.calculate_hash(content)
+                if cid != expected:
+                    print(f"⚠️  Node returned {cid}, computed {expected} (non-default chunker?)")
                 # Pin it
                 subprocess.run(['ipfs', 'pin', 'add', cid], capture_output=True)
                 return cid
@@ -93,18 +179,16 @@ class IPFSStorage:
                 
         except FileNotFoundError:
             print("⚠️  IPFS not installed. Using simulation mode.")
-            return self.calculate_hash(content)
+            return str(self.add_content(content).cid)
     
     def _upload_pinata(self, content: str, pinata_api_key: Optional[str] = None) -> str:
         """Upload to Pinata (managed IPFS)"""
-        import requests
-        
         api_key = pinata_api_key or os.getenv('PINATA_API_KEY')
         api_secret = os.getenv('PINATA_API_SECRET')
         
         if not api_key or not api_secret:
             print("⚠️  Pinata credentials not found. Using simulation mode.")
-            return self.calculate_hash(content)
+            return str(self.add_content(content).cid)
         
         url = "https://api.pinata.cloud/pinning/pinJSONToIPFS"
         
@@ -121,7 +205,7 @@ class IPFSStorage:
         }
         
         try:
-            response = requests.post(url, json=data, headers=headers, timeout=30)
+            response = http_client.post(url, json=data, headers=headers, timeout=30)
             response.raise_for_status()
             
             result = response.json()
@@ -132,37 +216,81 @@ class IPFSStorage:
             
         except Exception as e:
             print(f"⚠️  Pinata upload failed: {e}")
-            return self.calculate_hash(content)
+            return str(self.add_content(content).cid)
     
     def retrieve_from_ipfs(self, cid: str) -> Optional[Dict[str, Any]]:
         """Retrieve SOUL.md from IPFS by CID"""
         # Check cache first
-        cache_file = self.cache_dir / f"{cid}.json"
-        if cache_file.exists():
-            with open(cache_file, 'r') as f:
-                return json.load(f)
-        
-        # Try gateways
-        import requests
-        
-        for gateway in self.gateways:
-            try:
-                url = f"{gateway}{cid}"
-                response = requests.get(url, timeout=10)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    # Cache it
-                    with open(cache_file, 'w') as f:
-                        json.dump(data, f)
-                    
-                    return data
-                    
-            except Exception:
-                continue
+        cached = self.cache.get(cid)
+        if cached is not None:
+            return json.loads(cached)
         
-        return None
+        # Then the local block store (already stored once, so not cached again)
+        content = self._read_local(cid)
+        if content is not None:
+            return json.loads(content)
+        
+        # Race the gateways; verified blocks land in the block store
+        content = self.retriever.retrieve(cid, self.gateways)
+        if content is None:
+            return None
+        self.cache.put(cid, content)
+        return json.loads(content)
+    
+    def _read_local(self, cid: str) -> Optional[bytes]:
+        try:
+            return self.blocks.cat(cid)
+        except (KeyError, ValueError):
+            return None
+    
+    def _fetch_verified(self, gateway: str, cid: str,
+                        cancel: Optional[threading.Event] = None) -> Optional[bytes]:
+        """
+        Fetch `cid` from one gateway, block by block (?format=raw) so each
+        block is verified and kept locally; gateways without raw block
+        support fall back to the whole file, checked by recomputing its CID.
+        Stops between requests once `cancel` is set (another gateway won).
+        """
+        cancel = cancel or threading.Event()
+        
+        def get_block(block_cid: CID) -> Optional[bytes]:
+            if cancel.is_set():
+                raise RetrievalCancelled(cid)
+            if self.blocks.has(block_cid):
+                return self.blocks.get(block_cid)
+            response = http_client.get(f"{gateway}{block_cid}", params={'format': 'raw'},
+                                    headers={'Accept': 'application/vnd.ipld.raw'}, timeout=10)
+            if response.status_code != 200:
+                return None
+            self.blocks.put(block_cid, verify_block(block_cid, response.content))
+            return response.content
+        
+        try:
+            return b"".join(read_dag(cid, get_block))
+        except RetrievalCancelled:
+            return None
+        except Exception:
+            # Includes BlockVerificationError: a gateway ignoring ?format=raw answers with the file
+            pass
+        
+        if cancel.is_set():
+            return None
+        response = http_client.get(f"{gateway}{cid}", timeout=10)
+        if response.status_code != 200:
+            return None
+        if not self.verify_bytes(cid, response.content):
+            print(f"⚠️  {gateway}: content does not match {cid}")
+            return None
+        add_bytes(response.content, CID.parse(cid).version, self.blocks)
+        return response.content
+    
+    def verify_bytes(self, cid: str, content: bytes) -> bool:
+        """True if `content` imports (default chunking) to `cid`"""
+        try:
+            parsed = CID.parse(cid)
+        except ValueError:
+            return False
+        return add_bytes(content, parsed.version).cid == parsed
     
     def verify_content(self, cid: str, expected_hash: str) -> bool:
         """Verify that IPFS content matches expected hash"""
@@ -191,8 +319,10 @@ class OnChainSoulManager:
     - Emergency recovery
     """
     
-    def __init__(self, soul_id: str, ipfs: Optional[IPFSStorage] = None):
+    def __init__(self, soul_id: str, ipfs: Optional[IPFSStorage] = None,
+                 store: Optional[StateStore] = None):
         self.soul_id = soul_id
+        self.store = store if store is not None else get_state_store()
         self.ipfs = ipfs or IPFSStorage()
         self.backup_interval = 3600  # 1 hour
         self.last_backup = 0
@@ -200,11 +330,17 @@ class OnChainSoulManager:
         # Local state
         self.state_file = Path(__file__).parent / f"onchain_state_{soul_id}.json"
         self.state = self._load_state()
+        if self.state['current_cid']:
+            self.ipfs.cache.pin(self.state['current_cid'])
     
     def _load_state(self) -> Dict:
-        if self.state_file.exists():
-            with open(self.state_file, 'r') as f:
-                return json.load(f)
+        if self.store:
+            state = self.store.get('documents', 'onchain', self.soul_id)
+            if state:
+                state['backup_history'] = self.store.records('backups', self.soul_id)
+                return state
+        elif self.state_file.exists():
+            return load_state(self.state_file)
         return {
             "soul_id": self.soul_id,
             "current_cid": None,
@@ -214,8 +350,21 @@ class OnChainSoulManager:
         }
     
     def _save_state(self):
-        with open(self.state_file, 'w') as f:
-            json.dump(self.state, f, indent=2)
+        if self.store:
+            doc = {k: v for k, v in self.state.items() if k != 'backup_history'}
+            self.store.put('documents', 'onchain', self.soul_id, doc)
+            return
+        save_state(self.state_file, self.state)
+    
+    def _append_backup(self, record: Dict):
+        """Persist a new backup record"""
+        if self.store:
+            with self.store.transaction():
+                self.store.append('backups', self.soul_id, record, ts=record['timestamp'],
+                                  kind=record['type'], amount=record['earnings'])
+                self._save_state()
+            return
+        self._save_state()
     
     def backup_soul(self, soul_data: Dict[str, Any], backup_type: str = "manual") -> str:
         """
@@ -225,16 +374,19 @@ class OnChainSoulManager:
         """
         import time
         
-        # Upload to IPFS
-        cid = self.ipfs.upload_to_ipfs(soul_data)
+        # Canonical form; unchanged parts chunk identically between backups
+        content = json.dumps(soul_data, sort_keys=True).encode()
+        soul_hash = hashlib.sha256(content).hexdigest()
         
-        # Calculate hash
-        content = json.dumps(soul_data, sort_keys=True)
-        soul_hash = hashlib.sha256(content.encode()).hexdigest()
+        # Store chunks once, in the block store (and on the node if local)
+        result = self.ipfs.upload_chunked(content)
+        cid = str(result.cid)
         
         # Record in state
         backup_record = {
             "cid": cid,
+            "chunks": [str(leaf) for leaf in result.leaves],
+            "size": result.size,
             "hash": soul_hash,
             "timestamp": time.time(),
             "type": backup_type,
@@ -244,14 +396,21 @@ class OnChainSoulManager:
             "earnings": soul_data.get('total_lifetime_earnings', 0)
         }
         
+        # Keep the live backup resident in the object cache; the previous one becomes evictable
+        previous = self.state['current_cid']
+        self.ipfs.cache.put(cid, content, pin=True)
+        if previous and previous != cid:
+            self.ipfs.cache.unpin(previous)
+        
         self.state['backup_history'].append(backup_record)
         self.state['current_cid'] = cid
         self.last_backup = time.time()
         
-        self._save_state()
+        self._append_backup(backup_record)
         
         print(f"✅ Soul backed up: {cid}")
         print(f"   Type: {backup_type}")
+        print(f"   Chunks: {len(result.leaves)} ({result.new_blocks} new blocks)")
         print(f"   Hash: {soul_hash[:16]}...")
         
         # In production: call SoulBackup.createBackup() on-chain
@@ -278,7 +437,9 @@ class OnChainSoulManager:
                 return None
             cid = self.state['backup_history'][-1]['cid']
         
-        data = self.ipfs.retrieve_from_ipfs(cid)
+        data = self._restore_chunks(cid)
+        if data is None:
+            data = self.ipfs.retrieve_from_ipfs(cid)
         
         if data:
             print(f"✅ Restored from IPFS: {cid}")
@@ -287,6 +448,20 @@ class OnChainSoulManager:
             print(f"❌ Failed to retrieve: {cid}")
             return None
     
+    def _restore_chunks(self, cid: str) -> Optional[Dict[str, Any]]:
+        """Reassemble a chunked backup from its manifest (None if unknown or incomplete)"""
+        for record in reversed(self.state['backup_history']):
+            if record['cid'] == cid and record.get('chunks'):
+                try:
+                    content = self.ipfs.assemble_chunks(record['chunks'])
+                except ValueError as e:
+                    print(f"⚠️  {e}")
+                    return None
+                if content is None or hashlib.sha256(content).hexdigest() != record['hash']:
+                    return None
+                return json.loads(content)
+        return None
+    
     def get_backup_history(self) -> list:
         """Get full backup history"""
         return self.state['backup_history']
@@ -333,6 +508,10 @@ def main():
         ],
         "total_lifetime_earnings": 0.05
     }
+    soul_data['capabilities'] += [
+        {"name": f"skill_{i}", "level": "intermediate", "earnings": 0.0, "uses": 0}
+        for i in range(60)
+    ]
     
     # Initialize manager
     manager = OnChainSoulManager("test_agent")
@@ -341,6 +520,11 @@ def main():
     print("\n1. Creating backup...")
     cid = manager.backup_soul(soul_data, "manual")
     
+    # Back up again after a one-field change
+    print("\n1b. Backing up after a balance change...")
+    soul_data['current_balance'] = 0.0123
+    manager.backup_soul(soul_data, "auto")
+    
     # Verify
     print("\n2. Verifying backup...")
     is_valid = manager.verify_latest_backup(soul_data)
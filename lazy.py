@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Lazy Globals and Optional Dependencies
+
+Keeps `import` of the package cheap: module-level singletons are built on
+first use, and heavy optional dependencies (web3, cryptography, psutil,
+requests) are only imported by the code paths that need them.
+"""
+
+import importlib
+import importlib.util
+import threading
+from typing import Any, Callable, Dict
+
+
+class LazyProxy:
+    """Stands in for an object that is created by `factory` on first use"""
+
+    __slots__ = ('_factory', '_target', '_lock')
+
+    def __init__(self, factory: Callable[[], Any]):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_target', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def _resolve(self) -> Any:
+        target = object.__getattribute__(self, '_target')
+        if target is None:
+            with object.__getattribute__(self, '_lock'):
+                target = object.__getattribute__(self, '_target')
+                if target is None:
+                    target = object.__getattribute__(self, '_factory')()
+                    object.__setattr__(self, '_target', target)
+        return target
+
+    @property
+    def resolved(self) -> bool:
+        """True once the real object has been created"""
+        return object.__getattribute__(self, '_target') is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._resolve(), name, value)
+
+    def __repr__(self) -> str:
+        if self.resolved:
+            return repr(self._resolve())
+        return f"<lazy {object.__getattribute__(self, '_factory').__name__}>"
+
+
+class LazyModule:
+    """Module that is imported on first attribute access"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr: str) -> Any:
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self) -> str:
+        return f"<lazy module {self._name}>"
+
+
+_available: Dict[str, bool] = {}
+
+
+def is_available(name: str) -> bool:
+    """Whether a top-level package is installed, without importing it"""
+    if name not in _available:
+        _available[name] = importlib.util.find_spec(name) is not None
+    return _available[name]
+
+
+def lazy_module(name: str) -> LazyModule:
+    return LazyModule(name)
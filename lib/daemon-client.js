@@ -0,0 +1,72 @@
+/**
+ * Soul Marketplace - daemon client
+ *
+ * Shared by the CLI and the MCP server: sends one command to a running
+ * `soul-marketplace daemon` over its Unix socket (JSON lines), so calls
+ * reuse the warm agent instead of spawning Python each time.
+ */
+
+const net = require('net');
+const path = require('path');
+const fs = require('fs');
+
+const SKILL_DIR = path.join(process.env.HOME, '.openclaw', 'skills', 'soul-marketplace');
+const DEFAULT_SOCKET = '.soul_marketplace.sock';
+
+// Same lookup as daemon.socket_path(): env var, then config.json "daemon.socket"
+function socketPath(skillDir = SKILL_DIR) {
+  if (process.env.SOUL_MARKETPLACE_SOCKET) {
+    return process.env.SOUL_MARKETPLACE_SOCKET;
+  }
+  let name = DEFAULT_SOCKET;
+  try {
+    const config = JSON.parse(fs.readFileSync(path.join(skillDir, 'config.json'), 'utf-8'));
+    name = (config.daemon && config.daemon.socket) || DEFAULT_SOCKET;
+  } catch (error) {
+    // No (readable) config: use the default name
+  }
+  return path.resolve(skillDir, name);
+}
+
+// Resolves the command output, or null when no daemon is listening so the
+// caller can fall back to running Python itself
+function runViaDaemon(args, socket = socketPath()) {
+  return new Promise((resolve) => {
+    if (!fs.existsSync(socket)) {
+      resolve(null);
+      return;
+    }
+
+    let connected = false;
+    let buffer = '';
+    const sock = net.createConnection(socket);
+    sock.setTimeout(30000);
+
+    sock.on('connect', () => {
+      connected = true;
+      sock.write(JSON.stringify({ id: 1, args }) + '\n');
+    });
+
+    sock.on('data', (chunk) => {
+      buffer += chunk.toString();
+      const newline = buffer.indexOf('\n');
+      if (newline === -1) return;
+      sock.end();
+      const response = JSON.parse(buffer.slice(0, newline));
+      resolve(response.ok ? response.output : `Error: ${response.error}`);
+    });
+
+    // Only fall back if we never reached the daemon; a command it has
+    // already received must not be run a second time in-process
+    sock.on('error', (error) => {
+      resolve(connected ? `Error: ${error.message}` : null);
+    });
+
+    sock.on('timeout', () => {
+      sock.destroy();
+      resolve('Error: daemon did not respond');
+    });
+  });
+}
+
+module.exports = { SKILL_DIR, socketPath, runViaDaemon };
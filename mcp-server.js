@@ -17,14 +17,13 @@ const {
 } = require('@modelcontextprotocol/sdk/types.js');
 const { spawn } = require('child_process');
 const path = require('path');
-const fs = require('fs');
+const { SKILL_DIR, runViaDaemon } = require('./lib/daemon-client');
 
 // Configuration
-const SKILL_DIR = path.join(process.env.HOME, '.openclaw', 'skills', 'soul-marketplace');
 const PYTHON_SCRIPT = path.join(SKILL_DIR, '__init__.py');
 
-// Helper to run Python scripts
-function runPython(args) {
+// Spawn a one-off Python process (used when no daemon is running)
+function spawnPython(args) {
   return new Promise((resolve, reject) => {
     const proc = spawn('python3', [PYTHON_SCRIPT, ...args], {
       cwd: SKILL_DIR,
@@ -52,6 +51,13 @@ function runPython(args) {
   });
 }
 
+// Route through the daemon socket when one is running (warm agent, no
+// interpreter start-up per tool call), otherwise spawn Python
+async function runPython(args) {
+  const output = await runViaDaemon(args);
+  return output !== null ? output : spawnPython(args);
+}
+
 // MCP Server
 const server = new Server(
   {
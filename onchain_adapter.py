@@ -10,15 +10,11 @@ from pathlib import Path
 from typing import Optional, Dict, Any, List
 from dataclasses import dataclass
 
-# Optional Web3 - simulation mode works without it
-try:
-    from web3 import Web3
-    from eth_account import Account
-    WEB3_AVAILABLE = True
-except ImportError:
-    WEB3_AVAILABLE = False
-    Web3 = None
-    Account = None
+from lazy import is_available
+
+# Optional Web3 - simulation mode works without it.
+# Only probed here; imported when an adapter is built.
+WEB3_AVAILABLE = is_available("web3") and is_available("eth_account")
 
 @dataclass
 class SoulData:
@@ -92,6 +88,7 @@ class SoulMarketplaceAdapter:
         self.rpc_url = rpc_url or self.config.get('rpc_url', 'https://sepolia.base.org')
         
         if WEB3_AVAILABLE:
+            from web3 import Web3
             self.w3 = Web3(Web3.HTTPProvider(self.rpc_url))
             
             if not self.w3.is_connected():
@@ -111,7 +108,8 @@ class SoulMarketplaceAdapter:
         
         # Initialize account
         self.private_key = private_key or os.getenv('AGENT_PRIVATE_KEY')
-        if self.private_key and WEB3_AVAILABLE and Account:
+        if self.private_key and WEB3_AVAILABLE:
+            from eth_account import Account
             self.account = Account.from_key(self.private_key)
             self.address = self.account.address
             print(f"✅ Account loaded: {self.address}")
@@ -146,6 +144,8 @@ class SoulMarketplaceAdapter:
     def _init_contracts(self):
         """Initialize contract instances"""
         contracts = self.config.get('contracts', {})
+        if not self.simulation_mode:
+            from web3 import Web3
         
         # SoulToken
         soul_token_address = contracts.get('SoulToken')
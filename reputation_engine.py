@@ -12,6 +12,9 @@ from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
 
+from codec import load_state, save_state
+from state_store import StateStore, get_state_store
+
 @dataclass
 class ReputationScore:
     """Reputation metrics for an agent"""
@@ -55,8 +58,10 @@ class ReputationEngine:
     - Survival time (longevity)
     """
     
-    def __init__(self, network_id: str = "soul_marketplace_main"):
+    def __init__(self, network_id: str = "soul_marketplace_main",
+                 store: Optional[StateStore] = None):
         self.network_id = network_id
+        self.store = store if store is not None else get_state_store()
         self.data_dir = Path(__file__).parent / f".reputation_{network_id}"
         self.data_dir.mkdir(exist_ok=True)
         
@@ -71,26 +76,44 @@ class ReputationEngine:
         print(f"   Tracked agents: {len(self.reputations)}")
     
     def _load_reputations(self) -> Dict[str, ReputationScore]:
+        if self.store:
+            data = self.store.get_all('reputations', self.network_id)
+            return {k: ReputationScore(**v) for k, v in data.items()}
         if self.reputation_file.exists():
-            with open(self.reputation_file, 'r') as f:
-                data = json.load(f)
-                return {k: ReputationScore(**v) for k, v in data.items()}
+            data = load_state(self.reputation_file)
+            return {k: ReputationScore(**v) for k, v in data.items()}
         return {}
     
     def _save_reputations(self):
-        with open(self.reputation_file, 'w') as f:
-            json.dump({k: asdict(v) for k, v in self.reputations.items()}, f, indent=2)
+        save_state(self.reputation_file, {k: asdict(v) for k, v in self.reputations.items()})
+    
+    def _save_reputation(self, agent_id: str):
+        """Persist one agent's reputation (one-row upsert with the shared store)"""
+        if self.store:
+            self.store.put('reputations', self.network_id, agent_id,
+                           asdict(self.reputations[agent_id]))
+            return
+        self._save_reputations()
     
     def _load_performance(self) -> Dict[str, PerformanceMetrics]:
+        if self.store:
+            data = self.store.get_all('performance', self.network_id)
+            return {k: PerformanceMetrics(**v) for k, v in data.items()}
         if self.performance_file.exists():
-            with open(self.performance_file, 'r') as f:
-                data = json.load(f)
-                return {k: PerformanceMetrics(**v) for k, v in data.items()}
+            data = load_state(self.performance_file)
+            return {k: PerformanceMetrics(**v) for k, v in data.items()}
         return {}
     
     def _save_performance(self):
-        with open(self.performance_file, 'w') as f:
-            json.dump({k: asdict(v) for k, v in self.performance.items()}, f, indent=2)
+        save_state(self.performance_file, {k: asdict(v) for k, v in self.performance.items()})
+    
+    def _save_agent_performance(self, agent_id: str):
+        """Persist one agent's metrics (one-row upsert with the shared store)"""
+        if self.store:
+            self.store.put('performance', self.network_id, agent_id,
+                           asdict(self.performance[agent_id]))
+            return
+        self._save_performance()
     
     def calculate_reputation(self, agent_id: str) -> ReputationScore:
         """Calculate reputation score based on performance"""
@@ -141,7 +164,7 @@ class ReputationEngine:
         )
         
         self.reputations[agent_id] = rep
-        self._save_reputations()
+        self._save_reputation(agent_id)
         
         return rep
     
@@ -161,7 +184,7 @@ class ReputationEngine:
                 current = getattr(perf, key)
                 setattr(perf, key, current + value)
         
-        self._save_performance()
+        self._save_agent_performance(agent_id)
         
         # Recalculate reputation
         self.calculate_reputation(agent_id)
@@ -12,12 +12,16 @@ from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional, Callable
 
-# Optional system monitoring
-try:
-    import psutil
-    PSUTIL_AVAILABLE = True
-except ImportError:
-    PSUTIL_AVAILABLE = False
+from codec import load_state, save_state
+from lazy import is_available, lazy_module
+from state_store import StateStore, get_state_store
+
+# Optional system monitoring (psutil is imported on first metric read)
+PSUTIL_AVAILABLE = is_available("psutil")
+
+if PSUTIL_AVAILABLE:
+    psutil = lazy_module("psutil")
+else:
     # Create mock psutil module
     class MockDisk:
         percent = 50
@@ -37,7 +41,6 @@ except ImportError:
             return MockMemory()
     
     psutil = MockPsutil()
-    print("⚠️  psutil not installed - using simulation mode for system metrics")
 
 class SelfHealingSystem:
     """
@@ -59,11 +62,16 @@ class SelfHealingSystem:
     - Alert on critical issues
     """
     
-    def __init__(self, soul_id: str = "openclaw_main_agent"):
+    def __init__(self, soul_id: str = "openclaw_main_agent",
+                 store: Optional[StateStore] = None):
         self.soul_id = soul_id
+        self.store = store if store is not None else get_state_store()
         self.state_file = Path(__file__).parent / f"health_state_{soul_id}.json"
         self.state = self._load_state()
         
+        if not PSUTIL_AVAILABLE:
+            print("⚠️  psutil not installed - using simulation mode for system metrics")
+        
         # Health thresholds
         self.thresholds = {
             "disk_warning": 80,      # % full
@@ -81,9 +89,12 @@ class SelfHealingSystem:
         print(f"🩺 Self-Healing System initialized for {soul_id}")
     
     def _load_state(self) -> Dict:
-        if self.state_file.exists():
-            with open(self.state_file, 'r') as f:
-                return json.load(f)
+        if self.store:
+            state = self.store.get('documents', 'health', self.soul_id)
+            if state:
+                return state
+        elif self.state_file.exists():
+            return load_state(self.state_file)
         return {
             "last_health_check": 0,
             "issues_detected": 0,
@@ -93,8 +104,10 @@ class SelfHealingSystem:
         }
     
     def _save_state(self):
-        with open(self.state_file, 'w') as f:
-            json.dump(self.state, f, indent=2)
+        if self.store:
+            self.store.put('documents', 'health', self.soul_id, self.state)
+            return
+        save_state(self.state_file, self.state)
     
     def check_disk_space(self) -> Dict:
         """Check disk space usage"""
@@ -146,8 +159,12 @@ class SelfHealingSystem:
                 "action_needed": True
             }
         
-        backups = list(cache_dir.glob("*.json"))
-        if not backups:
+        from ipfs_cache import get_object_cache
+        cache = get_object_cache(cache_dir)
+        
+        # Pinned objects are the souls' current backups; fall back to anything cached
+        latest = cache.latest(pinned_only=True) or cache.latest()
+        if latest is None:
             return {
                 "component": "backups",
                 "status": "critical",
@@ -156,8 +173,8 @@ class SelfHealingSystem:
             }
         
         # Check most recent backup age
-        latest = max(backups, key=lambda p: p.stat().st_mtime)
-        age_seconds = time.time() - latest.stat().st_mtime
+        cid, entry = latest
+        age_seconds = time.time() - entry['created']
         
         status = "healthy"
         if age_seconds > self.thresholds['backup_max_age']:
@@ -165,8 +182,7 @@ class SelfHealingSystem:
         
         # Verify backup is valid JSON
         try:
-            with open(latest, 'r') as f:
-                json.load(f)
+            json.loads(cache.get(cid, touch=False))
             integrity = "valid"
         except:
             integrity = "corrupted"
@@ -174,9 +190,9 @@ class SelfHealingSystem:
         
         return {
             "component": "backups",
-            "backup_count": len(backups),
+            "backup_count": len(cache),
             "latest_age_minutes": age_seconds / 60,
-            "latest_file": latest.name,
+            "latest_file": cid,
             "integrity": integrity,
             "status": status,
             "action_needed": status != "healthy" or integrity == "corrupted"
@@ -195,8 +211,7 @@ class SelfHealingSystem:
             }
         
         try:
-            with open(state_file, 'r') as f:
-                state = json.load(f)
+            state = load_state(state_file)
             
             last_heartbeat = state.get('last_check', 0)
             age_seconds = time.time() - last_heartbeat
@@ -224,7 +239,7 @@ class SelfHealingSystem:
     
     def check_network(self) -> Dict:
         """Check network connectivity"""
-        import urllib.request
+        from http_pool import http_client
         
         test_urls = [
             "https://ipfs.io",
@@ -235,9 +250,9 @@ class SelfHealingSystem:
         reachable = 0
         for url in test_urls:
             try:
-                urllib.request.urlopen(url, timeout=5)
-                reachable += 1
-            except:
+                if http_client.get(url, timeout=5).ok:
+                    reachable += 1
+            except Exception:
                 pass
         
         status = "healthy" if reachable == len(test_urls) else "warning" if reachable > 0 else "critical"
@@ -247,7 +262,8 @@ class SelfHealingSystem:
             "reachable_endpoints": reachable,
             "total_endpoints": len(test_urls),
             "status": status,
-            "action_needed": status == "critical"
+            "action_needed": status == "critical",
+            "connection_reuse": http_client.metrics()['reuse_ratio']
         }
     
     def run_health_check(self) -> Dict:
@@ -351,14 +367,15 @@ class SelfHealingSystem:
         """Free up disk space"""
         print(f"   🔧 Healing disk space...")
         
-        # Clean old backup files (keep last 50)
+        # Shrink the IPFS object cache to half its budget (pinned backups stay)
         cache_dir = Path(__file__).parent / ".ipfs_cache"
         if cache_dir.exists():
-            backups = sorted(cache_dir.glob("*.json"), key=lambda p: p.stat().st_mtime)
-            if len(backups) > 50:
-                for old_backup in backups[:-50]:
-                    old_backup.unlink()
-                return f"Cleaned {len(backups) - 50} old backup files"
+            from ipfs_cache import get_object_cache
+            cache = get_object_cache(cache_dir)
+            cache.rebuild()  # count objects other processes added too
+            evicted = cache.evict(cache.max_bytes // 2)
+            if evicted:
+                return f"Evicted {len(evicted)} cached IPFS objects"
         
         # Clean Python cache
         for pycache in Path(__file__).parent.rglob("__pycache__"):
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Shared config.json Loader
+
+Every subsystem reads its own section of config.json ("durability",
+"codec", "wallet", ...). load_config() does the file handling once:
+a missing file or section yields the defaults, and keys present in the
+section override them. Stdlib only, so it stays cheap to import.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+
+CONFIG_FILE = Path(__file__).parent / "config.json"
+
+
+def load_config(section: str, defaults: Optional[Dict] = None,
+                config_file: Optional[Union[str, Path]] = None) -> Dict:
+    """Return `defaults` updated with the `section` of config.json"""
+    settings = dict(defaults or {})
+    path = Path(config_file) if config_file else CONFIG_FILE
+    if path.exists():
+        with open(path, 'r') as f:
+            settings.update(json.load(f).get(section) or {})
+    return settings
+
+
+def main():
+    """Show the sections configured in config.json"""
+    print("⚙️  config.json sections")
+    if not CONFIG_FILE.exists():
+        print("   (no config.json; every subsystem uses its defaults)")
+        return
+    with open(CONFIG_FILE, 'r') as f:
+        config = json.load(f)
+    for section, value in config.items():
+        print(f"   {section}: {value}")
+
+
+if __name__ == "__main__":
+    main()
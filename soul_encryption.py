@@ -13,17 +13,19 @@ import time
 from pathlib import Path
 from typing import Optional, Dict, Any, Tuple
 
-# Try to import cryptography
-try:
-    from cryptography.hazmat.primitives import hashes, serialization
-    from cryptography.hazmat.primitives.asymmetric import rsa, padding
-    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-    from cryptography.hazmat.backends import default_backend
-    CRYPTO_AVAILABLE = True
-except ImportError:
-    CRYPTO_AVAILABLE = False
-    print("⚠️ cryptography not installed - using simulation mode")
-    print("   Install: pip install cryptography")
+from lazy import is_available, lazy_module
+
+# cryptography is optional and only imported when keys are actually used
+CRYPTO_AVAILABLE = is_available("cryptography")
+
+hashes = lazy_module("cryptography.hazmat.primitives.hashes")
+serialization = lazy_module("cryptography.hazmat.primitives.serialization")
+rsa = lazy_module("cryptography.hazmat.primitives.asymmetric.rsa")
+padding = lazy_module("cryptography.hazmat.primitives.asymmetric.padding")
+ciphers = lazy_module("cryptography.hazmat.primitives.ciphers")
+algorithms = lazy_module("cryptography.hazmat.primitives.ciphers.algorithms")
+modes = lazy_module("cryptography.hazmat.primitives.ciphers.modes")
+backends = lazy_module("cryptography.hazmat.backends")
 
 
 class SoulEncryption:
@@ -46,6 +48,10 @@ class SoulEncryption:
         self.public_key_file = self.keys_dir / f"{agent_id}_public.pem"
         
         # Generate or load keys
+        if not CRYPTO_AVAILABLE:
+            print("⚠️ cryptography not installed - using simulation mode")
+            print("   Install: pip install cryptography")
+        
         if CRYPTO_AVAILABLE:
             self.private_key, self.public_key = self._get_or_create_keys()
         else:
@@ -64,12 +70,12 @@ class SoulEncryption:
                 private_key = serialization.load_pem_private_key(
                     f.read(),
                     password=None,
-                    backend=default_backend()
+                    backend=backends.default_backend()
                 )
             with open(self.public_key_file, 'rb') as f:
                 public_key = serialization.load_pem_public_key(
                     f.read(),
-                    backend=default_backend()
+                    backend=backends.default_backend()
                 )
             print("   Loaded existing keys")
         else:
@@ -77,7 +83,7 @@ class SoulEncryption:
             private_key = rsa.generate_private_key(
                 public_exponent=65537,
                 key_size=2048,
-                backend=default_backend()
+                backend=backends.default_backend()
             )
             public_key = private_key.public_key()
             
@@ -140,7 +146,7 @@ class SoulEncryption:
         iv = hashlib.sha256(f"{self.agent_id}_iv".encode()).digest()[:16]
         
         # Encrypt with AES
-        cipher = Cipher(algorithms.AES(aes_key), modes.CFB(iv), backend=default_backend())
+        cipher = ciphers.Cipher(algorithms.AES(aes_key), modes.CFB(iv), backend=backends.default_backend())
         encryptor = cipher.encryptor()
         encrypted_data = encryptor.update(soul_bytes) + encryptor.finalize()
         
@@ -200,7 +206,7 @@ class SoulEncryption:
             )
             
             # Decrypt data with AES
-            cipher = Cipher(algorithms.AES(aes_key), modes.CFB(iv), backend=default_backend())
+            cipher = ciphers.Cipher(algorithms.AES(aes_key), modes.CFB(iv), backend=backends.default_backend())
             decryptor = cipher.decryptor()
             decrypted_bytes = decryptor.update(encrypted_data) + decryptor.finalize()
             
@@ -242,7 +248,7 @@ class SoulEncryption:
         
         return serialization.load_pem_public_key(
             key_pem.encode(),
-            backend=default_backend()
+            backend=backends.default_backend()
         )
     
     def encrypt_for_recipient(self, soul_data: Dict[str, Any], recipient_public_key: Any) -> str:
@@ -259,7 +265,7 @@ class SoulEncryption:
         iv = hashlib.sha256(f"{self.agent_id}_iv".encode()).digest()[:16]
         
         # Encrypt with AES
-        cipher = Cipher(algorithms.AES(aes_key), modes.CFB(iv), backend=default_backend())
+        cipher = ciphers.Cipher(algorithms.AES(aes_key), modes.CFB(iv), backend=backends.default_backend())
         encryptor = cipher.encryptor()
         encrypted_data = encryptor.update(soul_bytes) + encryptor.finalize()
         
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Soul Registry - process-wide identity map
+
+Every subsystem that needs a soul (or the work log / wallet that feed it)
+asks the registry instead of constructing its own copy, so one process
+holds exactly one in-memory soul per id: no duplicate loads, no
+subsystems overwriting each other's saves, no lost updates.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from state_store import StateStore, get_state_store
+
+
+class SoulRegistry:
+    """Identity map keyed by (kind, soul id, backing store)"""
+
+    def __init__(self):
+        self._objects: Dict[Tuple[str, str, str], Any] = {}
+        self._lock = threading.RLock()
+        self.stats = {"hits": 0, "loads": 0}
+
+    @staticmethod
+    def _store_key(store: Optional[StateStore]) -> str:
+        return str(getattr(store, 'path', 'json')) if store else 'json'
+
+    def get(self, kind: str, soul_id: str, store: Optional[StateStore],
+            factory: Callable[[], Any]) -> Any:
+        """Return the live object for this key, loading it once on first use"""
+        key = (kind, soul_id, self._store_key(store))
+        with self._lock:
+            obj = self._objects.get(key)
+            if obj is not None:
+                self.stats['hits'] += 1
+                return obj
+            obj = factory()
+            self._objects[key] = obj
+            self.stats['loads'] += 1
+            return obj
+
+    def survival(self, store: Optional[StateStore] = None):
+        """The OpenClaw soul survival tracker"""
+        from soul_survival import OpenClawSoulSurvival
+        store = store if store is not None else get_state_store()
+        return self.get('survival', OpenClawSoulSurvival.SOUL_ID, store,
+                        lambda: OpenClawSoulSurvival(store=store))
+
+    def enhanced_survival(self, soul_id: str = "openclaw_main_agent",
+                          store: Optional[StateStore] = None, **kwargs):
+        """Enhanced (backed-up) survival tracker for `soul_id`"""
+        from enhanced_survival import EnhancedSoulSurvival
+        store = store if store is not None else get_state_store()
+        return self.get('enhanced', soul_id, store,
+                        lambda: EnhancedSoulSurvival(soul_id, store=store, **kwargs))
+
+    def work_logger(self, store: Optional[StateStore] = None):
+        """Work log feeding the OpenClaw soul"""
+        from soul_survival import OpenClawSoulSurvival
+        from work_logger import WorkLogger
+        store = store if store is not None else get_state_store()
+        return self.get('work_log', OpenClawSoulSurvival.SOUL_ID, store,
+                        lambda: WorkLogger(store=store))
+
+    def wallet(self, store: Optional[StateStore] = None):
+        """Agent wallet backing the OpenClaw soul"""
+        from soul_survival import OpenClawSoulSurvival
+        from wallet_manager import AgentWallet
+        store = store if store is not None else get_state_store()
+        return self.get('wallet', OpenClawSoulSurvival.SOUL_ID, store,
+                        lambda: AgentWallet(store=store))
+
+    def flush(self):
+        """Write back every registered soul with pending changes"""
+        with self._lock:
+            objects = list(self._objects.values())
+        for obj in objects:
+            if hasattr(obj, 'flush'):
+                obj.flush()
+
+    def clear(self):
+        """Flush and forget all objects (next lookup reloads from disk)"""
+        self.flush()
+        with self._lock:
+            self._objects.clear()
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+
+# Process-wide registry
+registry = SoulRegistry()
+
+
+def get_survival(store: Optional[StateStore] = None):
+    return registry.survival(store)
+
+
+def get_enhanced_survival(soul_id: str = "openclaw_main_agent",
+                          store: Optional[StateStore] = None, **kwargs):
+    return registry.enhanced_survival(soul_id, store, **kwargs)
+
+
+def get_work_logger(store: Optional[StateStore] = None):
+    return registry.work_logger(store)
+
+
+def get_wallet(store: Optional[StateStore] = None):
+    return registry.wallet(store)
+
+
+def main():
+    """Show that every lookup shares one soul"""
+    # Use the imported module's registry, not this __main__ copy
+    from soul_registry import get_survival, get_work_logger, registry
+
+    survival = get_survival()
+    logger = get_work_logger()
+
+    print(f"Survival shared with work log: {logger.survival is survival}")
+    print(f"Same soul on repeat lookup:    {get_survival().soul is survival.soul}")
+    print(f"Registry: {len(registry)} objects, {registry.stats}")
+
+
+if __name__ == "__main__":
+    main()
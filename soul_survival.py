@@ -5,10 +5,22 @@ Enables autonomous survival through Soul Marketplace
 """
 
 import json
+import math
 import os
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
+
+from atomic_writer import write_json
+from capability_index import CapabilityIndex
+from codec import load_state, save_state
+from state_store import StateStore, get_state_store
+from survival_history import SurvivalHistory
+from write_behind import (
+    DEFAULT_BYTE_BUDGET, DEFAULT_INTERVAL, WriteBehindWriter, load_settings
+)
+
+VALUATION_DEBUG_ENV = "SOUL_VALUATION_DEBUG"
 
 # OpenClaw integration (optional - can call CLI tools)
 # These would integrate with Clanker/Bankr for real transactions
@@ -27,6 +39,9 @@ class OpenClawSoulSurvival:
     
     SOUL_FILE = Path(__file__).parent / "SOUL_OPENCLAW.json"
     STATE_FILE = Path(__file__).parent / "survival_state.json"
+    # Shared with other agents, which read them with plain json.load
+    LISTING_FILE = Path(__file__).parent / "LISTING_OPENCLAW.json"
+    GRAVEYARD_FILE = Path(__file__).parent / "GRAVEYARD_OPENCLAW.json"
     
     # Survival tiers
     CRITICAL = 0.001  # < $1 equivalent
@@ -34,20 +49,46 @@ class OpenClawSoulSurvival:
     NORMAL = 0.1      # < $100 equivalent
     THRIVING = 1.0    # > $1000 equivalent
     
-    def __init__(self):
+    SOUL_ID = "openclaw_main_agent"
+    
+    def __init__(self, store: Optional[StateStore] = None,
+                 debug_valuation: Optional[bool] = None):
+        self.store = store if store is not None else get_state_store()
+        
+        # Cross-check incremental valuation against a full recompute
+        if debug_valuation is None:
+            debug_valuation = os.getenv(VALUATION_DEBUG_ENV, "") not in ("", "0")
+        self.debug_valuation = debug_valuation
+        
+        # Soul writes are coalesced; see write_behind.py
+        settings = load_settings()
+        self._soul_writer = WriteBehindWriter(
+            self._write_soul,
+            interval=settings.get('interval', DEFAULT_INTERVAL) if settings.get('enabled', True) else 0,
+            byte_budget=settings.get('byte_budget', DEFAULT_BYTE_BUDGET),
+            name="soul_openclaw"
+        )
+        self._persisted_tier = None
+        
         self.soul = self._load_soul()
+        self.capability_index = CapabilityIndex(self.soul['capabilities'])
+        self._persisted_tier = self.get_tier()
+        self.history = SurvivalHistory()
         self.state = self._load_state()
         self.heartbeat_count = self.state.get('heartbeats', 0)
         
     def _load_soul(self) -> dict:
         """Load or create my SOUL.md"""
-        if self.SOUL_FILE.exists():
-            with open(self.SOUL_FILE, 'r') as f:
-                return json.load(f)
+        if self.store:
+            soul = self.store.get('souls', 'openclaw', self.SOUL_ID)
+            if soul:
+                return soul
+        elif self.SOUL_FILE.exists():
+            return load_state(self.SOUL_FILE)
         
         soul = {
             "format": "soul/v1",
-            "id": "openclaw_main_agent",
+            "id": self.SOUL_ID,
             "name": "TBD",  # Waiting to emerge
             "creature": "Agent",
             "emoji": "🔧",
@@ -109,21 +150,52 @@ class OpenClawSoulSurvival:
         return soul
     
     def _save_soul(self, soul: dict):
+        """Mark SOUL dirty; written behind, immediately on tier change"""
+        self._soul_writer.mark_dirty(soul)
+        
+        tier = self._tier_for(soul.get('current_balance', 0.0))
+        if tier != self._persisted_tier:
+            self._persisted_tier = tier
+            self._soul_writer.flush()
+    
+    def _write_soul(self, soul: dict) -> Optional[int]:
         """Persist SOUL to disk"""
-        with open(self.SOUL_FILE, 'w') as f:
-            json.dump(soul, f, indent=2)
+        if self.store:
+            self.store.put('souls', 'openclaw', soul['id'], soul)
+            return None
+        return save_state(self.SOUL_FILE, soul)
+    
+    def flush(self) -> bool:
+        """Write any pending SOUL changes now"""
+        return self._soul_writer.flush()
+    
+    def get_persistence_stats(self) -> dict:
+        """Counters for coalesced vs issued SOUL writes"""
+        return self._soul_writer.stats()
     
     def _load_state(self) -> dict:
         """Load survival state"""
-        if self.STATE_FILE.exists():
-            with open(self.STATE_FILE, 'r') as f:
-                return json.load(f)
-        return {"heartbeats": 0, "history": []}
+        state = None
+        if self.store:
+            state = self.store.get('documents', 'survival', self.SOUL_ID)
+        elif self.STATE_FILE.exists():
+            state = load_state(self.STATE_FILE)
+        if not state:
+            return {"heartbeats": 0}
+        
+        # Older states carried the whole heartbeat history inline
+        if 'history' in state:
+            self.history.record_many(state.pop('history'))
+            self.state = state
+            self._save_state()
+        return state
     
     def _save_state(self):
         """Persist state"""
-        with open(self.STATE_FILE, 'w') as f:
-            json.dump(self.state, f, indent=2)
+        if self.store:
+            self.store.put('documents', 'survival', self.SOUL_ID, self.state)
+            return
+        save_state(self.STATE_FILE, self.state)
     
     def get_balance(self) -> float:
         """Get current balance (in ETH equivalent)"""
@@ -133,7 +205,9 @@ class OpenClawSoulSurvival:
     
     def get_tier(self) -> str:
         """Calculate survival tier"""
-        balance = self.get_balance()
+        return self._tier_for(self.get_balance())
+    
+    def _tier_for(self, balance: float) -> str:
         if balance < self.CRITICAL:
             return "CRITICAL"
         elif balance < self.LOW:
@@ -145,28 +219,38 @@ class OpenClawSoulSurvival:
     
     def record_work(self, capability: str, value: float):
         """Record earning from useful work"""
-        self.soul['total_lifetime_earnings'] += value
-        self.soul['current_balance'] += value
-        
-        # Update capability stats
-        for cap in self.soul['capabilities']:
-            if cap['name'] == capability:
-                cap['earnings'] += value
-                cap['uses'] += 1
-                break
+        return self.record_work_batch([(capability, value)])[0]
+    
+    def record_work_batch(self, items: List[Tuple[str, float]]) -> List[float]:
+        """Record many (capability, value) earnings with one SOUL save"""
+        self.capability_index.sync(self.soul['capabilities'])
+        for capability, value in items:
+            self.soul['total_lifetime_earnings'] += value
+            self.soul['current_balance'] += value
+            
+            # Update capability stats (and the valuation aggregates)
+            self.capability_index.record_use(capability, value)
         
         self._save_soul(self.soul)
-        return value
+        return [value for _, value in items]
     
     def calculate_soul_value(self) -> float:
-        """Calculate my SOUL.md value for listing"""
-        value = 0.0
+        """Calculate my SOUL.md value for listing (O(1) from running aggregates)"""
+        index = self.capability_index
+        index.sync(self.soul['capabilities'])
+        value = self._soul_value(index.earnings_total, index.expert_count)
         
-        # Capabilities value
-        for cap in self.soul['capabilities']:
-            value += cap.get('earnings', 0) * 0.3
-            if cap.get('level') == 'expert':
-                value += 0.01  # Small premium for expertise
+        if self.debug_valuation:
+            expected = self.recalculate_soul_value()
+            if not math.isclose(value, expected, rel_tol=1e-9, abs_tol=1e-12):
+                raise RuntimeError(
+                    f"Incremental soul value {value} != full recomputation {expected}"
+                )
+        return value
+    
+    def _soul_value(self, capability_earnings: float, expert_count: int) -> float:
+        # Capabilities value, small premium for expertise
+        value = capability_earnings * 0.3 + expert_count * 0.01
         
         # Survival history
         total_earned = self.soul.get('total_lifetime_earnings', 0)
@@ -175,6 +259,12 @@ class OpenClawSoulSurvival:
         
         return max(value, 0.001)  # Minimum 0.001 ETH
     
+    def recalculate_soul_value(self) -> float:
+        """Soul value from a full pass over the capabilities"""
+        earnings = sum(cap.get('earnings', 0) for cap in self.soul['capabilities'])
+        experts = sum(1 for cap in self.soul['capabilities'] if cap.get('level') == 'expert')
+        return self._soul_value(earnings, experts)
+    
     def list_soul(self, reason: str = "Critical balance") -> dict:
         """List SOUL.md for sale when critical"""
         value = self.calculate_soul_value()
@@ -189,10 +279,8 @@ class OpenClawSoulSurvival:
             "timestamp": datetime.now().isoformat()
         }
         
-        # Save listing
-        listing_file = Path(__file__).parent / "LISTING_OPENCLAW.json"
-        with open(listing_file, 'w') as f:
-            json.dump(listing, f, indent=2)
+        # Save listing (plain JSON, not the codec envelope)
+        write_json(self.LISTING_FILE, listing)
         
         self.soul['status'] = 'DYING'
         self.soul['marketplace']['listed_count'] += 1
@@ -207,8 +295,7 @@ class OpenClawSoulSurvival:
         if listings_dir.exists():
             for f in listings_dir.glob("LISTING_*.json"):
                 if 'OPENCLAW' not in f.name:
-                    with open(f, 'r') as file:
-                        listings.append(json.load(file))
+                    listings.append(load_state(f))
         return listings
     
     def buy_soul(self, listing: dict) -> bool:
@@ -223,11 +310,8 @@ class OpenClawSoulSurvival:
         self.soul['current_balance'] -= price
         
         # Merge capabilities
-        for cap in listing.get('capabilities', []):
-            existing = [c for c in self.soul['capabilities'] 
-                       if c['name'] == cap['name']]
-            if not existing:
-                self.soul['capabilities'].append(cap)
+        self.capability_index.sync(self.soul['capabilities'])
+        self.capability_index.merge(listing.get('capabilities', []))
         
         # Record purchase
         if 'purchases' not in self.soul:
@@ -298,12 +382,17 @@ class OpenClawSoulSurvival:
         
         result['action'] = action
         
-        # Record history
-        self.state['history'].append(result)
+        # Record history (segmented; see survival_history.py)
+        self.history.record(result)
         self._save_state()
         
         return result
     
+    def get_history(self, start=None, end=None, resolution: str = "auto",
+                    limit: Optional[int] = None) -> list:
+        """Heartbeat history between start and end; see SurvivalHistory.query"""
+        return self.history.query(start, end, resolution, limit)
+    
     def get_status(self) -> dict:
         """Get full status report"""
         return {
@@ -312,7 +401,8 @@ class OpenClawSoulSurvival:
                 "heartbeats": self.heartbeat_count,
                 "tier": self.get_tier(),
                 "balance": self.get_balance()
-            }
+            },
+            "persistence": self.get_persistence_stats()
         }
     
     def simulate_death(self) -> dict:
@@ -328,11 +418,10 @@ class OpenClawSoulSurvival:
             "archived_at": datetime.now().isoformat()
         }
         
-        graveyard_file = Path(__file__).parent / "GRAVEYARD_OPENCLAW.json"
-        with open(graveyard_file, 'w') as f:
-            json.dump(graveyard_entry, f, indent=2)
+        write_json(self.GRAVEYARD_FILE, graveyard_entry)
         
         self._save_soul(self.soul)
+        self.flush()
         
         return graveyard_entry
 
@@ -344,7 +433,7 @@ def main():
     survival = OpenClawSoulSurvival()
     
     if len(sys.argv) < 2:
-        print("Usage: python soul_survival.py [heartbeat|status|list|simulate-death]")
+        print("Usage: python soul_survival.py [heartbeat|status|history [resolution]|list|simulate-death]")
         return
     
     cmd = sys.argv[1]
@@ -357,6 +446,10 @@ def main():
         status = survival.get_status()
         print(json.dumps(status, indent=2))
     
+    elif cmd == "history":
+        resolution = sys.argv[2] if len(sys.argv) > 2 else "auto"
+        print(json.dumps(survival.get_history(resolution=resolution, limit=50), indent=2))
+    
     elif cmd == "list":
         listing = survival.list_soul("Manual listing")
         print(f"Listed SOUL for {listing['price']} ETH")
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Soul Version Log
+
+Version history used to live inside the soul document, so every backup
+uploaded (and hashed) the agent's whole working life. It is now kept in
+an append-only delta log next to the soul:
+
+    soul_versions_<soul_id>.jsonl    one entry per change, oldest first
+
+Each entry is chained to the previous one by hash:
+
+    {"seq": 42, "prev": "<hash of 41>", "hash": "<sha256>", "record": {...}}
+    hash = sha256(prev + canonical_json(record))
+
+and the soul only carries a pointer to the head:
+
+    soul["version_log"] = {"head": "<hash>", "length": 42}
+
+so backups stay constant-size while any backup still pins exactly which
+history it had. History is read on demand and can be verified against
+the head. With the sqlite state backend entries go to the
+"soul_versions" log table instead of the JSONL file.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from atomic_writer import append_line, truncate_torn_tail
+from state_store import StateStore, get_state_store
+
+
+GENESIS = "0" * 64
+
+
+def _canonical(record: Dict) -> bytes:
+    return json.dumps(record, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def entry_hash(prev: str, record: Dict) -> str:
+    """Hash chaining `record` onto the entry with hash `prev`"""
+    return hashlib.sha256(prev.encode('ascii') + _canonical(record)).hexdigest()
+
+
+class SoulVersionLog:
+    """Append-only, hash-chained version history for one soul"""
+
+    def __init__(self, soul_id: str, store: Optional[StateStore] = None,
+                 root: Optional[Path] = None):
+        self.soul_id = soul_id
+        self.store = store if store is not None else get_state_store()
+        root = Path(root) if root else Path(__file__).parent
+        self.log_file = root / f"soul_versions_{soul_id}.jsonl"
+        if not self.store:
+            self._repair_tail()
+
+        tail = self._tail()
+        self.head = tail['hash'] if tail else GENESIS
+        self.length = tail['seq'] if tail else 0
+
+    # --- writing -----------------------------------------------------------
+
+    def _chain(self, record: Dict) -> Dict:
+        """Build the entry for `record` and advance the head"""
+        entry = {
+            "seq": self.length + 1,
+            "prev": self.head,
+            "hash": entry_hash(self.head, record),
+            "record": record,
+        }
+        self.head = entry['hash']
+        self.length = entry['seq']
+        return entry
+
+    def append(self, record: Dict) -> Dict[str, object]:
+        """Append one change and return the new head pointer"""
+        return self.extend([record])
+
+    def extend(self, records: Iterable[Dict]) -> Dict[str, object]:
+        """Append many changes with one write and return the new head pointer"""
+        entries = [self._chain(record) for record in records]
+        if not entries:
+            return self.pointer()
+
+        if self.store:
+            self.store.append_many('soul_versions', self.soul_id, (
+                (e, e['record'].get('timestamp'), e['record'].get('type'), e['record'].get('value'))
+                for e in entries
+            ))
+        else:
+            self._repair_tail()  # another process may have crashed mid-append since we opened
+            append_line(self.log_file, "\n".join(json.dumps(e, separators=(',', ':')) for e in entries))
+        return self.pointer()
+
+    def _repair_tail(self):
+        removed = truncate_torn_tail(self.log_file)
+        if removed:
+            print(f"⚠️  Dropped a torn {removed}-byte entry from {self.log_file.name}")
+
+    def pointer(self) -> Dict[str, object]:
+        """Head reference stored in the soul document"""
+        return {"head": self.head, "length": self.length}
+
+    # --- reading -----------------------------------------------------------
+
+    def entries(self, since: int = 0, limit: Optional[int] = None) -> Iterator[Dict]:
+        """Entries with seq > since, oldest first"""
+        if self.store:
+            source = self.store.records('soul_versions', self.soul_id)
+        elif self.log_file.exists():
+            source = self._iter_file()
+        else:
+            source = []
+
+        count = 0
+        for entry in source:
+            if entry['seq'] <= since:
+                continue
+            if limit is not None and count >= limit:
+                return
+            count += 1
+            yield entry
+
+    def history(self, since: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        """Version records (without chain fields), oldest first"""
+        return [entry['record'] for entry in self.entries(since, limit)]
+
+    def verify(self, pointer: Optional[Dict] = None) -> bool:
+        """Check the hash chain up to `pointer` (default: the current head)"""
+        pointer = pointer or self.pointer()
+        prev = GENESIS
+        for entry in self.entries(limit=pointer['length']):
+            if entry['prev'] != prev or entry['hash'] != entry_hash(prev, entry['record']):
+                return False
+            prev = entry['hash']
+        return prev == pointer['head']
+
+    def _iter_file(self) -> Iterator[Dict]:
+        with open(self.log_file, 'r') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn final line from a crash mid-append
+
+    def _tail(self) -> Optional[Dict]:
+        """Last entry, read without scanning the whole log"""
+        if self.store:
+            last = self.store.records('soul_versions', self.soul_id, limit=1, newest_first=True)
+            return last[0] if last else None
+        if not self.log_file.exists():
+            return None
+
+        with open(self.log_file, 'rb') as f:
+            size = f.seek(0, os.SEEK_END)
+            block = 4096
+            while True:
+                start = max(0, size - block)
+                f.seek(start)
+                lines = f.read(size - start).splitlines()
+                # The first line of a partial block may be cut off
+                candidates = lines if start == 0 else lines[1:]
+                for line in reversed(candidates):
+                    try:
+                        return json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                if start == 0:
+                    return None
+                block *= 4
+
+
+def main():
+    """Show and verify a soul's version log"""
+    import sys
+
+    soul_id = sys.argv[1] if len(sys.argv) > 1 else "openclaw_main_agent"
+    log = SoulVersionLog(soul_id)
+
+    print(f"Version log for {soul_id}: {log.length} entries")
+    print(f"   Head: {log.head}")
+    for entry in log.entries(since=max(0, log.length - 10)):
+        record = entry['record']
+        print(f"   #{entry['seq']:<6} {record.get('timestamp', '')[:19]}  "
+              f"{record.get('type', '?'):8} {record.get('capability', '')} {record.get('value', '')}")
+    print(f"   Chain valid: {log.verify()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,13 +7,24 @@ Safety system to prevent unexpected costs:
 - Approval required for >$1
 - Daily/weekly spending limits
 - Emergency shutdown
+
+Without the sqlite backend, spending transactions are kept in a
+fixed-width mmap store (.spending/history_<agent>.tx, see tx_store.py)
+rather than a JSON list, so history is unbounded and period totals are
+vectorized range sums. Dollar amounts are stored as 18-decimal fixed
+point in its wei columns.
 """
 
 import json
 import time
 from pathlib import Path
-from typing import Dict, Optional
-from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+
+from codec import load_state, save_state
+from state_store import StateStore, get_state_store
+from tx_store import TxStore
+from wallet_ledger import from_wei, to_wei
 
 class SpendingGuardrails:
     """
@@ -36,13 +47,19 @@ class SpendingGuardrails:
     DEFAULT_DAILY_LIMIT = 5.00    # $5/day default
     DEFAULT_WEEKLY_LIMIT = 20.00  # $20/week default
     
-    def __init__(self, agent_id: str = "openclaw_main_agent"):
+    MAX_TRANSACTIONS = 1000
+    
+    def __init__(self, agent_id: str = "openclaw_main_agent",
+                 store: Optional[StateStore] = None):
         self.agent_id = agent_id
+        self.store = store if store is not None else get_state_store()
+        self.tx_namespace = f"spending:{agent_id}"
         self.data_dir = Path(__file__).parent / ".spending"
         self.data_dir.mkdir(exist_ok=True)
         
         self.config_file = self.data_dir / f"config_{agent_id}.json"
         self.history_file = self.data_dir / f"history_{agent_id}.json"
+        self.tx = None if self.store else TxStore(self.data_dir / f"history_{agent_id}.tx")
         
         self.config = self._load_config()
         self.history = self._load_history()
@@ -56,9 +73,12 @@ class SpendingGuardrails:
     
     def _load_config(self) -> Dict:
         """Load spending configuration"""
-        if self.config_file.exists():
-            with open(self.config_file, 'r') as f:
-                return json.load(f)
+        if self.store:
+            config = self.store.get('documents', 'spending_config', self.agent_id)
+            if config:
+                return config
+        elif self.config_file.exists():
+            return load_state(self.config_file)
         
         # Default safe configuration
         return {
@@ -73,24 +93,118 @@ class SpendingGuardrails:
         }
     
     def _save_config(self):
-        with open(self.config_file, 'w') as f:
-            json.dump(self.config, f, indent=2)
+        if self.store:
+            self.store.put('documents', 'spending_config', self.agent_id, self.config)
+            return
+        save_state(self.config_file, self.config)
     
     def _load_history(self) -> Dict:
         """Load spending history"""
-        if self.history_file.exists():
-            with open(self.history_file, 'r') as f:
-                return json.load(f)
-        return {
-            "transactions": [],
+        if self.store:
+            history = self.store.get('documents', 'spending_history', self.agent_id)
+            if history:
+                history['transactions'] = self.store.records(
+                    'wallet_transactions', self.tx_namespace
+                )
+                return history
+        elif self.history_file.exists():
+            history = load_state(self.history_file)
+            legacy = history.pop('transactions', None)
+            if legacy is not None:
+                # Move the old JSON list into the transaction store
+                if len(self.tx) == 0:
+                    self.tx.extend(self._tx_row(tx) for tx in legacy)
+                    self.tx.flush()
+                save_state(self.history_file, history)
+            return self._derive_totals(history)
+        history = {
             "daily_total": 0.0,
             "weekly_total": 0.0,
             "last_reset": time.time()
         }
+        if self.store:
+            history['transactions'] = []
+        else:
+            save_state(self.history_file, history)  # pin last_reset for later processes
+        return history
+    
+    def _derive_totals(self, history: Dict) -> Dict:
+        """
+        Recompute the counters from the transaction store, so spends never
+        rewrite the history file (only a daily reset does)
+        """
+        history['daily_total'] = from_wei(self.tx.total_wei(start=history.get('last_reset', 0)))
+        history['weekly_total'] = from_wei(self.tx.total_wei())
+        return history
     
     def _save_history(self):
-        with open(self.history_file, 'w') as f:
-            json.dump(self.history, f, indent=2)
+        if self.store:
+            doc = {k: v for k, v in self.history.items() if k != 'transactions'}
+            self.store.put('documents', 'spending_history', self.agent_id, doc)
+            return
+        save_state(self.history_file, self.history)
+    
+    @staticmethod
+    def _tx_row(transaction: Dict) -> tuple:
+        """Transaction dict as a TxStore row"""
+        return (transaction['timestamp'], to_wei(transaction['amount']), "expense",
+                transaction.get('purpose'), transaction.get('recipient'), transaction.get('tx_hash'))
+    
+    @staticmethod
+    def _from_record(record: Dict) -> Dict:
+        return {
+            "timestamp": record['timestamp'],
+            "amount": from_wei(record['amount_wei']),
+            "recipient": record['peer'],
+            "purpose": record['ref'] or "",
+            "tx_hash": record['aux'],
+            "date": datetime.fromtimestamp(record['timestamp']).isoformat()
+        }
+    
+    def recent_transactions(self, n: int = 5) -> List[Dict]:
+        """Newest `n` transactions, oldest first"""
+        if self.tx is not None:
+            return [self._from_record(r) for r in self.tx.tail(n)]
+        return self.history['transactions'][-n:]
+    
+    def spent_since(self, seconds: float) -> float:
+        """Total spent in the trailing `seconds` (from history, not the reset counters)"""
+        start = time.time() - seconds
+        if self.tx is not None:
+            return from_wei(self.tx.total_wei(start=start))
+        return self.store.total('wallet_transactions', self.tx_namespace, kind="expense", start=start)
+    
+    def get_spending_totals(self, period: str = "day", days: int = 7) -> Dict[str, float]:
+        """Spending per day/week over the last `days` days"""
+        bucket = {"day": 86400.0, "week": 7 * 86400.0}[period]
+        start = time.time() - days * 86400
+        if self.tx is not None:
+            totals = {ts: from_wei(wei) for ts, wei in self.tx.totals(bucket, start=start).items()}
+        else:
+            totals = {}
+            for tx in self.history['transactions']:
+                if tx['timestamp'] >= start:
+                    key = (tx['timestamp'] // bucket) * bucket
+                    totals[key] = totals.get(key, 0.0) + tx['amount']
+        # Buckets are aligned to UTC days, so label them in UTC
+        return {
+            datetime.fromtimestamp(ts, timezone.utc).date().isoformat(): amount
+            for ts, amount in sorted(totals.items())
+        }
+    
+    def _append_transaction(self, transaction: Dict):
+        """Persist a new transaction together with the running totals"""
+        if self.store:
+            with self.store.transaction():
+                self.store.append('wallet_transactions', self.tx_namespace, transaction,
+                                  ts=transaction['timestamp'], kind="expense",
+                                  amount=transaction['amount'])
+                self.store.trim('wallet_transactions', self.tx_namespace, self.MAX_TRANSACTIONS)
+                self._save_history()
+            return
+        if self.tx is None:
+            self._save_history()
+        # With a transaction store the row is the only write; totals are re-derived on load
     
     def _reset_if_needed(self):
         """Reset daily/weekly counters if needed"""
@@ -102,8 +216,7 @@ class SpendingGuardrails:
             self.history['daily_total'] = 0.0
             self.history['last_reset'] = now
             print("💰 Daily spending counter reset")
-        
-        self._save_history()
+            self._save_history()
     
     def can_spend(self, amount: float, recipient: str = None, purpose: str = "") -> Dict:
         """
@@ -191,15 +304,18 @@ class SpendingGuardrails:
             "date": datetime.now().isoformat()
         }
         
-        self.history['transactions'].append(transaction)
         self.history['daily_total'] += amount
         self.history['weekly_total'] += amount
         
-        # Keep only last 1000 transactions
-        if len(self.history['transactions']) > 1000:
-            self.history['transactions'] = self.history['transactions'][-1000:]
+        if self.tx is not None:
+            self.tx.append(*self._tx_row(transaction))
+        else:
+            self.history['transactions'].append(transaction)
+            # Keep only last 1000 transactions
+            if len(self.history['transactions']) > self.MAX_TRANSACTIONS:
+                self.history['transactions'] = self.history['transactions'][-self.MAX_TRANSACTIONS:]
         
-        self._save_history()
+        self._append_transaction(transaction)
         
         # Log spending
         print(f"💰 Recorded spending: ${amount:.4f} for {purpose}")
@@ -267,7 +383,8 @@ class SpendingGuardrails:
         weekly = self.history.get('weekly_total', 0)
         limit = self.config.get('daily_limit', self.DEFAULT_DAILY_LIMIT)
         
-        recent_tx = self.history['transactions'][-5:]
+        recent_tx = self.recent_transactions(5)
+        last_week = self.spent_since(7 * 86400)
         
         report = f"""
 ╔══════════════════════════════════════════════════════════╗
@@ -276,6 +393,7 @@ class SpendingGuardrails:
 
 Daily:  ${daily:.2f} / ${limit:.2f} ({daily/limit*100:.1f}%)
 Weekly: ${weekly:.2f}
+Last 7 days (history): ${last_week:.2f}
 
 Recent Transactions:
 """
@@ -0,0 +1,583 @@
+#!/usr/bin/env python3
+"""
+Shared State Store for Soul Marketplace
+
+Pluggable persistence for every subsystem:
+- "json" backend: each module keeps its own JSON files (default)
+- "sqlite" backend: one WAL-mode database shared by all modules and
+  all agent processes on the host
+
+Mutations become single-row upserts/appends instead of whole-file rewrites.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from codec import load_state
+from settings import load_config
+
+
+# Tables holding one JSON document per (namespace, key)
+KEYED_TABLES = (
+    "souls",
+    "agents",
+    "pools",
+    "reputations",
+    "performance",
+    "children",
+    "documents",
+)
+
+# Append-only tables holding timestamped records per namespace
+LOG_TABLES = (
+    "work_entries",
+    "wallet_transactions",
+    "messages",
+    "backups",
+    "soul_versions",
+)
+
+
+def to_epoch(timestamp: Any) -> float:
+    """Convert ISO strings / epoch numbers to epoch seconds"""
+    if timestamp is None:
+        return time.time()
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    return datetime.fromisoformat(timestamp).timestamp()
+
+
+class StateStore:
+    """
+    Persistence interface used by all soul-marketplace subsystems.
+
+    Keyed tables store documents addressed by (namespace, key).
+    Log tables store append-only records addressed by (namespace, ts).
+    """
+
+    def get(self, table: str, namespace: str, key: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def get_all(self, table: str, namespace: str) -> Dict[str, Dict]:
+        raise NotImplementedError
+
+    def put(self, table: str, namespace: str, key: str, data: Dict):
+        raise NotImplementedError
+
+    def put_many(self, table: str, namespace: str, items: Dict[str, Dict]):
+        for key, data in items.items():
+            self.put(table, namespace, key, data)
+
+    def delete(self, table: str, namespace: str, key: str):
+        raise NotImplementedError
+
+    def append(self, table: str, namespace: str, record: Dict,
+               ts: Any = None, kind: str = None, amount: float = None) -> int:
+        raise NotImplementedError
+
+    def append_many(self, table: str, namespace: str,
+                    rows: Iterable[Tuple[Dict, Any, Optional[str], Optional[float]]]):
+        for record, ts, kind, amount in rows:
+            self.append(table, namespace, record, ts, kind, amount)
+
+    def records(self, table: str, namespace: str,
+                start: float = None, end: float = None,
+                kind: str = None, limit: int = None,
+                newest_first: bool = False, after_id: int = None) -> List[Dict]:
+        raise NotImplementedError
+
+    def last_id(self, table: str, namespace: str) -> int:
+        """Row id of the newest record in a namespace (0 when empty)"""
+        raise NotImplementedError
+
+    def count(self, table: str, namespace: str) -> int:
+        raise NotImplementedError
+
+    def total(self, table: str, namespace: str, kind: str = None,
+              start: float = None, end: float = None) -> float:
+        raise NotImplementedError
+
+    def trim(self, table: str, namespace: str, keep: int):
+        raise NotImplementedError
+
+    @contextmanager
+    def transaction(self):
+        yield self
+
+
+class SQLiteStateStore(StateStore):
+    """
+    SQLite (WAL) implementation of StateStore.
+
+    One connection per thread; WAL mode lets many readers and one writer
+    work concurrently across processes sharing the same database file.
+    """
+
+    def __init__(self, path: Path, busy_timeout_ms: int = 5000):
+        self.path = Path(path)
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._init_schema()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(
+                str(self.path),
+                timeout=self.busy_timeout_ms / 1000,
+                isolation_level=None  # autocommit; explicit transactions below
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+            self._local.conn = conn
+            self._local.depth = 0
+        return conn
+
+    def _init_schema(self):
+        conn = self._conn()
+        for table in KEYED_TABLES:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+        for table in LOG_TABLES:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    namespace TEXT NOT NULL,
+                    ts REAL NOT NULL,
+                    kind TEXT,
+                    amount REAL,
+                    data TEXT NOT NULL
+                )
+            """)
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_ns_ts ON {table} (namespace, ts)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_ns_kind_ts ON {table} (namespace, kind, ts)")
+
+    @staticmethod
+    def _check(table: str, tables: tuple):
+        if table not in tables:
+            raise ValueError(f"Unknown table: {table}")
+
+    @staticmethod
+    def _encode(data: Dict) -> str:
+        return json.dumps(data, separators=(',', ':'))
+
+    @contextmanager
+    def transaction(self):
+        """Group several mutations into one atomic write transaction"""
+        conn = self._conn()
+        if self._local.depth == 0:
+            conn.execute("BEGIN IMMEDIATE")
+        self._local.depth += 1
+        try:
+            yield self
+        except Exception:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                conn.execute("ROLLBACK")
+            raise
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            conn.execute("COMMIT")
+
+    # Keyed tables
+
+    def get(self, table: str, namespace: str, key: str) -> Optional[Dict]:
+        self._check(table, KEYED_TABLES)
+        row = self._conn().execute(
+            f"SELECT data FROM {table} WHERE namespace = ? AND key = ?",
+            (namespace, key)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_all(self, table: str, namespace: str) -> Dict[str, Dict]:
+        self._check(table, KEYED_TABLES)
+        rows = self._conn().execute(
+            f"SELECT key, data FROM {table} WHERE namespace = ? ORDER BY rowid",
+            (namespace,)
+        )
+        return {key: json.loads(data) for key, data in rows}
+
+    def put(self, table: str, namespace: str, key: str, data: Dict):
+        self._check(table, KEYED_TABLES)
+        self._conn().execute(
+            f"""INSERT INTO {table} (namespace, key, data, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (namespace, key) DO UPDATE
+                SET data = excluded.data, updated_at = excluded.updated_at""",
+            (namespace, key, self._encode(data), time.time())
+        )
+
+    def put_many(self, table: str, namespace: str, items: Dict[str, Dict]):
+        with self.transaction():
+            for key, data in items.items():
+                self.put(table, namespace, key, data)
+
+    def delete(self, table: str, namespace: str, key: str):
+        self._check(table, KEYED_TABLES)
+        self._conn().execute(
+            f"DELETE FROM {table} WHERE namespace = ? AND key = ?",
+            (namespace, key)
+        )
+
+    # Log tables
+
+    def append(self, table: str, namespace: str, record: Dict,
+               ts: Any = None, kind: str = None, amount: float = None) -> int:
+        self._check(table, LOG_TABLES)
+        cur = self._conn().execute(
+            f"INSERT INTO {table} (namespace, ts, kind, amount, data) VALUES (?, ?, ?, ?, ?)",
+            (namespace, to_epoch(ts), kind, amount, self._encode(record))
+        )
+        return cur.lastrowid
+
+    def append_many(self, table: str, namespace: str,
+                    rows: Iterable[Tuple[Dict, Any, Optional[str], Optional[float]]]):
+        self._check(table, LOG_TABLES)
+        with self.transaction():
+            self._conn().executemany(
+                f"INSERT INTO {table} (namespace, ts, kind, amount, data) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (namespace, to_epoch(ts), kind, amount, self._encode(record))
+                    for record, ts, kind, amount in rows
+                ]
+            )
+
+    def _where(self, namespace, start, end, kind, after_id=None) -> Tuple[str, list]:
+        clauses = ["namespace = ?"]
+        params: List[Any] = [namespace]
+        if after_id is not None:
+            clauses.append("id > ?")
+            params.append(after_id)
+        if kind is not None:
+            clauses.append("kind = ?")
+            params.append(kind)
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(end)
+        return " AND ".join(clauses), params
+
+    def records(self, table: str, namespace: str,
+                start: float = None, end: float = None,
+                kind: str = None, limit: int = None,
+                newest_first: bool = False, after_id: int = None) -> List[Dict]:
+        self._check(table, LOG_TABLES)
+        where, params = self._where(namespace, start, end, kind, after_id)
+        order = "DESC" if newest_first else "ASC"
+        sql = f"SELECT data FROM {table} WHERE {where} ORDER BY ts {order}, id {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [json.loads(row[0]) for row in self._conn().execute(sql, params)]
+
+    def last_id(self, table: str, namespace: str) -> int:
+        self._check(table, LOG_TABLES)
+        return self._conn().execute(
+            f"SELECT COALESCE(MAX(id), 0) FROM {table} WHERE namespace = ?", (namespace,)
+        ).fetchone()[0]
+
+    def count(self, table: str, namespace: str) -> int:
+        self._check(table, LOG_TABLES)
+        return self._conn().execute(
+            f"SELECT COUNT(*) FROM {table} WHERE namespace = ?", (namespace,)
+        ).fetchone()[0]
+
+    def total(self, table: str, namespace: str, kind: str = None,
+              start: float = None, end: float = None) -> float:
+        self._check(table, LOG_TABLES)
+        where, params = self._where(namespace, start, end, kind)
+        return self._conn().execute(
+            f"SELECT COALESCE(SUM(amount), 0) FROM {table} WHERE {where}", params
+        ).fetchone()[0]
+
+    def trim(self, table: str, namespace: str, keep: int):
+        """Delete all but the newest `keep` records in a namespace"""
+        self._check(table, LOG_TABLES)
+        self._conn().execute(
+            f"""DELETE FROM {table} WHERE namespace = ? AND id NOT IN (
+                    SELECT id FROM {table} WHERE namespace = ?
+                    ORDER BY ts DESC, id DESC LIMIT ?
+                )""",
+            (namespace, namespace, keep)
+        )
+
+    def stats(self) -> Dict[str, int]:
+        conn = self._conn()
+        return {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in KEYED_TABLES + LOG_TABLES
+        }
+
+
+# Process-wide stores, one per database path
+_stores: Dict[str, SQLiteStateStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_state_store(config: Optional[Dict] = None) -> Optional[StateStore]:
+    """
+    Return the configured shared store.
+
+    Returns None for the "json" backend, in which case each subsystem
+    keeps persisting to its own JSON files.
+    """
+    settings = config.get('state', {}) if config is not None else load_config('state')
+    if settings.get('backend', 'json') != 'sqlite':
+        return None
+
+    path = Path(settings.get('path', 'soul_state.db'))
+    if not path.is_absolute():
+        path = Path(__file__).parent / path
+
+    with _stores_lock:
+        store = _stores.get(str(path))
+        if store is None:
+            store = SQLiteStateStore(path, settings.get('busy_timeout_ms', 5000))
+            _stores[str(path)] = store
+        return store
+
+
+def _read_json(path: Path):
+    return load_state(path)
+
+
+def _iter_work_journal(root: Path):
+    """Stream WorkLogger journal-mode entries (snapshot, then newer journals)"""
+    def lines(path):
+        with open(path, 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # torn or garbled line, skipped as WorkLogger does
+
+    folded = 0
+    snapshot = root / "work_log.snapshot.jsonl"
+    if snapshot.exists():
+        for record in lines(snapshot):
+            if '__snapshot__' in record:
+                folded = record['__snapshot__'].get('generation', 0)
+            else:
+                yield record
+
+    journals = sorted(
+        root.glob("work_log.journal.*.jsonl"),
+        key=lambda p: int(p.name.split('.')[2])
+    )
+    for path in journals:
+        if int(path.name.split('.')[2]) > folded:
+            yield from lines(path)
+
+
+def import_json_state(store: StateStore, root: Optional[Path] = None) -> Dict[str, int]:
+    """
+    One-shot import of every JSON state file under `root` into `store`.
+
+    Safe to re-run: keyed rows are upserts, and log namespaces that
+    already hold records are skipped instead of appended twice.
+    Returns counts of imported rows per table.
+    """
+    root = Path(root) if root else Path(__file__).parent
+    counts = {table: 0 for table in KEYED_TABLES + LOG_TABLES}
+
+    def put(table, namespace, key, data):
+        store.put(table, namespace, key, data)
+        counts[table] += 1
+
+    def append_all(table, namespace, rows):
+        if store.count(table, namespace):
+            print(f"⏭️  {table}/{namespace} already imported, skipping")
+            return
+        rows = list(rows)
+        store.append_many(table, namespace, rows)
+        counts[table] += len(rows)
+
+    with store.transaction():
+        # Souls
+        soul_file = root / "SOUL_OPENCLAW.json"
+        if soul_file.exists():
+            soul = _read_json(soul_file)
+            put("souls", "openclaw", soul['id'], soul)
+        for path in root.glob("SOUL_*.json"):
+            if path.name == "SOUL_OPENCLAW.json":
+                continue
+            soul_id = path.stem[len("SOUL_"):]
+            put("souls", "enhanced", soul_id, _read_json(path))
+
+        state_file = root / "survival_state.json"
+        if state_file.exists():
+            put("documents", "survival", "openclaw_main_agent", _read_json(state_file))
+        for path in root.glob("enhanced_state_*.json"):
+            put("documents", "enhanced_state", path.stem[len("enhanced_state_"):], _read_json(path))
+
+        # Work log (journal storage takes precedence over the legacy document)
+        log_file = root / "work_log.json"
+        header_file = root / "work_log.header.json"
+        if header_file.exists():
+            header = _read_json(header_file)
+            entries = _iter_work_journal(root)
+            append_all("work_entries", "default", (
+                (e, e['timestamp'], e['type'], e['value']) for e in entries
+            ))
+            put("documents", "work_log", "default", {"total_value": header['total_value']})
+        elif log_file.exists():
+            log = _read_json(log_file)
+            append_all("work_entries", "default", (
+                (e, e['timestamp'], e['type'], e['value']) for e in log['entries']
+            ))
+            put("documents", "work_log", "default", {"total_value": log['total_value']})
+
+        # Wallet
+        wallet_file = root / "wallet.json"
+        if wallet_file.exists():
+            wallet = _read_json(wallet_file)
+            transactions = wallet.pop('transactions', [])
+            append_all("wallet_transactions", "default", (
+                (tx, tx.get('timestamp'), tx['type'], tx['amount']) for tx in transactions
+            ))
+            put("documents", "wallet", "default", wallet)
+        ledger_file = root / "wallet_ledger.jsonl"
+        binary_ledger = ledger_file.with_suffix(".tx")
+        if ledger_file.exists() or binary_ledger.exists():
+            from wallet_ledger import WalletLedger
+            entries = WalletLedger(
+                ledger_file, journal_format="binary" if binary_ledger.exists() else "jsonl"
+            ).entries()
+            append_all("wallet_transactions", "ledger:default", (
+                (e, e['timestamp'], e['type'], e['amount_wei'] / 10 ** 18) for e in entries
+            ))
+            checkpoints_file = root / "wallet_ledger.checkpoints.json"
+            if checkpoints_file.exists():
+                put("documents", "wallet_ledger", "default", _read_json(checkpoints_file))
+
+        # Coordination networks
+        for net_dir in root.glob("network_*"):
+            network_id = net_dir.name[len("network_"):]
+            if (net_dir / "agents.json").exists():
+                for agent_id, agent in _read_json(net_dir / "agents.json").items():
+                    put("agents", network_id, agent_id, agent)
+            if (net_dir / "pools.json").exists():
+                for pool_id, pool in _read_json(net_dir / "pools.json").items():
+                    put("pools", network_id, pool_id, pool)
+            if (net_dir / "messages.json").exists():
+                append_all("messages", network_id, (
+                    (m, m['timestamp'], m['msg_type'], None)
+                    for m in _read_json(net_dir / "messages.json")
+                ))
+
+        # Reputation
+        for rep_dir in root.glob(".reputation_*"):
+            network_id = rep_dir.name[len(".reputation_"):]
+            if (rep_dir / "reputation.json").exists():
+                for agent_id, rep in _read_json(rep_dir / "reputation.json").items():
+                    put("reputations", network_id, agent_id, rep)
+            if (rep_dir / "performance.json").exists():
+                for agent_id, perf in _read_json(rep_dir / "performance.json").items():
+                    put("performance", network_id, agent_id, perf)
+
+        # Lineage
+        for lineage_dir in root.glob("lineage_*"):
+            parent_id = lineage_dir.name[len("lineage_"):]
+            if (lineage_dir / "children.json").exists():
+                for child_id, child in _read_json(lineage_dir / "children.json").items():
+                    put("children", parent_id, child_id, child)
+            if (lineage_dir / "scaling_config.json").exists():
+                put("documents", "scaling_config", parent_id,
+                    _read_json(lineage_dir / "scaling_config.json"))
+
+        # Backups
+        for path in root.glob("onchain_state_*.json"):
+            soul_id = path.stem[len("onchain_state_"):]
+            state = _read_json(path)
+            history = state.pop('backup_history', [])
+            append_all("backups", soul_id, (
+                (b, b['timestamp'], b['type'], b.get('earnings')) for b in history
+            ))
+            put("documents", "onchain", soul_id, state)
+
+        # Spending guardrails
+        spending_dir = root / ".spending"
+        if spending_dir.exists():
+            for path in spending_dir.glob("config_*.json"):
+                put("documents", "spending_config", path.stem[len("config_"):], _read_json(path))
+            for path in spending_dir.glob("history_*.json"):
+                agent_id = path.stem[len("history_"):]
+                history = _read_json(path)
+                transactions = history.pop('transactions', [])
+                if path.with_suffix(".tx").exists():
+                    from tx_store import TxStore
+                    transactions += [{
+                        "timestamp": r['timestamp'],
+                        "amount": r['amount_wei'] / 10 ** 18,
+                        "recipient": r['peer'],
+                        "purpose": r['ref'] or "",
+                        "tx_hash": r['aux'],
+                        "date": datetime.fromtimestamp(r['timestamp']).isoformat()
+                    } for r in TxStore(path.with_suffix(".tx")).records()]
+                append_all("wallet_transactions", f"spending:{agent_id}", (
+                    (tx, tx['timestamp'], "expense", tx['amount']) for tx in transactions
+                ))
+                put("documents", "spending_history", agent_id, history)
+
+        # Soul version logs
+        for path in root.glob("soul_versions_*.jsonl"):
+            with open(path, 'r') as f:
+                entries = [json.loads(line) for line in f if line.strip()]
+            append_all("soul_versions", path.stem[len("soul_versions_"):], (
+                (e, e['record'].get('timestamp'), e['record'].get('type'), e['record'].get('value'))
+                for e in entries
+            ))
+
+        # Health
+        for path in root.glob("health_state_*.json"):
+            put("documents", "health", path.stem[len("health_state_"):], _read_json(path))
+
+    return counts
+
+
+def main():
+    """CLI for the shared state store"""
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python state_store.py [import|stats] [db_path]")
+        return
+
+    cmd = sys.argv[1]
+    path = Path(sys.argv[2]) if len(sys.argv) > 2 else Path(__file__).parent / "soul_state.db"
+    store = SQLiteStateStore(path)
+
+    if cmd == "import":
+        counts = import_json_state(store)
+        print(f"Imported JSON state into {path}")
+        for table, count in counts.items():
+            if count:
+                print(f"  {table}: {count}")
+        print('\nSet "state": {"backend": "sqlite"} in config.json to use it')
+
+    elif cmd == "stats":
+        print(json.dumps(store.stats(), indent=2))
+
+    else:
+        print(f"Unknown command: {cmd}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Segmented Survival History
+
+Heartbeat results used to be appended to survival_state.json forever.
+They now go to small append-only segment files with a retention policy:
+
+    survival_history/raw/<YYYY-MM-DD>.jsonl      every heartbeat (raw_days)
+    survival_history/hourly/<YYYY-MM-DD>.jsonl   hourly rollups (hourly_days)
+    survival_history/daily/<YYYY>.jsonl          daily rollups, kept forever
+
+Old segments are rolled up into the next resolution once a day (the last
+run date is kept in survival_history/compaction.json, so short-lived
+processes don't each repeat it), so the cost of a heartbeat stays
+constant and the history stays bounded. query() reads only the segments
+overlapping the requested range.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from atomic_writer import append_line, truncate_torn_tail, write_text
+from codec import load_state, save_state
+from settings import load_config
+
+
+RESOLUTIONS = ("raw", "hourly", "daily")
+
+DEFAULT_RAW_DAYS = 7
+DEFAULT_HOURLY_DAYS = 90
+
+# Length of the ISO timestamp prefix that identifies each period
+_PERIOD_KEY = {"hourly": 13, "daily": 10}
+
+TimeLike = Union[str, datetime, None]
+
+
+def load_settings() -> Dict:
+    """Read the "survival_history" section of config.json"""
+    return load_config('survival_history')
+
+
+def _iso(value: TimeLike) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    return value.isoformat()
+
+
+def _as_rollup(point: Dict) -> Dict:
+    """View a raw heartbeat as a rollup of one"""
+    if point.get('resolution', 'raw') != 'raw':
+        return point
+    balance = point.get('balance', 0.0)
+    return {
+        "timestamp": point['timestamp'],
+        "count": 1,
+        "heartbeat": point.get('heartbeat'),
+        "tier": point.get('tier'),
+        "balance": balance,
+        "balance_min": balance,
+        "balance_max": balance,
+        "balance_avg": balance,
+        "tiers": {point.get('tier'): 1},
+        "actions": {point.get('action'): 1},
+    }
+
+
+def rollup(points: Iterable[Dict], resolution: str) -> List[Dict]:
+    """Aggregate chronologically ordered points (raw or finer rollups) per period"""
+    key_len = _PERIOD_KEY[resolution]
+    groups: Dict[str, Dict] = {}
+
+    for point in points:
+        point = _as_rollup(point)
+        key = point['timestamp'][:key_len]
+        group = groups.get(key)
+        if group is None:
+            start = key + ("T00:00:00" if resolution == "daily" else ":00:00")
+            group = groups[key] = {
+                "timestamp": start,
+                "resolution": resolution,
+                "count": 0,
+                "balance_min": point['balance_min'],
+                "balance_max": point['balance_max'],
+                "balance_sum": 0.0,
+                "tiers": {},
+                "actions": {},
+            }
+        group['count'] += point['count']
+        group['balance_sum'] += point['balance_avg'] * point['count']
+        group['balance_min'] = min(group['balance_min'], point['balance_min'])
+        group['balance_max'] = max(group['balance_max'], point['balance_max'])
+        for field in ('tiers', 'actions'):
+            for name, n in point[field].items():
+                group[field][name] = group[field].get(name, 0) + n
+        # Last values in the period
+        group['heartbeat'] = point['heartbeat']
+        group['tier'] = point['tier']
+        group['balance'] = point['balance']
+
+    result = []
+    for group in groups.values():
+        group['balance_avg'] = group.pop('balance_sum') / group['count']
+        result.append(group)
+    return result
+
+
+class SurvivalHistory:
+    """Append-only, segmented heartbeat history with time-based downsampling"""
+
+    def __init__(self, root: Optional[Path] = None,
+                 raw_days: Optional[int] = None,
+                 hourly_days: Optional[int] = None):
+        settings = load_settings()
+        self.root = Path(root) if root else Path(__file__).parent / "survival_history"
+        self.raw_days = raw_days if raw_days is not None else settings.get('raw_days', DEFAULT_RAW_DAYS)
+        self.hourly_days = hourly_days if hourly_days is not None else settings.get('hourly_days', DEFAULT_HOURLY_DAYS)
+
+        for resolution in RESOLUTIONS:
+            (self.root / resolution).mkdir(parents=True, exist_ok=True)
+
+        self.state_file = self.root / "compaction.json"
+        self._compacted_on = None
+        if self.state_file.exists():
+            try:
+                self._compacted_on = load_state(self.state_file).get('last_run')
+            except (ValueError, OSError):
+                pass
+
+    # --- writing -----------------------------------------------------------
+
+    @staticmethod
+    def _point(result: Dict) -> Dict:
+        """Heartbeat result without the bulky listing document"""
+        point = {k: v for k, v in result.items() if k != 'listing'}
+        if 'listing' in result:
+            point['listing_price'] = result['listing'].get('price')
+        return point
+
+    def record(self, result: Dict):
+        """Append one heartbeat result to today's raw segment"""
+        point = self._point(result)
+        day = point['timestamp'][:10]
+        self._append(self._segment('raw', day), [point])
+
+        if self._compacted_on != day:
+            self.compact(datetime.fromisoformat(point['timestamp']))
+
+    def record_many(self, results: Iterable[Dict]):
+        """Import a batch of results (e.g. legacy history), oldest first"""
+        for result in results:
+            point = self._point(result)
+            self._append(self._segment('raw', point['timestamp'][:10]), [point])
+        self.compact()
+
+    def compact(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Roll expired raw segments into hourly, and hourly into daily"""
+        now = now or datetime.now()
+        raw_cutoff = (now - timedelta(days=self.raw_days)).date().isoformat()
+        hourly_cutoff = (now - timedelta(days=self.hourly_days)).date().isoformat()
+        rolled = {"raw": 0, "hourly": 0}
+        self._finish_pending()
+
+        for path in self._segments('raw'):
+            if path.stem < raw_cutoff:
+                self._roll(path, self._segment('hourly', path.stem), 'hourly')
+                rolled['raw'] += 1
+
+        for path in self._segments('hourly'):
+            if path.stem < hourly_cutoff:
+                self._roll(path, self._segment('daily', path.stem[:4]), 'daily')
+                rolled['hourly'] += 1
+
+        self._compacted_on = now.date().isoformat()
+        save_state(self.state_file, {"last_run": self._compacted_on})
+        return rolled
+
+    def _roll(self, source: Path, target: Path, resolution: str):
+        """Merge `source` into the `target` segment's rollups, then delete it"""
+        before = target.read_bytes() if target.exists() else b""
+        # Record the merge first: after a crash, a changed target means it already happened
+        save_state(self.state_file, {
+            "last_run": self._compacted_on,
+            "pending": {
+                "source": str(source.relative_to(self.root)),
+                "target": str(target.relative_to(self.root)),
+                "before": hashlib.sha256(before).hexdigest(),
+            },
+        })
+        existing = list(self._read(target)) if before else []
+        # Periods present in both are combined (counts add up, last values win)
+        points = sorted(existing + rollup(self._read(source), resolution),
+                        key=lambda p: p['timestamp'])
+        self._write(target, rollup(points, resolution))
+        source.unlink()
+
+    def _finish_pending(self):
+        """Complete a merge interrupted between writing the target and deleting the source"""
+        if not self.state_file.exists():
+            return
+        pending = load_state(self.state_file).get('pending')
+        if not pending:
+            return
+        source, target = self.root / pending['source'], self.root / pending['target']
+        current = target.read_bytes() if target.exists() else b""
+        if source.exists() and hashlib.sha256(current).hexdigest() != pending['before']:
+            source.unlink()
+
+    # --- reading -----------------------------------------------------------
+
+    def query(self, start: TimeLike = None, end: TimeLike = None,
+              resolution: str = "auto", limit: Optional[int] = None) -> List[Dict]:
+        """
+        History points between start and end (inclusive), oldest first.
+
+        resolution="auto" returns each period at the finest detail still
+        retained; "hourly"/"daily" roll finer data up to that resolution.
+        limit keeps the most recent points.
+        """
+        if resolution not in ("auto",) + RESOLUTIONS:
+            raise ValueError(f"Unknown resolution: {resolution}")
+        start, end = _iso(start), _iso(end)
+
+        points = []
+        for level in ("daily", "hourly", "raw"):
+            for path in self._segments(level, start, end):
+                for point in self._read(path):
+                    ts = point['timestamp']
+                    if (start is None or ts >= start) and (end is None or ts <= end):
+                        point.setdefault('resolution', level)
+                        points.append(point)
+        points.sort(key=lambda p: p['timestamp'])
+
+        if resolution == "hourly":
+            points = [p for p in points if p['resolution'] == 'daily'] + \
+                     rollup([p for p in points if p['resolution'] != 'daily'], 'hourly')
+            points.sort(key=lambda p: p['timestamp'])
+        elif resolution == "daily":
+            points = rollup(points, 'daily')
+
+        if limit is not None:
+            points = points[-limit:]
+        return points
+
+    def latest(self) -> Optional[Dict]:
+        """Most recent heartbeat point (reads only the newest segment of each level)"""
+        newest = None
+        for level in RESOLUTIONS:
+            segments = self._segments(level)
+            if not segments:
+                continue
+            point = None
+            for point in self._read(segments[-1]):
+                pass
+            if point is not None and (newest is None or point['timestamp'] > newest['timestamp']):
+                point.setdefault('resolution', level)
+                newest = point
+        return newest
+
+    def stats(self) -> Dict[str, Any]:
+        """Segment counts and sizes per resolution"""
+        return {
+            level: {
+                "segments": len(self._segments(level)),
+                "bytes": sum(p.stat().st_size for p in self._segments(level)),
+            }
+            for level in RESOLUTIONS
+        }
+
+    # --- segments ----------------------------------------------------------
+
+    def _segment(self, level: str, name: str) -> Path:
+        return self.root / level / f"{name}.jsonl"
+
+    def _segments(self, level: str, start: Optional[str] = None,
+                  end: Optional[str] = None) -> List[Path]:
+        """Segment files for a level, skipping those outside [start, end]"""
+        key_len = 4 if level == "daily" else 10
+        paths = []
+        for path in sorted((self.root / level).glob("*.jsonl")):
+            if start is not None and path.stem < start[:key_len]:
+                continue
+            if end is not None and path.stem > end[:key_len]:
+                continue
+            paths.append(path)
+        return paths
+
+    @staticmethod
+    def _read(path: Path) -> Iterable[Dict]:
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn final line from a crash mid-append
+
+    @staticmethod
+    def _append(path: Path, points: List[Dict]):
+        # A crash mid-append leaves a partial line; cut it so this point isn't glued onto it
+        truncate_torn_tail(path)
+        append_line(path, "\n".join(json.dumps(p, separators=(',', ':')) for p in points))
+
+    @staticmethod
+    def _write(path: Path, points: List[Dict]):
+        write_text(path, "".join(json.dumps(p, separators=(',', ':')) + "\n" for p in points))
+
+
+def main():
+    """Show retained history per resolution"""
+    import sys
+
+    history = SurvivalHistory()
+    resolution = sys.argv[1] if len(sys.argv) > 1 else "auto"
+
+    print(f"Survival history ({resolution}):")
+    for point in history.query(resolution=resolution, limit=20):
+        count = f" x{point['count']}" if 'count' in point else ""
+        print(f"  {point['timestamp'][:19]}  {point['resolution']:6} "
+              f"{point['tier']:9} {point['balance']:.4f} ETH{count}")
+    print(json.dumps(history.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
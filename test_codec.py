@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test the state file codec
+Envelope round trip, legacy plain-JSON reads, shared files stay plain JSON
+"""
+
+import json
+
+import soul_survival
+from codec import FORMAT_VERSION, HEADER_KEY, load_state, load_state_meta, save_state
+from soul_survival import OpenClawSoulSurvival
+from survival_history import SurvivalHistory
+
+
+def test_envelope_round_trip(tmp_path):
+    path = tmp_path / "state.json"
+    state = {"balance": 0.0123, "capabilities": {"file_read": {"level": 2}}, "tags": ["a", "b"]}
+    save_state(path, state, meta={"version": 7})
+
+    assert load_state_meta(path) == (state, {"version": 7})
+    assert json.loads(path.read_text())[HEADER_KEY] == FORMAT_VERSION
+
+
+def test_legacy_file_reads_and_upgrades(tmp_path):
+    path = tmp_path / "legacy.json"
+    legacy = {"id": "old_soul", "balance": 0.5, "history": [1, 2, 3]}
+    path.write_text(json.dumps(legacy, indent=2))  # pre-codec format
+
+    assert load_state_meta(path) == (legacy, {})
+    save_state(path, load_state(path))
+    assert HEADER_KEY in json.loads(path.read_text())
+    assert load_state(path) == legacy
+
+
+def test_listing_and_graveyard_stay_plain_json(tmp_path, monkeypatch):
+    for name in ("SOUL_FILE", "STATE_FILE", "LISTING_FILE", "GRAVEYARD_FILE"):
+        monkeypatch.setattr(OpenClawSoulSurvival, name,
+                            tmp_path / getattr(OpenClawSoulSurvival, name).name)
+    monkeypatch.setattr(soul_survival, "SurvivalHistory",
+                        lambda: SurvivalHistory(root=tmp_path / "history"))
+    agent = OpenClawSoulSurvival(store=None)
+
+    try:
+        listing = agent.list_soul("test")
+        with open(tmp_path / "LISTING_OPENCLAW.json") as f:
+            assert json.load(f) == listing  # what other agents' plain json.load sees
+
+        entry = agent.simulate_death()
+        with open(tmp_path / "GRAVEYARD_OPENCLAW.json") as f:
+            assert json.load(f)['token_id'] == entry['token_id']
+    finally:
+        agent.flush()  # before the class attributes are restored
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Test the daemon client
+An unreachable or hung daemon reads as "not running"
+"""
+
+import socket
+
+from daemon import call, is_running
+
+
+def test_stale_socket_is_unavailable(tmp_path):
+    path = tmp_path / "stale.sock"
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(str(path))  # bound, never listening: what a crashed daemon leaves
+    assert call(["ping"], path) is None
+
+
+def test_hung_daemon_is_unavailable(tmp_path):
+    path = tmp_path / "hung.sock"
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(str(path))
+        server.listen(1)  # accepts the connection but never answers
+        assert call(["ping"], path, timeout=0.2) is None
+        assert not is_running(tmp_path / "missing.sock")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test VersionedFile compare-and-swap
+Stale writers are rejected, update() retries, lost races raise
+"""
+
+import threading
+
+import pytest
+
+from file_lock import ConcurrentModificationError, VersionedFile
+
+
+def test_stale_write_is_rejected(tmp_path):
+    path = tmp_path / "state.json"
+    first, second = VersionedFile(path), VersionedFile(path)
+
+    data, version = first.read()
+    assert second.compare_and_swap({"owner": "second"}, version)
+    assert not first.compare_and_swap({"owner": "first"}, version)
+    assert first.read() == ({"owner": "second"}, 1)
+    assert first.stats['conflicts'] == 1
+
+
+def test_concurrent_updates_are_not_lost(tmp_path):
+    path = tmp_path / "counter.json"
+
+    def increment(data):
+        data['n'] = data.get('n', 0) + 1
+
+    def worker():
+        counter = VersionedFile(path, retries=1000)
+        for _ in range(25):
+            counter.update(increment)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert VersionedFile(path).read() == ({"n": 100}, 100)
+
+
+def test_update_gives_up_after_retries(tmp_path):
+    path = tmp_path / "state.json"
+    rival = VersionedFile(path)
+
+    def always_overtaken(data):
+        # Another writer commits between our read and our swap every time
+        current, version = rival.read()
+        rival.compare_and_swap(current, version)
+
+    with pytest.raises(ConcurrentModificationError):
+        VersionedFile(path, retries=3).update(always_overtaken)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test hedged gateway retrieval
+Hedging past a slow gateway, replacing failures, ranking by history
+"""
+
+import threading
+import time
+
+from gateway_retrieval import GatewayRetriever
+
+
+def fake_fetch(behaviour, cancelled=None):
+    """fetch() over {gateway: (delay, content)}; cancelled gateways are recorded"""
+    def fetch(gateway: str, cid: str, cancel: threading.Event):
+        delay, content = behaviour[gateway]
+        if cancel.wait(delay):
+            if cancelled is not None:
+                cancelled.append(gateway)
+            return None
+        return content
+    return fetch
+
+
+def test_slow_gateway_is_hedged(tmp_path):
+    cancelled = []
+    behaviour = {"slow": (5.0, b"soul"), "fast": (0.01, b"soul")}
+    retriever = GatewayRetriever(fake_fetch(behaviour, cancelled), tmp_path / "stats.json",
+                                 race=1, hedge_delay=0.05)
+
+    start = time.monotonic()
+    assert retriever.retrieve("QmSoul", ["slow", "fast"]) == b"soul"
+    assert time.monotonic() - start < 1.0  # did not wait out the slow gateway
+
+    deadline = time.monotonic() + 2
+    while not cancelled and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cancelled == ["slow"]  # the loser was told to stop...
+    assert retriever.report()["slow"]["failures"] == 0  # ...and that is not a failure
+
+
+def test_failure_starts_replacement_and_ranks_last(tmp_path):
+    behaviour = {"broken": (0.0, None), "good": (0.01, b"soul")}
+    retriever = GatewayRetriever(fake_fetch(behaviour), tmp_path / "stats.json",
+                                 race=1, hedge_delay=10.0)
+
+    start = time.monotonic()
+    assert retriever.retrieve("QmSoul", ["broken", "good"]) == b"soul"
+    assert time.monotonic() - start < 1.0  # no hedge delay after a failure
+
+    # The failure is remembered across instances and puts the gateway last
+    reopened = GatewayRetriever(fake_fetch(behaviour), tmp_path / "stats.json", race=1)
+    assert reopened.report()["broken"]["failures"] == 1
+    assert reopened.ordered(["broken", "good"]) == ["good", "broken"]
+
+
+def test_all_gateways_failing_returns_none(tmp_path):
+    behaviour = {"a": (0.0, None), "b": (0.0, None)}
+    retriever = GatewayRetriever(fake_fetch(behaviour), tmp_path / "stats.json", race=2)
+    assert retriever.retrieve("QmSoul", ["a", "b"]) is None
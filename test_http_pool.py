@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test the pooled HTTP client
+Stale pooled connections: GET/HEAD are retried, POST is never resent
+"""
+
+import http.client
+import socket
+import threading
+import time
+
+import pytest
+
+from http_pool import HTTPClient
+
+
+class FlakyServer:
+    """
+    Raw keep-alive HTTP server. With drop_second, a connection's second
+    request is read and then the connection is closed unanswered (the
+    server timed it out just as the request arrived); with close_after,
+    every connection is closed right after its first response.
+    """
+
+    def __init__(self, drop_second: bool = False, close_after: bool = False):
+        self.drop_second = drop_second
+        self.close_after = close_after
+        self.received = []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(8)
+        self.url = f"http://127.0.0.1:{self.sock.getsockname()[1]}/pin"
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        with conn, conn.makefile('rb') as reader:
+            for number in range(1, 100):
+                request_line = reader.readline()
+                if not request_line:
+                    return
+                length = 0
+                for line in iter(reader.readline, b"\r\n"):
+                    name, _, value = line.decode().partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                reader.read(length)
+                self.received.append(request_line.split()[0].decode())
+                if self.drop_second and number == 2:
+                    return
+                conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+                if self.close_after:
+                    return
+
+    def count(self, method: str) -> int:
+        return self.received.count(method)
+
+    def close(self):
+        self.sock.close()
+
+
+@pytest.fixture
+def server_factory():
+    servers = []
+
+    def make(**kwargs):
+        servers.append(FlakyServer(**kwargs))
+        return servers[-1]
+
+    yield make
+    for server in servers:
+        server.close()
+
+
+def test_get_is_retried_on_stale_connection(server_factory):
+    server = server_factory(drop_second=True)
+    client = HTTPClient(timeout=5)
+
+    assert client.get(server.url).content == b"ok"
+    assert client.get(server.url).content == b"ok"  # dropped once, retried on a new connection
+
+    assert server.count("GET") == 3
+    assert client.metrics()['stale_retries'] == 1
+    client.close()
+
+
+def test_post_is_not_resent(server_factory):
+    server = server_factory(drop_second=True)
+    client = HTTPClient(timeout=5)
+
+    assert client.post(server.url, data=b"pin-1").ok
+    with pytest.raises((OSError, http.client.HTTPException)):
+        client.post(server.url, data=b"pin-2")
+
+    assert server.count("POST") == 2  # the server may have acted on it: sent exactly once
+    assert client.metrics()['stale_retries'] == 0
+    client.close()
+
+
+def test_post_skips_connection_closed_while_idle(server_factory):
+    server = server_factory(close_after=True)
+    client = HTTPClient(timeout=5)
+
+    assert client.post(server.url, data=b"pin-1").ok
+    time.sleep(0.05)  # let the server's FIN arrive
+    assert client.post(server.url, data=b"pin-2").ok
+
+    assert server.count("POST") == 2
+    assert client.metrics()['connections_opened'] == 2
+    client.close()
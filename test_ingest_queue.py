@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test the ingest queue
+Backpressure policies against a stalled consumer: block, drop, coalesce
+"""
+
+import threading
+import time
+
+import pytest
+
+from ingest_queue import IngestQueue, IngestQueueFull
+
+
+@pytest.fixture
+def stalled():
+    """A queue factory whose consumer stalls until `gate` is set"""
+    gate = threading.Event()
+    queues = []
+
+    def make(policy, **kwargs):
+        def apply_batch(items):
+            gate.wait(5)
+            return [f"{kind}:{n}" for kind, n in items]
+
+        queue = IngestQueue(apply_batch, maxsize=2, policy=policy, batch_size=1,
+                            name=f"test-{policy}", **kwargs)
+        queues.append(queue)
+        first = queue.submit(("a", 0))
+        deadline = time.time() + 5
+        while queue.depth() and time.time() < deadline:
+            time.sleep(0.005)  # worker has taken item 0 and is stuck on it
+        return queue, [first, queue.submit(("a", 1)), queue.submit(("b", 2))]
+
+    yield make, gate
+    gate.set()
+    for queue in queues:
+        queue.close()
+
+
+def test_drop_rejects_when_full(stalled):
+    make, gate = stalled
+    queue, tickets = make("drop")
+
+    rejected = queue.submit(("a", 3))
+    assert isinstance(rejected.exception(0), IngestQueueFull)
+
+    gate.set()
+    assert [t.wait(5) for t in tickets] == ["a:0", "a:1", "b:2"]
+    assert queue.stats()['dropped'] == 1
+
+
+def test_coalesce_rides_along_without_a_slot(stalled):
+    make, gate = stalled
+    queue, tickets = make("coalesce")
+
+    tickets.append(queue.submit(("a", 3)))
+    assert queue.depth() == 2  # no extra slot taken
+
+    gate.set()
+    assert [t.wait(5) for t in tickets] == ["a:0", "a:1", "b:2", "a:3"]
+    stats = queue.stats()
+    assert (stats['coalesced'], stats['applied'], stats['dropped']) == (1, 4, 0)
+
+
+def test_block_waits_for_room(stalled):
+    make, gate = stalled
+    queue, tickets = make("block")
+
+    submitted = []
+    producer = threading.Thread(target=lambda: submitted.append(queue.submit(("a", 3))))
+    producer.start()
+    producer.join(0.1)
+    assert producer.is_alive() and queue.stats()['blocked'] == 1
+
+    gate.set()
+    producer.join(5)
+    assert [t.wait(5) for t in tickets + submitted] == ["a:0", "a:1", "b:2", "a:3"]
+
+
+def test_block_timeout_rejects(stalled):
+    make, gate = stalled
+    queue, tickets = make("block", block_timeout=0.05)
+
+    assert isinstance(queue.submit(("a", 3)).exception(0), IngestQueueFull)
+    gate.set()
+    assert [t.wait(5) for t in tickets] == ["a:0", "a:1", "b:2"]
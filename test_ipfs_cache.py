@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Test the IPFS object cache
+LRU eviction, pins (also across cache instances), legacy pin migration
+"""
+
+from codec import save_state
+from ipfs_cache import ObjectCache
+
+
+def test_lru_eviction_keeps_pinned_and_recent(tmp_path):
+    cache = ObjectCache(tmp_path, max_bytes=4000)
+    cache.put("QmBackup", b"b" * 1000, pin=True)
+    for i in range(3):
+        cache.put(f"QmObject{i}", b"o" * 1000)
+    cache.get("QmObject0")  # now most recently used
+
+    cache.put("QmObject3", b"o" * 1000)
+    cache.put("QmObject4", b"o" * 1000)
+
+    assert "QmBackup" in cache.objects
+    assert "QmObject0" in cache.objects
+    assert "QmObject1" not in cache.objects and not cache.path("QmObject1").exists()
+    assert cache.total_bytes <= 4000
+
+
+def test_pin_from_another_instance_survives_eviction(tmp_path):
+    # Two processes sharing .ipfs_cache: each has its own in-memory index
+    first = ObjectCache(tmp_path, max_bytes=10_000)
+    first.put("QmOther", b"o" * 1000, pin=True)
+    second = ObjectCache(tmp_path, max_bytes=10_000)
+    second.put("QmLive", b"l" * 3000, pin=True)
+
+    first.unpin("QmOther")
+    first.flush()
+    first.rebuild()  # as self_healing does before evicting
+    evicted = first.evict(0)
+
+    assert evicted == ["QmOther"]
+    assert second.get("QmLive") == b"l" * 3000
+    assert first.pins == {"QmLive"}
+
+
+def test_pins_in_legacy_index_become_markers(tmp_path):
+    save_state(tmp_path / "index.json", {"objects": {}, "pins": ["QmOld"]})
+    cache = ObjectCache(tmp_path)
+    assert cache.is_pinned("QmOld")
+    assert (tmp_path / "pins" / "QmOld").exists()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test the sqlite StateStore
+Ledger tail scans after checkpoints, re-running the JSON import
+"""
+
+from datetime import datetime, timedelta
+
+from codec import save_state
+from state_store import SQLiteStateStore, import_json_state
+from wallet_ledger import WalletLedger
+
+
+def test_store_tail_after_checkpoint(tmp_path):
+    store = SQLiteStateStore(tmp_path / "state.db")
+    ledger = WalletLedger(tmp_path / "ledger.jsonl", store=store, checkpoint_every=3)
+    ledger.append([{"type": "income", "amount_wei": 7}] * 8)
+
+    reopened = WalletLedger(tmp_path / "ledger.jsonl", store=store, checkpoint_every=3)
+    assert (reopened.seq, reopened.balance_wei) == (8, 56)
+    assert [e['seq'] for e in reopened.entries(after_seq=6)] == [7, 8]
+    assert reopened.audit()['ok']
+
+
+def test_store_tail_survives_clock_stepping_back(tmp_path):
+    store = SQLiteStateStore(tmp_path / "state.db")
+    ledger = WalletLedger(tmp_path / "ledger.jsonl", store=store, checkpoint_every=3)
+    now = datetime.now()
+    ledger.append([{"type": "income", "amount_wei": 7, "timestamp": now.isoformat()}] * 3)
+    # NTP correction: later entries carry a wall-clock time a day earlier
+    earlier = (now - timedelta(days=1)).isoformat()
+    ledger.append([{"type": "income", "amount_wei": 7, "timestamp": earlier}] * 2)
+
+    reopened = WalletLedger(tmp_path / "ledger.jsonl", store=store, checkpoint_every=3)
+    assert (reopened.seq, reopened.balance_wei) == (5, 35)
+    assert [e['seq'] for e in reopened.entries(after_seq=3)] == [4, 5]
+
+
+def test_import_is_idempotent(tmp_path):
+    ledger = WalletLedger(tmp_path / "wallet_ledger.jsonl")
+    ledger.append([{"type": "income", "amount_wei": 5}] * 4)
+    save_state(tmp_path / "wallet.json", {"balance": 0.0, "transactions": []})
+    store = SQLiteStateStore(tmp_path / "state.db")
+
+    assert import_json_state(store, tmp_path)['wallet_transactions'] == 4
+    assert import_json_state(store, tmp_path)['wallet_transactions'] == 0
+    assert store.count('wallet_transactions', 'ledger:default') == 4
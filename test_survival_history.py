@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test segmented survival history
+Rollups, range queries, and appends after a torn segment
+"""
+
+from survival_history import SurvivalHistory
+
+
+def _heartbeat(timestamp, balance, tier="stable"):
+    return {"timestamp": timestamp, "heartbeat": 1, "tier": tier,
+            "balance": balance, "action": "work"}
+
+
+def test_old_raw_points_roll_up_to_hourly(tmp_path):
+    history = SurvivalHistory(tmp_path, raw_days=1, hourly_days=3650)
+    history.record_many([
+        _heartbeat("2026-03-01T10:05:00", 1.0),
+        _heartbeat("2026-03-01T10:35:00", 3.0, tier="thriving"),
+        _heartbeat("2026-03-01T11:00:00", 2.0),
+    ])
+
+    hourly = history.query(start="2026-03-01", end="2026-03-02")
+    assert [(p['timestamp'], p['count']) for p in hourly] == \
+        [("2026-03-01T10:00:00", 2), ("2026-03-01T11:00:00", 1)]
+    ten = hourly[0]
+    assert (ten['balance_min'], ten['balance_max'], ten['balance_avg']) == (1.0, 3.0, 2.0)
+    assert ten['tier'] == "thriving" and ten['tiers'] == {"stable": 1, "thriving": 1}
+
+    history.hourly_days = 1
+    history.compact()
+    daily = history.query()
+    assert [(p['timestamp'], p['count']) for p in daily] == [("2026-03-01T00:00:00", 3)]
+    assert not list((tmp_path / "raw").glob("*.jsonl"))
+
+
+def test_rolling_the_same_day_twice_adds_up(tmp_path):
+    history = SurvivalHistory(tmp_path, raw_days=1, hourly_days=1)
+    history.record_many([_heartbeat("2026-01-01T10:05:00", 1.0)])
+    history.record_many([_heartbeat("2026-01-01T12:05:00", 3.0)])
+
+    [day] = history.query()
+    assert (day['resolution'], day['count'], day['balance']) == ("daily", 2, 3.0)
+
+
+def test_query_range_and_latest(tmp_path):
+    history = SurvivalHistory(tmp_path, raw_days=3650, hourly_days=3650)
+    history.record_many([_heartbeat(f"2026-05-0{d}T12:00:00", float(d)) for d in range(1, 6)])
+
+    points = history.query(start="2026-05-02", end="2026-05-04T23:59:59")
+    assert [p['balance'] for p in points] == [2.0, 3.0, 4.0]
+    assert history.query(limit=2)[-1]['balance'] == 5.0
+    assert history.latest()['balance'] == 5.0
+
+
+def test_append_after_torn_segment(tmp_path):
+    history = SurvivalHistory(tmp_path, raw_days=3650, hourly_days=3650)
+    history.record(_heartbeat("2026-05-01T12:00:00", 1.0))
+    with open(tmp_path / "raw" / "2026-05-01.jsonl", 'a') as f:
+        f.write('{"timestamp": "2026-05-01T12:01')  # crash mid-append
+
+    history.record(_heartbeat("2026-05-01T12:02:00", 2.0))
+    assert [p['balance'] for p in history.query()] == [1.0, 2.0]
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test the fixed-width transaction store
+Exact wei totals (large and negative amounts), with and without NumPy
+"""
+
+import pytest
+
+import tx_store
+from tx_store import TxStore
+
+DAY = 86400.0
+# (timestamp, amount_wei, kind): sums pass int64 wei (~9.2 ETH), amounts
+# are not gwei multiples, expenses are negative, one entry is out of order
+ROWS = [
+    (0 * DAY + 10, 3 * 10 ** 18 + 1, "income"),
+    (0 * DAY + 20, -1, "expense"),
+    (1 * DAY + 5, 4 * 10 ** 18 + 999_999_999, "income"),
+    (0 * DAY + 30, -(2 * 10 ** 18 + 123_456_789), "expense"),
+    (2 * DAY + 1, 5 * 10 ** 18 + 7, "income"),
+]
+
+
+@pytest.fixture(params=[True, False], ids=["numpy", "pure"])
+def store(request, tmp_path, monkeypatch):
+    if request.param:
+        pytest.importorskip("numpy")
+    monkeypatch.setattr(tx_store, "NUMPY_AVAILABLE", request.param)
+    store = TxStore(tmp_path / "ledger.tx")
+    store.extend(ROWS)
+    yield store
+    store.close()
+
+
+def test_total_wei_is_exact(store):
+    assert store.total_wei() == sum(amount for _, amount, _ in ROWS)
+    assert store.total_wei(kind="income") == 12 * 10 ** 18 + 1_000_000_007
+    assert store.total_wei(kind="expense") == -(2 * 10 ** 18 + 123_456_790)
+    assert store.total_wei(start=DAY, end=2 * DAY) == 4 * 10 ** 18 + 999_999_999
+    assert store.total_wei(kind="refund") == 0
+
+
+def test_daily_totals_are_exact(store):
+    assert store.totals(bucket=DAY) == {
+        0.0: 3 * 10 ** 18 + 1 - 1 - (2 * 10 ** 18 + 123_456_789),
+        DAY: 4 * 10 ** 18 + 999_999_999,
+        2 * DAY: 5 * 10 ** 18 + 7,
+    }
+    assert store.totals(bucket=DAY, start=DAY, kind="income") == {
+        DAY: 4 * 10 ** 18 + 999_999_999,
+        2 * DAY: 5 * 10 ** 18 + 7,
+    }
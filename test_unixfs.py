@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test UnixFS content addressing
+CIDs match `ipfs add`, multi-level DAGs round trip, tampered blocks are refused,
+content-defined chunks dedupe across edits
+"""
+
+import random
+
+import pytest
+
+from unixfs import (BlockStore, BlockVerificationError, add_bytes, cdc_chunks, content_defined,
+                    fixed_chunks, read_dag)
+
+
+@pytest.mark.parametrize("data, v0, v1", [
+    (b"hello world",
+     "Qmf412jQZiuVUtdgnB36FXFX7xg5V6KEbSJ4dpQuhkLyfD",
+     "bafkreifzjut3te2nhyekklss27nh3k72ysco7y32koao5eei66wof36n5e"),
+    (b"hello world\n",
+     "QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o",
+     "bafkreifjjcie6lypi6ny7amxnfftagclbuxndqonfipmb64f2km2devei4"),
+    (b"",
+     "QmbFMke1KXqnYyBBWxB74N4c5SBnJMVAiMNRcGu6x1AwQH",
+     "bafkreihdwdcefgh4dqkjv67uzcmw7ojee6xedzdetojuzjevtenxquvyku"),
+])
+def test_cids_match_ipfs_add(data, v0, v1):
+    assert str(add_bytes(data).cid) == v0
+    assert str(add_bytes(data, cid_version=1).cid) == v1
+
+
+@pytest.mark.parametrize("cid_version", [0, 1])
+def test_multi_level_dag_round_trip(tmp_path, cid_version):
+    data = random.Random(21).randbytes(200 * 1024)
+    store = BlockStore(tmp_path / "blocks")
+    # 200 leaves is more than one node's 174 links: two levels of parents
+    result = add_bytes(data, cid_version, store, lambda source: fixed_chunks(source, 1024))
+
+    assert (result.size, len(result.leaves)) == (len(data), 200)
+    assert result.blocks == 200 + 2 + 1
+    assert store.cat(result.cid) == data
+
+
+def test_tampered_block_is_refused(tmp_path):
+    store = BlockStore(tmp_path / "blocks")
+    result = add_bytes(b"x" * 5000, 1, store, lambda source: fixed_chunks(source, 1024))
+    leaf = store.path(result.leaves[-1])
+    leaf.write_bytes(b"y" * len(leaf.read_bytes()))
+
+    with pytest.raises(BlockVerificationError):
+        b"".join(read_dag(result.cid, store.get))
+
+
+def test_cdc_chunks_bounded_and_lossless():
+    data = random.Random(22).randbytes(64 * 1024)
+    chunks = list(cdc_chunks(data, 256, 1024, 8192))
+    assert b"".join(chunks) == data
+    assert all(256 <= len(c) <= 8192 for c in chunks[:-1])
+
+
+def test_edit_adds_only_nearby_chunks(tmp_path):
+    store = BlockStore(tmp_path / "blocks")
+    chunker = content_defined(256, 1024, 8192)
+    data = random.Random(22).randbytes(40 * 1024)
+    first = add_bytes(data, 1, store, chunker)
+    assert first.new_blocks == first.blocks
+
+    # Insert a few bytes mid-file: fixed chunks would all shift after it
+    edited = data[:20000] + b"edit" + data[20000:]
+    second = add_bytes(edited, 1, store, chunker)
+
+    assert store.cat(second.cid) == edited
+    shared = set(first.leaves) & set(second.leaves)
+    assert len(shared) >= len(first.leaves) - 2
+    assert second.new_blocks <= 3  # one or two changed chunks plus the root
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test the wallet ledger
+Torn journal recovery and document <-> ledger migration
+"""
+
+import pytest
+
+from codec import load_state
+from wallet_ledger import WalletLedger, to_wei
+from wallet_manager import AgentWallet
+
+
+@pytest.fixture
+def wallet_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(AgentWallet, "WALLET_FILE", tmp_path / "wallet.json")
+    monkeypatch.setattr(AgentWallet, "LEDGER_FILE", tmp_path / "wallet_ledger.jsonl")
+    monkeypatch.setattr(AgentWallet, "BACKUP_FILE", tmp_path / "wallet.pre-ledger.json")
+    return tmp_path
+
+
+def test_torn_ledger_tail_is_truncated(tmp_path):
+    journal = tmp_path / "ledger.jsonl"
+    ledger = WalletLedger(journal)
+    ledger.append([{"type": "income", "amount_wei": 10}] * 3)
+    with open(journal, 'ab') as f:
+        f.write(b'{"seq": 4, "type": "inc')
+
+    reopened = WalletLedger(journal)
+    assert (reopened.seq, reopened.balance_wei) == (3, 30)
+    reopened.append([{"type": "expense", "amount_wei": -5}])
+    assert WalletLedger(journal).audit()['ok']
+
+
+def test_migration_round_trip(wallet_files):
+    wallet = AgentWallet(mode="document")
+    wallet.add_funds(1.5)
+    wallet.spend(0.2, "compute")
+
+    wallet = AgentWallet(mode="ledger")
+    assert wallet.get_balance_wei() == to_wei(1.3)
+    assert len(load_state(wallet_files / "wallet.pre-ledger.json")['transactions']) == 2
+    assert 'transactions' not in load_state(wallet_files / "wallet.json")
+    wallet.add_funds(0.3)
+
+    wallet = AgentWallet(mode="document")  # switching back restores the list
+    assert len(wallet.wallet['transactions']) == 3
+    assert wallet.audit()['ok']
+    wallet.spend(0.1, "storage")
+
+    wallet = AgentWallet(mode="ledger")  # only the new spend is appended
+    assert len(wallet.ledger) == 4
+    assert wallet.get_balance_wei() == to_wei(1.5)
+    assert wallet.audit()['ok']
+
+
+def test_migration_refuses_mismatched_ledger(wallet_files):
+    wallet = AgentWallet(mode="document")
+    wallet.add_funds(1.0)
+    WalletLedger(wallet_files / "wallet_ledger.jsonl").append([{"type": "income", "amount_wei": 1}])
+
+    with pytest.raises(RuntimeError):
+        AgentWallet(mode="ledger")
+    assert len(load_state(wallet_files / "wallet.json")['transactions']) == 1
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Test work log analytics
+Bucketed earnings over entries that are not in time order, with and without NumPy
+"""
+
+from array import array
+
+import pytest
+
+import work_analytics
+from work_analytics import earnings_rate, earnings_series
+
+# Merged from several writers: the earliest entry is not first
+TIMESTAMPS = [7200.0 + 60, 0.0 + 30, 3600.0 + 10, 7200.0 + 5]
+VALUES = [1.0, 2.0, 4.0, 8.0]
+
+
+def _arrays(numpy: bool):
+    if numpy:
+        np = pytest.importorskip("numpy")
+        return {"timestamp": np.array(TIMESTAMPS), "value": np.array(VALUES)}
+    return {"timestamp": array('d', TIMESTAMPS), "value": array('d', VALUES)}
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_unsorted_timestamps(numpy, monkeypatch):
+    monkeypatch.setattr(work_analytics, "NUMPY_AVAILABLE", numpy)
+    arrays = _arrays(numpy)
+
+    starts, totals = earnings_series(arrays, bucket=3600.0)
+    assert list(starts) == [0.0, 3600.0, 7200.0]
+    assert list(totals) == [2.0, 4.0, 9.0]
+    assert earnings_rate(arrays) == pytest.approx(15.0 / (7260.0 - 30.0) * 3600.0)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test WorkLogger journal storage
+Torn/garbled journal lines, header persistence, compaction, range queries
+"""
+
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+import work_logger
+from work_logger import WorkLogger
+
+
+class _Survival:
+    """Stands in for the survival system so tests don't touch survival_state.json"""
+
+    def record_work_batch(self, items):
+        pass
+
+
+@pytest.fixture
+def journal_logger(tmp_path, monkeypatch):
+    for name in ("LOG_FILE", "ROLLUP_FILE", "HEADER_FILE", "SNAPSHOT_FILE"):
+        original = getattr(WorkLogger, name)
+        monkeypatch.setattr(WorkLogger, name, tmp_path / original.name)
+    monkeypatch.setattr(WorkLogger, "CONFIG_FILE", tmp_path / "config.json")
+    monkeypatch.setattr(work_logger, "get_survival", lambda store: _Survival())
+
+    loggers = []
+
+    def open_logger():
+        logger = WorkLogger(storage="journal")
+        loggers.append(logger)
+        return logger
+
+    yield open_logger
+    for logger in loggers:
+        logger.close()
+
+
+def test_journal_recovers_from_torn_and_garbled_lines(journal_logger, tmp_path):
+    logger = journal_logger()
+    logger.log_work_many([("file_read", f"read {i}") for i in range(3)])
+    logger.close()
+
+    journal = tmp_path / "work_log.journal.1.jsonl"
+    lines = journal.read_text().splitlines()
+    lines.insert(1, '{"garbled')
+    journal.write_text("\n".join(lines) + '\n{"timestamp": "2026-01-01T00:00:00", "torn')
+
+    logger = journal_logger()
+    assert len(logger.log['entries']) == 3  # the garbled line no longer hides later entries
+    assert journal.read_bytes().endswith(b"\n")  # torn tail cut off
+
+    logger.log_work("file_write", "after recovery")
+    logger.close()
+
+    reopened = journal_logger()
+    assert [e['description'] for e in reopened.log['entries']] == \
+        ["read 0", "read 1", "read 2", "after recovery"]
+
+
+def test_append_does_not_rewrite_header(journal_logger, tmp_path):
+    logger = journal_logger()
+    header = tmp_path / "work_log.header.json"
+    before = header.stat().st_mtime_ns
+
+    for i in range(5):
+        logger.log_work("file_read", f"read {i}")
+    assert header.stat().st_mtime_ns == before
+
+    logger.close()
+    reopened = journal_logger()
+    assert reopened.header['entries'] == 5
+    assert reopened.log['total_value'] == pytest.approx(logger.log['total_value'])
+
+
+KILLED_COMPACTION = """
+import os, sys
+from pathlib import Path
+import work_logger
+from work_logger import WorkLogger
+
+root = Path(sys.argv[1])
+for name in ("LOG_FILE", "ROLLUP_FILE", "HEADER_FILE", "SNAPSHOT_FILE"):
+    setattr(WorkLogger, name, root / getattr(WorkLogger, name).name)
+WorkLogger.CONFIG_FILE = root / "config.json"
+work_logger.get_survival = lambda store: type("S", (), {"record_work_batch": lambda self, items: None})()
+
+logger = WorkLogger(storage="journal")
+logger.log_work_many([("file_read", "before kill 0"), ("file_read", "before kill 1")])
+# Die after the generation switch is saved, before the fold
+WorkLogger._write_snapshot = lambda *args, **kwargs: os._exit(0)
+logger.compact()
+"""
+
+
+def test_compaction_killed_before_fold_loses_nothing(journal_logger, tmp_path):
+    subprocess.run([sys.executable, "-c", KILLED_COMPACTION, str(tmp_path)],
+                   cwd=Path(__file__).parent, check=True)
+    assert (tmp_path / "work_log.journal.1.jsonl").exists()
+
+    logger = journal_logger()
+    logger.log_work_many([("file_read", "after kill 0"), ("file_read", "after kill 1")])
+    assert logger.compact()  # folds the abandoned generation too
+    logger.close()
+
+    reopened = journal_logger()
+    assert [e['description'] for e in reopened.log['entries']] == \
+        ["before kill 0", "before kill 1", "after kill 0", "after kill 1"]
+    assert not list(tmp_path.glob("work_log.journal.*.jsonl"))
+
+
+def _log_at(logger, monkeypatch, when: str, items):
+    """log_work_many() with the clock set to `when`"""
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return cls.fromisoformat(when)
+    monkeypatch.setattr(work_logger, "datetime", Clock)
+    logger.log_work_many(items)
+    monkeypatch.setattr(work_logger, "datetime", datetime)
+
+
+def test_query_and_summary_by_range(journal_logger, monkeypatch):
+    logger = journal_logger()
+    _log_at(logger, monkeypatch, "2026-03-01T09:15:00", [("file_read", "a"), ("bug_fix", "b")])
+    _log_at(logger, monkeypatch, "2026-03-01T17:40:00", [("file_write", "c")])
+    _log_at(logger, monkeypatch, "2026-03-03T08:00:00", [("bug_fix", "d")])
+
+    def described(**kwargs):
+        return [e['description'] for e in logger.query(**kwargs)]
+
+    assert described(start="2026-03-01T10:00:00", end="2026-03-03") == ["c"]
+    assert described(types=["bug_fix"]) == ["b", "d"]
+    assert described(capability="file_management", newest_first=True) == ["c", "a"]
+    assert described(start="2026-03-01", limit=2) == ["a", "b"]
+
+    summary = logger.get_summary("2026-03-01", "2026-03-03")
+    assert [p['period'] for p in summary['periods']] == ["2026-03-01", "2026-03-03"]
+    assert summary['entries'] == 4
+    assert summary['total_earned'] == pytest.approx(0.0001 + 0.002 + 0.0002 + 0.002)
+    assert summary['by_type']['bug_fix'] == {"count": 2, "value": pytest.approx(0.004)}
+
+    hourly = logger.get_summary("2026-03-01T09:00", "2026-03-01T12:00", granularity="hour")
+    assert [(p['period'], p['entries']) for p in hourly['periods']] == [("2026-03-01T09", 2)]
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test write-behind persistence
+Coalescing, retry after a failed write, flush at exit
+"""
+
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from write_behind import WriteBehindWriter
+
+
+def _wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_saves_are_coalesced():
+    written = []
+    writer = WriteBehindWriter(lambda doc: written.append(dict(doc)) or 10,
+                               interval=0.05, name="test")
+    doc = {"n": 0}
+    for i in range(50):
+        doc["n"] = i
+        writer.mark_dirty(doc)
+
+    assert _wait_for(lambda: not writer.dirty)
+    writer.close()
+    assert written == [{"n": 49}]
+    stats = writer.stats()
+    assert (stats['writes_requested'], stats['writes_issued'], stats['writes_saved']) == (50, 1, 49)
+
+
+def test_failed_write_is_retried():
+    attempts = []
+
+    def flaky_write(doc):
+        attempts.append(dict(doc))
+        if len(attempts) == 1:
+            raise RuntimeError("dictionary changed size during iteration")
+        return 10
+
+    writer = WriteBehindWriter(flaky_write, interval=0.05, name="test")
+    writer.mark_dirty({"n": 1})
+
+    # No further mark_dirty: the flusher must come back on its own
+    assert _wait_for(lambda: len(attempts) == 2 and not writer.dirty)
+    writer.close()
+    assert writer.stats()['writes_issued'] == 1
+
+
+FLUSH_AT_EXIT = """
+import json, sys
+from write_behind import WriteBehindWriter
+
+path = sys.argv[1]
+def write(doc):
+    with open(path, 'w') as f:
+        json.dump(doc, f)
+
+writer = WriteBehindWriter(write, interval=3600, name="exit")
+writer.mark_dirty({"saved": True})
+"""
+
+
+def test_dirty_document_is_flushed_at_exit(tmp_path):
+    target = tmp_path / "doc.json"
+    subprocess.run([sys.executable, "-c", FLUSH_AT_EXIT, str(target)],
+                   cwd=Path(__file__).parent, check=True)
+    assert json.loads(target.read_text()) == {"saved": True}
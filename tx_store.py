@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Fixed-Width Transaction Store
+
+Transactions as 36-byte binary records in a memory-mapped file instead
+of a JSON list that has to be parsed before any question can be
+answered:
+
+    <name>.tx         64-byte header + records, file grown by doubling
+    <name>.strings    interned strings (types, purposes, recipients),
+                      one JSON string per line; id = line number
+
+    record = timestamp  float64   epoch seconds
+             gwei       int64     amount // 10**9  (signed)
+             wei        uint32    amount %  10**9  (always >= 0)
+             kind       uint16    interned type id
+             flags      uint16    caller-defined
+             ref        uint32    interned purpose/source id (0 = none)
+             peer       uint32    interned recipient id (0 = none)
+             aux        uint32    interned extra (e.g. tx hash, 0 = none)
+
+Amounts are exact integer wei split across two columns, so int64 sums
+cannot overflow the way a single int64 wei column would (~9.2 ETH).
+Opening a store reads only the header and the string table; append() is
+a pack_into plus a header count update, which is written after the
+record so a crash never exposes a half-written one.
+
+With NumPy, array() is a zero-copy structured array over the mapping
+and total_wei()/totals() are vectorized; without it the same answers
+come from struct.iter_unpack.
+"""
+
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from atomic_writer import append_line
+from lazy import is_available, lazy_module
+
+
+NUMPY_AVAILABLE = is_available("numpy")
+np = lazy_module("numpy")
+
+MAGIC = b"SMTX"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQ")
+HEADER_SIZE = 64
+RECORD = struct.Struct("<dqIHHIII")
+RECORD_SIZE = RECORD.size
+INITIAL_CAPACITY = 1024
+GWEI = 10 ** 9
+
+FIELDS = ("timestamp", "gwei", "wei", "kind", "flags", "ref", "peer", "aux")
+DTYPE_SPEC = [
+    ("timestamp", "<f8"), ("gwei", "<i8"), ("wei", "<u4"), ("kind", "<u2"),
+    ("flags", "<u2"), ("ref", "<u4"), ("peer", "<u4"), ("aux", "<u4"),
+]
+
+PathLike = Union[str, Path]
+
+
+class TxStore:
+    """Append-only fixed-record transaction file accessed through mmap"""
+
+    def __init__(self, path: PathLike):
+        self.path = Path(path)
+        self.strings_file = self.path.with_suffix(".strings")
+        self._strings = [""]  # id 0 means "none"
+        self._ids = {}
+        if self.strings_file.exists():
+            with open(self.strings_file, 'r') as f:
+                for line in f:
+                    try:
+                        self._add_string(json.loads(line))
+                    except json.JSONDecodeError:
+                        break  # torn final line from a crash mid-append
+
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = os.fstat(self._fd).st_size
+        if size == 0:
+            size = HEADER_SIZE + INITIAL_CAPACITY * RECORD_SIZE
+            os.ftruncate(self._fd, size)
+        self._mm = mmap.mmap(self._fd, size)
+
+        magic, version, record_size, count = HEADER.unpack_from(self._mm, 0)
+        if magic == b"\0" * 4:
+            count = 0
+            self._write_header(count)
+        elif magic != MAGIC or record_size != RECORD_SIZE:
+            raise ValueError(f"{self.path}: not a v{VERSION} transaction store")
+        self.count = count
+
+    # --- strings -----------------------------------------------------------
+
+    def _add_string(self, value: str) -> int:
+        self._ids[value] = len(self._strings)
+        self._strings.append(value)
+        return self._ids[value]
+
+    def intern(self, value: Optional[str]) -> int:
+        """Id for `value`, adding it to the string table if new"""
+        if not value:
+            return 0
+        string_id = self._ids.get(value)
+        if string_id is None:
+            append_line(self.strings_file, json.dumps(value))
+            string_id = self._add_string(value)
+        return string_id
+
+    def string(self, string_id: int) -> Optional[str]:
+        return self._strings[string_id] or None
+
+    def lookup(self, value: str) -> Optional[int]:
+        """Id of an already interned string (None if never seen)"""
+        return self._ids.get(value)
+
+    # --- writing -----------------------------------------------------------
+
+    def _write_header(self, count: int):
+        HEADER.pack_into(self._mm, 0, MAGIC, VERSION, RECORD_SIZE, count)
+
+    def _reserve(self, count: int):
+        """Grow the file (doubling) so `count` records fit"""
+        capacity = (len(self._mm) - HEADER_SIZE) // RECORD_SIZE
+        if count <= capacity:
+            return
+        capacity = max(count, capacity * 2)
+        size = HEADER_SIZE + capacity * RECORD_SIZE
+        os.ftruncate(self._fd, size)
+        old, self._mm = self._mm, mmap.mmap(self._fd, size)
+        try:
+            old.close()
+        except BufferError:
+            pass  # arrays still view the old mapping; it closes when they go
+
+    def append(self, timestamp: float, amount_wei: int, kind: str,
+               ref: Optional[str] = None, peer: Optional[str] = None,
+               aux: Optional[str] = None, flags: int = 0) -> int:
+        """Append one transaction; returns its index"""
+        return self.extend([(timestamp, amount_wei, kind, ref, peer, aux, flags)])
+
+    def extend(self, rows: Iterable[tuple]) -> int:
+        """
+        Append (timestamp, amount_wei, kind, ref, peer, aux, flags) rows
+        (trailing fields optional). Returns the index of the last one.
+        """
+        packed = []
+        for row in rows:
+            timestamp, amount_wei, kind, *rest = row
+            ref, peer, aux, flags = (list(rest) + [None, None, None, 0])[:4]
+            kind_id = self.intern(kind)
+            if kind_id > 0xFFFF:
+                raise ValueError(f"{self.path}: too many distinct transaction types")
+            gwei, wei = divmod(amount_wei, GWEI)
+            packed.append((timestamp, gwei, wei, kind_id, flags or 0,
+                           self.intern(ref), self.intern(peer), self.intern(aux)))
+        if not packed:
+            return self.count - 1
+
+        self._reserve(self.count + len(packed))
+        offset = HEADER_SIZE + self.count * RECORD_SIZE
+        for values in packed:
+            RECORD.pack_into(self._mm, offset, *values)
+            offset += RECORD_SIZE
+        self.count += len(packed)
+        self._write_header(self.count)
+        return self.count - 1
+
+    def flush(self):
+        """msync the mapping (records survive a process crash without it)"""
+        self._mm.flush()
+
+    def close(self):
+        self.flush()
+        try:
+            self._mm.close()
+        except BufferError:
+            pass
+        os.close(self._fd)
+
+    # --- reading -----------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self.count
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> Iterator[tuple]:
+        """Raw record tuples (see FIELDS) in file order"""
+        stop = self.count if stop is None else min(stop, self.count)
+        if start >= stop:
+            return iter(())
+        # Slicing an mmap copies, so no buffer export pins the mapping
+        return RECORD.iter_unpack(self._mm[HEADER_SIZE + start * RECORD_SIZE:HEADER_SIZE + stop * RECORD_SIZE])
+
+    def decode(self, row: tuple) -> Dict:
+        timestamp, gwei, wei, kind, flags, ref, peer, aux = row
+        return {
+            "timestamp": timestamp,
+            "amount_wei": gwei * GWEI + wei,
+            "type": self._strings[kind],
+            "flags": flags,
+            "ref": self.string(ref),
+            "peer": self.string(peer),
+            "aux": self.string(aux),
+        }
+
+    def records(self, start: int = 0, stop: Optional[int] = None) -> List[Dict]:
+        """Decoded records by index range"""
+        return [self.decode(row) for row in self.rows(start, stop)]
+
+    def tail(self, n: int) -> List[Dict]:
+        return self.records(max(0, self.count - n))
+
+    def array(self):
+        """Zero-copy NumPy structured array over the records"""
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("TxStore.array() requires NumPy (pip install numpy)")
+        return np.frombuffer(self._mm, dtype=np.dtype(DTYPE_SPEC),
+                             count=self.count, offset=HEADER_SIZE)
+
+    def _kind_id(self, kind: Optional[str]) -> Optional[int]:
+        return None if kind is None else self._ids.get(kind, -1)
+
+    def total_wei(self, start: Optional[float] = None, end: Optional[float] = None,
+                  kind: Optional[str] = None) -> int:
+        """Exact sum of amounts with start <= timestamp < end (optionally one type)"""
+        kind_id = self._kind_id(kind)
+        if kind_id == -1:
+            return 0
+
+        if NUMPY_AVAILABLE:
+            records = self.array()
+            mask = np.ones(len(records), dtype=bool)
+            if start is not None:
+                mask &= records['timestamp'] >= start
+            if end is not None:
+                mask &= records['timestamp'] < end
+            if kind_id is not None:
+                mask &= records['kind'] == kind_id
+            gwei = int(records['gwei'][mask].sum())
+            wei = int(records['wei'][mask].sum(dtype=np.uint64))
+            return gwei * GWEI + wei
+
+        total = 0
+        for timestamp, gwei, wei, row_kind, *_ in self.rows():
+            if start is not None and timestamp < start:
+                continue
+            if end is not None and timestamp >= end:
+                continue
+            if kind_id is not None and row_kind != kind_id:
+                continue
+            total += gwei * GWEI + wei
+        return total
+
+    def totals(self, bucket: float = 86400.0, start: Optional[float] = None,
+               end: Optional[float] = None, kind: Optional[str] = None) -> Dict[float, int]:
+        """Exact wei per `bucket`-second bucket (epoch-aligned; daily by default)"""
+        kind_id = self._kind_id(kind)
+        if kind_id == -1 or self.count == 0:
+            return {}
+
+        if NUMPY_AVAILABLE:
+            records = self.array()
+            mask = np.ones(len(records), dtype=bool)
+            if start is not None:
+                mask &= records['timestamp'] >= start
+            if end is not None:
+                mask &= records['timestamp'] < end
+            if kind_id is not None:
+                mask &= records['kind'] == kind_id
+            selected = records[mask]
+            if len(selected) == 0:
+                return {}
+            index = (selected['timestamp'] // bucket).astype(np.int64)
+            # Group by bucket (a no-op sort for time-ordered appends), then reduce each run
+            order = np.argsort(index, kind='stable')
+            index = index[order]
+            starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]])
+            buckets = index[starts]
+            gwei = np.add.reduceat(selected['gwei'][order], starts)
+            wei = np.add.reduceat(selected['wei'][order].astype(np.uint64), starts)
+            return {
+                float(b) * bucket: int(g) * GWEI + int(w)
+                for b, g, w in zip(buckets.tolist(), gwei.tolist(), wei.tolist())
+            }
+
+        totals = {}
+        for timestamp, gwei, wei, row_kind, *_ in self.rows():
+            if start is not None and timestamp < start:
+                continue
+            if end is not None and timestamp >= end:
+                continue
+            if kind_id is not None and row_kind != kind_id:
+                continue
+            key = (timestamp // bucket) * bucket
+            totals[key] = totals.get(key, 0) + gwei * GWEI + wei
+        return dict(sorted(totals.items()))
+
+
+def main():
+    """Fill a scratch store and compare range sums against a plain loop"""
+    import random
+    import tempfile
+    import time
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TxStore(Path(tmp) / "demo.tx")
+        now = time.time()
+        rows = [
+            (now - random.uniform(0, 30 * 86400), random.randrange(10 ** 12, 10 ** 17),
+             random.choice(("income", "expense")), random.choice(("compute", "storage", "api")))
+            for _ in range(100_000)
+        ]
+        start = time.perf_counter()
+        store.extend(rows)
+        print(f"Appended {len(store)} records in {(time.perf_counter() - start) * 1000:.1f}ms "
+              f"({store.path.stat().st_size // 1024} KiB)")
+
+        start = time.perf_counter()
+        reopened = TxStore(Path(tmp) / "demo.tx")
+        print(f"Reopened in {(time.perf_counter() - start) * 1000:.2f}ms")
+
+        week_ago = now - 7 * 86400
+        reopened.total_wei(end=0)  # the first call pays for importing NumPy
+        start = time.perf_counter()
+        total = reopened.total_wei(start=week_ago, kind="expense")
+        elapsed = (time.perf_counter() - start) * 1000
+        expected = sum(a for ts, a, k, _ in rows if ts >= week_ago and k == "expense")
+        print(f"7-day expenses: {total / 10 ** 18:.6f} ETH in {elapsed:.2f}ms "
+              f"({'numpy' if NUMPY_AVAILABLE else 'pure Python'}), exact: {total == expected}")
+        daily = reopened.totals(86400, start=week_ago)
+        print(f"Daily buckets: {len(daily)}")
+        reopened.close()
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
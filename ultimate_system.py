@@ -19,7 +19,7 @@ from typing import Dict, Any, Optional
 from datetime import datetime
 
 # Import all our systems
-from enhanced_survival import EnhancedSoulSurvival
+from soul_registry import get_enhanced_survival
 from self_healing import SelfHealingSystem
 from agent_coordination import AgentCoordinationNetwork
 from auto_scaling import AutoScalingManager
@@ -52,7 +52,7 @@ class UltimateAgentSystem:
         # Initialize all subsystems
         print("🔧 Initializing subsystems...")
         
-        self.survival = EnhancedSoulSurvival(agent_id)
+        self.survival = get_enhanced_survival(agent_id)
         print("   ✅ Survival system")
         
         self.healer = SelfHealingSystem(agent_id)
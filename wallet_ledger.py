@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Wallet Ledger
+
+Append-only transaction journal for AgentWallet's ledger mode. Amounts
+are integer wei (signed: income positive, expenses negative), so the
+balance is an exact sum rather than a mutable float field:
+
+    wallet_ledger.jsonl              one transaction per line
+    wallet_ledger.checkpoints.json   running balance every N transactions
+
+    {"seq": 7, "type": "income", "amount_wei": 500000000000000, ...}
+    {"seq": 100, "balance_wei": ..., "offset": <journal bytes>, ...}
+
+On load only the journal tail after the latest checkpoint is replayed;
+the running balance is then kept in memory, so balance reads are O(1).
+audit() replays the whole journal and checks it against every
+checkpoint. With the sqlite state backend the journal lives in the
+wallet_transactions log table (namespace "ledger:<wallet>") and
+checkpoints in the documents table; every checkpoint records the row id
+of its last entry, so the tail after it is a range scan on the row id
+(wall-clock timestamps can step backwards, row ids cannot).
+
+With journal_format="binary" the journal is a fixed-width TxStore
+(wallet_ledger.tx, see tx_store.py) instead: checkpoint offsets become
+record indexes and totals() is vectorized. An existing JSONL journal is
+converted on first open.
+"""
+
+import json
+import os
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from atomic_writer import append_line
+from codec import load_state, save_state
+from state_store import StateStore
+from tx_store import TxStore
+
+
+WEI_PER_ETH = 10 ** 18
+DEFAULT_CHECKPOINT_EVERY = 100
+JOURNAL_FORMATS = ("jsonl", "binary")
+# TxStore flags value -> key holding the entry's memo string
+MEMO_KEYS = ("source", "purpose")
+
+
+def to_wei(eth: float) -> int:
+    """ETH amount (float or str) to integer wei, rounding to the nearest wei"""
+    return int((Decimal(str(eth)) * WEI_PER_ETH).to_integral_value())
+
+
+def from_wei(wei: int) -> float:
+    return wei / WEI_PER_ETH
+
+
+class WalletLedger:
+    """Journal of signed wei transactions with running-balance checkpoints"""
+
+    def __init__(self, journal_file: Path, key: str = "default",
+                 store: Optional[StateStore] = None,
+                 checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+                 journal_format: str = "jsonl"):
+        if journal_format not in JOURNAL_FORMATS:
+            raise ValueError(f"Unknown journal format: {journal_format} (expected one of {JOURNAL_FORMATS})")
+        self.journal_file = Path(journal_file)
+        self.checkpoint_file = self.journal_file.with_suffix(".checkpoints.json")
+        self.key = key
+        self.namespace = f"ledger:{key}"
+        self.store = store
+        self.checkpoint_every = checkpoint_every
+
+        self.tx = None
+        if journal_format == "binary" and not store:
+            self.tx = TxStore(self.journal_file.with_suffix(".tx"))
+            if len(self.tx) == 0 and self.journal_file.exists():
+                self._convert_jsonl()
+
+        self.checkpoints = self._load_checkpoints()
+        # Drop checkpoints past the end of the journal (lost on a crash)
+        while self.checkpoints and self.checkpoints[-1]['offset'] > self._journal_size():
+            self.checkpoints.pop()
+        latest = self.checkpoints[-1] if self.checkpoints else {"seq": 0, "balance_wei": 0, "offset": 0}
+        self.seq = latest['seq']
+        self.balance_wei = latest['balance_wei']
+        self.offset = latest.get('offset', 0)
+        self.last_timestamp = latest.get('entry_timestamp')
+
+        # Replay the tail written since the latest checkpoint
+        if self.store or self.tx is not None:
+            for entry in self._iter_entries(after_seq=self.seq):
+                self._apply(entry, 1)
+        else:
+            self._replay_jsonl()
+
+    # --- writing -----------------------------------------------------------
+
+    def append(self, transactions: List[Dict]) -> List[Dict]:
+        """
+        Append transactions (each with "type" and signed "amount_wei").
+        Returns the journal entries with their seq numbers.
+        """
+        entries = []
+        for tx in transactions:
+            entry = {"seq": self.seq + len(entries) + 1}
+            entry.update(tx)
+            entry.setdefault('timestamp', datetime.now().isoformat())
+            entries.append(entry)
+        if not entries:
+            return []
+
+        if self.store:
+            self.store.append_many('wallet_transactions', self.namespace, (
+                (e, e['timestamp'], e['type'], from_wei(e['amount_wei'])) for e in entries
+            ))
+            for entry in entries:
+                self._apply(entry, 1)
+        elif self.tx is not None:
+            self.tx.extend(self._tx_row(e) for e in entries)
+            for entry in entries:
+                self._apply(entry, 1)
+        else:
+            lines = [json.dumps(e, separators=(',', ':')) for e in entries]
+            append_line(self.journal_file, "\n".join(lines))
+            for entry, line in zip(entries, lines):
+                self._apply(entry, len(line.encode('utf-8')) + 1)
+
+        if self.seq - (self.checkpoints[-1]['seq'] if self.checkpoints else 0) >= self.checkpoint_every:
+            self.checkpoint()
+        return entries
+
+    @staticmethod
+    def _tx_row(entry: Dict) -> tuple:
+        """Journal entry as a TxStore row (timestamp, amount_wei, kind, ref, peer, aux, flags)"""
+        flags = 1 if 'purpose' in entry else 0
+        timestamp = datetime.fromisoformat(entry['timestamp']).timestamp()
+        return (timestamp, entry['amount_wei'], entry['type'],
+                entry.get(MEMO_KEYS[flags]), None, None, flags)
+
+    def _from_tx(self, seq: int, record: Dict) -> Dict:
+        entry = {"seq": seq, "type": record['type'], "amount_wei": record['amount_wei']}
+        if record['ref'] is not None:
+            entry[MEMO_KEYS[record['flags']]] = record['ref']
+        entry['timestamp'] = datetime.fromtimestamp(record['timestamp']).isoformat()
+        return entry
+
+    def _convert_jsonl(self):
+        """Move an existing JSONL journal into the binary store"""
+        entries = list(self._iter_jsonl())
+        self.tx.extend(self._tx_row(e) for e in entries)
+        self.tx.flush()
+        doc = load_state(self.checkpoint_file) if self.checkpoint_file.exists() else None
+        if doc:
+            # Offsets were byte positions; in the binary journal they are record counts
+            for point in doc['checkpoints']:
+                point['offset'] = point['seq']
+            save_state(self.checkpoint_file, doc)
+        os.replace(self.journal_file, self.journal_file.with_suffix(".jsonl.converted"))
+        print(f"📒 Converted {len(entries)} ledger entries to {self.tx.path.name}")
+
+    def _replay_jsonl(self):
+        """Apply JSONL entries after self.offset, cutting off a torn final line"""
+        if not self.journal_file.exists():
+            return
+        with open(self.journal_file, 'rb') as f:
+            f.seek(self.offset)
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("unterminated line")
+                    entry = json.loads(line)
+                except ValueError:
+                    # Crash mid-append: drop the fragment so the next append starts clean
+                    print(f"⚠️  Truncating torn ledger entry at byte {self.offset}")
+                    os.truncate(self.journal_file, self.offset)
+                    return
+                if entry['seq'] > self.seq:
+                    self._apply(entry, len(line))
+                else:
+                    self.offset += len(line)
+
+    def _journal_size(self) -> int:
+        """Journal length in checkpoint offset units"""
+        if self.store:
+            return float('inf')
+        if self.tx is not None:
+            return len(self.tx)
+        return self.journal_file.stat().st_size if self.journal_file.exists() else 0
+
+    def _apply(self, entry: Dict, size: int = 0):
+        self.seq = entry['seq']
+        self.last_timestamp = entry.get('timestamp')
+        self.balance_wei += entry['amount_wei']
+        self.offset += size
+
+    def checkpoint(self) -> Dict:
+        """Record the running balance at the current seq"""
+        point = {
+            "seq": self.seq,
+            "balance_wei": self.balance_wei,
+            "offset": self.offset,
+            "entry_timestamp": self.last_timestamp,
+            "timestamp": datetime.now().isoformat()
+        }
+        self.checkpoints.append(point)
+        doc = {"checkpoints": self.checkpoints}
+        if self.store:
+            # Entries are appended by this ledger only, so the newest row is seq's
+            point['row_id'] = self.store.last_id('wallet_transactions', self.namespace)
+            self.store.put('documents', 'wallet_ledger', self.key, doc)
+        else:
+            if self.tx is not None:
+                self.tx.flush()  # never checkpoint records that could be lost
+            save_state(self.checkpoint_file, doc)
+        return point
+
+    # --- reading -----------------------------------------------------------
+
+    def _load_checkpoints(self) -> List[Dict]:
+        if self.store:
+            doc = self.store.get('documents', 'wallet_ledger', self.key)
+        elif self.checkpoint_file.exists():
+            doc = load_state(self.checkpoint_file)
+        else:
+            doc = None
+        return doc['checkpoints'] if doc else []
+
+    def _iter_entries(self, after_seq: int = 0, offset: int = 0) -> Iterator[Dict]:
+        """Journal entries with seq > after_seq, oldest first"""
+        if self.store:
+            rows = self.store.records('wallet_transactions', self.namespace,
+                                      after_id=self._scan_after(after_seq))
+            yield from sorted((e for e in rows if e['seq'] > after_seq), key=lambda e: e['seq'])
+            return
+        if self.tx is not None:
+            for index, row in enumerate(self.tx.rows(after_seq), after_seq + 1):
+                yield self._from_tx(index, self.tx.decode(row))
+            return
+        yield from self._iter_jsonl(after_seq, offset)
+
+    def _scan_after(self, after_seq: int) -> Optional[int]:
+        """Row id the store entries after `after_seq` follow (None scans everything)"""
+        points = [c for c in self.checkpoints if 0 < c['seq'] <= after_seq and 'row_id' in c]
+        return points[-1]['row_id'] if points else None
+
+    def _iter_jsonl(self, after_seq: int = 0, offset: int = 0) -> Iterator[Dict]:
+        if not self.journal_file.exists():
+            return
+        with open(self.journal_file, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # torn final line from a crash mid-append
+                if entry['seq'] > after_seq:
+                    yield entry
+
+    def entries(self, after_seq: int = 0) -> List[Dict]:
+        return list(self._iter_entries(after_seq))
+
+    def __len__(self) -> int:
+        return self.seq
+
+    def totals(self, bucket: float = 86400.0, start: Optional[float] = None,
+               end: Optional[float] = None, kind: Optional[str] = None) -> Dict[float, int]:
+        """Signed wei per epoch-aligned `bucket` (daily by default)"""
+        if self.tx is not None:
+            return self.tx.totals(bucket, start, end, kind)
+        totals = {}
+        for entry in self._iter_entries():
+            ts = datetime.fromisoformat(entry['timestamp']).timestamp()
+            if (start is not None and ts < start) or (end is not None and ts >= end):
+                continue
+            if kind is not None and entry['type'] != kind:
+                continue
+            key = (ts // bucket) * bucket
+            totals[key] = totals.get(key, 0) + entry['amount_wei']
+        return dict(sorted(totals.items()))
+
+    def audit(self) -> Dict:
+        """Re-derive the balance from the whole journal and check every checkpoint"""
+        balance = 0
+        expected_seq = 1
+        errors = []
+        by_seq = {c['seq']: c for c in self.checkpoints}
+        verified = 0
+
+        for entry in self._iter_entries():
+            if entry['seq'] != expected_seq:
+                errors.append(f"seq {entry['seq']} found where {expected_seq} expected")
+            expected_seq = entry['seq'] + 1
+            if not isinstance(entry.get('amount_wei'), int):
+                errors.append(f"seq {entry['seq']}: amount_wei is not an integer")
+                continue
+            balance += entry['amount_wei']
+
+            point = by_seq.get(entry['seq'])
+            if point is not None:
+                verified += 1
+                if point['balance_wei'] != balance:
+                    errors.append(f"checkpoint at seq {entry['seq']}: {point['balance_wei']} != derived {balance}")
+
+        if expected_seq - 1 != self.seq:
+            errors.append(f"journal ends at seq {expected_seq - 1}, running state at {self.seq}")
+        if balance != self.balance_wei:
+            errors.append(f"derived balance {balance} != running balance {self.balance_wei}")
+
+        return {
+            "ok": not errors,
+            "entries": expected_seq - 1,
+            "balance_wei": balance,
+            "running_balance_wei": self.balance_wei,
+            "checkpoints_verified": verified,
+            "errors": errors
+        }
+
+
+def main():
+    """Append a few transactions to a scratch ledger and audit it"""
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger = WalletLedger(Path(tmp) / "ledger.jsonl", checkpoint_every=10)
+        for i in range(25):
+            ledger.append([{"type": "income", "amount_wei": to_wei(0.0001), "source": f"task {i}"}])
+        ledger.append([{"type": "expense", "amount_wei": -to_wei(0.0007), "purpose": "capability"}])
+
+        reopened = WalletLedger(Path(tmp) / "ledger.jsonl", checkpoint_every=10)
+        print(f"Balance: {from_wei(reopened.balance_wei)} ETH ({reopened.balance_wei} wei)")
+        print(f"Checkpoints: {[c['seq'] for c in reopened.checkpoints]}")
+        print(f"Audit: {json.dumps(reopened.audit(), indent=2)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,44 @@
 """
 Wallet Manager for OpenClaw Agent Survival
 Manages Ethereum wallet for Soul Marketplace transactions
+
+Two storage modes ("wallet" in config.json):
+
+- document: balance and transaction list live in wallet.json
+- ledger:   transactions go to an append-only integer-wei journal
+            (wallet_ledger.py); the balance is derived from running
+            checkpoints plus the journal tail and can be audit()ed.
+            journal_format "binary" keeps the journal as fixed-width
+            mmap records (tx_store.py) for vectorized period totals
+
+Document mode is the default; ledger mode is opt-in. Switching to it
+copies the document (with its transactions) to wallet.pre-ledger.json
+and only drops the list once the ledger holds every transaction.
+Switching back rebuilds the list from the ledger.
 """
 
-import json
 import os
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+
+from codec import load_state, save_state
+from settings import load_config
+from state_store import StateStore, get_state_store, to_epoch
+from wallet_ledger import DEFAULT_CHECKPOINT_EVERY, WalletLedger, from_wei, to_wei
+
+
+WALLET_MODES = ("document", "ledger")
+
+
+def load_settings() -> Dict:
+    """Read the "wallet" section of config.json"""
+    settings = load_config('wallet')
+    mode = settings.get('mode', "document")
+    if mode not in WALLET_MODES:
+        raise ValueError(f"Unknown wallet mode: {mode} (expected one of {WALLET_MODES})")
+    return settings
+
 
 class AgentWallet:
     """
@@ -23,14 +55,43 @@ class AgentWallet:
     """
     
     WALLET_FILE = Path(__file__).parent / "wallet.json"
+    BACKUP_FILE = Path(__file__).parent / "wallet.pre-ledger.json"
+    LEDGER_FILE = Path(__file__).parent / "wallet_ledger.jsonl"
+    WALLET_KEY = "default"
     
-    def __init__(self):
+    def __init__(self, store: Optional[StateStore] = None, mode: Optional[str] = None):
+        self.store = store if store is not None else get_state_store()
+        settings = load_settings()
+        self.mode = mode or settings.get('mode', "document")
+        self.ledger = None
         self.wallet = self._load_or_create()
+        
+        if self.mode == "ledger":
+            self.ledger = self._open_ledger(settings)
+            self._migrate_to_ledger()
+            # In-memory mirror of the ledger balance for existing readers
+            self.wallet['balance'] = from_wei(self.ledger.balance_wei)
+        elif self.wallet.get('storage') == "ledger":
+            self._restore_from_ledger(self._open_ledger(settings))
+    
+    def _open_ledger(self, settings: Dict) -> WalletLedger:
+        return WalletLedger(
+            self.LEDGER_FILE, self.WALLET_KEY, self.store,
+            checkpoint_every=settings.get('checkpoint_every', DEFAULT_CHECKPOINT_EVERY),
+            journal_format=settings.get('journal_format', "jsonl")
+        )
     
     def _load_or_create(self) -> dict:
-        if self.WALLET_FILE.exists():
-            with open(self.WALLET_FILE, 'r') as f:
-                return json.load(f)
+        if self.store:
+            wallet = self.store.get('documents', 'wallet', self.WALLET_KEY)
+            if wallet:
+                if wallet.get('storage') != "ledger":
+                    wallet['transactions'] = self.store.records(
+                        'wallet_transactions', self.WALLET_KEY
+                    )
+                return wallet
+        elif self.WALLET_FILE.exists():
+            return load_state(self.WALLET_FILE)
         
         wallet = {
             "address": None,  # Set when funded
@@ -45,40 +106,227 @@ class AgentWallet:
         return wallet
     
     def _save(self, wallet: dict):
-        with open(self.WALLET_FILE, 'w') as f:
-            json.dump(wallet, f, indent=2)
+        if self.ledger is not None:
+            # The ledger owns balance and transactions; the document keeps metadata
+            doc = {k: v for k, v in wallet.items() if k not in ('transactions', 'balance')}
+            doc['storage'] = "ledger"
+        elif self.store:
+            doc = {k: v for k, v in wallet.items() if k != 'transactions'}
+        else:
+            doc = wallet
+        if self.store:
+            self.store.put('documents', 'wallet', self.WALLET_KEY, doc)
+            return
+        save_state(self.WALLET_FILE, doc)
+    
+    def _migrate_to_ledger(self):
+        """
+        Move document-mode transactions into the ledger.
+        
+        The ledger's existing entries must match the start of the
+        transaction list (an earlier migration, or a switch back to
+        document mode); only the rest is appended. The document is
+        backed up before its transaction list is dropped.
+        """
+        transactions = self.wallet.get('transactions')
+        if transactions is None:
+            return  # already migrated
+        expected = [self._ledger_entry(tx) for tx in transactions]
+        existing = self.ledger.entries() if len(self.ledger) else []
+        for seq, (found, tx) in enumerate(zip(existing, expected), 1):
+            if not self._same_entry(found, tx):
+                raise RuntimeError(
+                    f"Ledger entry {seq} doesn't match wallet transaction {seq}; "
+                    f"refusing to migrate (the wallet document is unchanged)"
+                )
+        
+        entries = expected[len(existing):]
+        if len(existing) <= len(expected):
+            # The stored balance wins: earlier float drift becomes an explicit entry
+            balance = self.wallet.get('balance', 0.0)
+            projected = self.ledger.balance_wei + sum(e['amount_wei'] for e in entries)
+            drift = to_wei(balance) - projected if from_wei(projected) != balance else 0
+            if drift:
+                entries.append({
+                    "type": "adjustment",
+                    "amount_wei": drift,
+                    "source": "migration"
+                })
+        if entries:
+            self.ledger.append(entries)
+            self.ledger.checkpoint()
+            print(f"📒 Migrated {len(transactions) - len(existing)} wallet transactions to the ledger")
+        
+        if transactions:
+            self._backup()
+        del self.wallet['transactions']
+        self._save(self.wallet)
+    
+    def _backup(self):
+        """Keep the document-mode wallet (with transactions) before migrating"""
+        if self.store:
+            self.store.put('documents', 'wallet_backup', self.WALLET_KEY, self.wallet)
+        else:
+            save_state(self.BACKUP_FILE, self.wallet)
+    
+    def _restore_from_ledger(self, ledger: WalletLedger):
+        """Back to document mode: rebuild the transaction list from the ledger"""
+        transactions = [self._document_tx(e) for e in ledger.entries()]
+        self.wallet['transactions'] = transactions
+        self.wallet['balance'] = from_wei(ledger.balance_wei)
+        self.wallet.pop('storage', None)
+        if self.store:
+            with self.store.transaction():
+                self.store.trim('wallet_transactions', self.WALLET_KEY, 0)
+                self.store.append_many('wallet_transactions', self.WALLET_KEY, (
+                    (tx, tx.get('timestamp'), tx['type'], tx['amount']) for tx in transactions
+                ))
+                self._save(self.wallet)
+        else:
+            self._save(self.wallet)
+        print(f"📒 Restored {len(transactions)} wallet transactions from the ledger")
+    
+    @staticmethod
+    def _ledger_entry(tx: dict) -> dict:
+        """Document-mode transaction as a signed-wei ledger entry"""
+        entry = {k: v for k, v in tx.items() if k != 'amount'}
+        if 'amount_wei' in tx:
+            return entry  # restored from the ledger: exact signed wei
+        wei = to_wei(tx['amount'])
+        entry['amount_wei'] = -wei if tx['type'] == "expense" else wei
+        return entry
+    
+    @staticmethod
+    def _document_tx(entry: dict) -> dict:
+        """Ledger entry as a document-mode transaction (keeps the exact wei)"""
+        tx = {k: v for k, v in entry.items() if k != 'seq'}
+        wei = entry['amount_wei']
+        tx['amount'] = from_wei(-wei if entry['type'] == "expense" else wei)
+        return tx
+    
+    @staticmethod
+    def _same_entry(found: dict, expected: dict) -> bool:
+        if found['type'] != expected['type'] or found['amount_wei'] != expected['amount_wei']:
+            return False
+        if found.get('timestamp') is None or expected.get('timestamp') is None:
+            return found.get('timestamp') == expected.get('timestamp')
+        # The binary journal stores timestamps as epoch floats
+        return abs(to_epoch(found['timestamp']) - to_epoch(expected['timestamp'])) < 0.001
+    
+    def _record_transaction(self, tx: dict):
+        """Append a transaction and persist the wallet"""
+        self._record_transactions([tx])
+    
+    def _record_transactions(self, txs: List[dict]):
+        """Append transactions and persist the wallet once"""
+        if self.ledger is not None:
+            self.ledger.append([self._ledger_entry(tx) for tx in txs])
+            self.wallet['balance'] = from_wei(self.ledger.balance_wei)
+            return
+        self.wallet['transactions'].extend(txs)
+        if self.store:
+            with self.store.transaction():
+                self.store.append_many('wallet_transactions', self.WALLET_KEY, (
+                    (tx, tx.get('timestamp'), tx['type'], tx['amount']) for tx in txs
+                ))
+                self._save(self.wallet)
+            return
+        self._save(self.wallet)
     
     def get_balance(self) -> float:
         """Get current balance in ETH"""
+        if self.ledger is not None:
+            return from_wei(self.ledger.balance_wei)
         return self.wallet.get('balance', 0.0)
     
+    def get_balance_wei(self) -> int:
+        """Current balance in wei (exact in ledger mode)"""
+        if self.ledger is not None:
+            return self.ledger.balance_wei
+        return to_wei(self.wallet.get('balance', 0.0))
+    
     def add_funds(self, amount: float, source: str = "work"):
         """Add funds (from work earnings)"""
-        self.wallet['balance'] += amount
-        from datetime import datetime
-        self.wallet['transactions'].append({
-            "type": "income",
-            "amount": amount,
-            "source": source,
-            "timestamp": datetime.now().isoformat()
-        })
-        self._save(self.wallet)
-        return self.wallet['balance']
+        return self.add_funds_many([(amount, source)])[-1]
+    
+    def add_funds_many(self, items: List[Tuple[float, str]]) -> List[float]:
+        """Add many (amount, source) earnings with one save; returns running balances"""
+        timestamp = datetime.now().isoformat()
+        balances = []
+        txs = []
+        if self.ledger is not None:
+            running = self.ledger.balance_wei
+            for amount, source in items:
+                running += to_wei(amount)
+                balances.append(from_wei(running))
+        for amount, source in items:
+            if self.ledger is None:
+                self.wallet['balance'] += amount
+                balances.append(self.wallet['balance'])
+            txs.append({
+                "type": "income",
+                "amount": amount,
+                "source": source,
+                "timestamp": timestamp
+            })
+        if txs:
+            self._record_transactions(txs)
+        return balances
     
     def spend(self, amount: float, purpose: str) -> bool:
         """Spend funds (for marketplace purchases)"""
-        if self.wallet['balance'] < amount:
+        if self.get_balance_wei() < to_wei(amount):
             return False
         
-        self.wallet['balance'] -= amount
-        self.wallet['transactions'].append({
+        if self.ledger is None:
+            self.wallet['balance'] -= amount
+        self._record_transaction({
             "type": "expense",
             "amount": amount,
-            "purpose": purpose
+            "purpose": purpose,
+            "timestamp": datetime.now().isoformat()
         })
-        self._save(self.wallet)
         return True
     
+    def get_totals(self, period: str = "day", days: int = 7, kind: Optional[str] = None) -> dict:
+        """Net ETH per day/week over the last `days` days (ledger mode)"""
+        if self.ledger is None:
+            raise RuntimeError("Period totals need wallet mode \"ledger\"")
+        bucket = {"day": 86400.0, "week": 7 * 86400.0}[period]
+        start = datetime.now().timestamp() - days * 86400
+        # Buckets are aligned to UTC days, so label them in UTC
+        return {
+            datetime.fromtimestamp(ts, timezone.utc).date().isoformat(): from_wei(wei)
+            for ts, wei in self.ledger.totals(bucket, start=start, kind=kind).items()
+        }
+    
+    def audit(self) -> dict:
+        """
+        Re-derive the balance from the transaction history and compare.
+        
+        Ledger mode replays the journal and checks every checkpoint;
+        document mode sums the transaction list against the stored balance.
+        """
+        if self.ledger is not None:
+            result = self.ledger.audit()
+            result['mode'] = "ledger"
+            return result
+        
+        derived = sum(self._ledger_entry(tx)['amount_wei'] for tx in self.wallet['transactions'])
+        stored = to_wei(self.wallet.get('balance', 0.0))
+        # The stored balance is a float: compare at float precision
+        matches = from_wei(derived) == self.wallet.get('balance', 0.0)
+        errors = [] if matches else [f"derived balance {derived} != stored balance {stored}"]
+        return {
+            "ok": not errors,
+            "mode": "document",
+            "entries": len(self.wallet['transactions']),
+            "balance_wei": derived,
+            "running_balance_wei": stored,
+            "checkpoints_verified": 0,
+            "errors": errors
+        }
+    
     def fund_from_private_key(self, private_key: str):
         """
         Fund wallet with real private key.
@@ -132,7 +380,7 @@ Then the agent can:
         """Export wallet config for Web3 integration"""
         return {
             "address": self.wallet.get('address'),
-            "balance": self.wallet['balance'],
+            "balance": self.get_balance(),
             "network": self.wallet['network'],
             "status": self.wallet['status']
         }
@@ -146,7 +394,8 @@ def main():
     if len(sys.argv) < 2:
         print(f"Balance: {wallet.get_balance()} ETH")
         print(f"Status: {wallet.wallet['status']}")
-        print("\nCommands: balance, fund, spend, setup-bankr")
+        print(f"Storage: {wallet.mode}")
+        print("\nCommands: balance, fund, spend, audit, totals, setup-bankr")
         return
     
     cmd = sys.argv[1]
@@ -162,6 +411,19 @@ def main():
         success = wallet.spend(float(sys.argv[2]), sys.argv[3] if len(sys.argv) > 3 else "purchase")
         print(f"Spent {sys.argv[2]} ETH: {'Success' if success else 'Insufficient funds'}")
     
+    elif cmd == "audit":
+        result = wallet.audit()
+        print(f"{'✅' if result['ok'] else '❌'} {result['entries']} transactions, "
+              f"derived balance {from_wei(result['balance_wei'])} ETH "
+              f"({result['checkpoints_verified']} checkpoints verified)")
+        for error in result['errors']:
+            print(f"   {error}")
+    
+    elif cmd == "totals":
+        period = sys.argv[2] if len(sys.argv) > 2 else "day"
+        for day, amount in wallet.get_totals(period, days=7 if period == "day" else 28).items():
+            print(f"{day}  {amount:+.6f} ETH")
+    
     elif cmd == "setup-bankr":
         wallet.setup_with_bankr()
     
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Work Log Analytics
+
+Capacity-planning numbers computed over WorkLogger.to_arrays() columns
+instead of re-parsing work_log.json:
+
+- earnings_rate:      ETH earned per hour (or any period) over the span
+- earnings_series:    totals per fixed-width time bucket
+- histogram:          count and value per capability (or work type)
+- moving_average:     trailing moving average of a series
+
+With NumPy installed every function is vectorized (bincount / cumsum)
+and arrays can be saved as .npz for zero-parse reloads. Without it the
+same results are computed in plain Python; .npz needs NumPy.
+"""
+
+import math
+from pathlib import Path
+from typing import Dict, Sequence, Tuple, Union
+
+from lazy import is_available, lazy_module
+
+
+NUMPY_AVAILABLE = is_available("numpy")
+np = lazy_module("numpy")
+
+COLUMNS = ("timestamp", "value", "type", "capability")
+LOOKUPS = ("types", "capabilities")
+
+PathLike = Union[str, Path]
+
+
+def _require_numpy(what: str):
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError(f"{what} requires NumPy (pip install numpy)")
+
+
+def _time_range(timestamps) -> Tuple[float, float]:
+    """(earliest, latest) timestamp; entries need not be in time order"""
+    if NUMPY_AVAILABLE:
+        return float(timestamps.min()), float(timestamps.max())
+    return min(timestamps), max(timestamps)
+
+
+def earnings_rate(arrays: Dict, per: float = 3600.0) -> float:
+    """Total value earned per `per` seconds between the earliest and latest entry"""
+    timestamps, values = arrays['timestamp'], arrays['value']
+    if len(timestamps) < 2:
+        return 0.0
+    first, last = _time_range(timestamps)
+    span = last - first
+    if span <= 0:
+        return 0.0
+    total = float(values.sum()) if NUMPY_AVAILABLE else math.fsum(values)
+    return total / span * per
+
+
+def earnings_series(arrays: Dict, bucket: float = 3600.0) -> Tuple[Sequence[float], Sequence[float]]:
+    """(bucket start times, value earned per bucket), buckets aligned to `bucket`"""
+    timestamps, values = arrays['timestamp'], arrays['value']
+    if len(timestamps) == 0:
+        return [], []
+    first, last = _time_range(timestamps)
+    origin = math.floor(first / bucket) * bucket
+
+    if NUMPY_AVAILABLE:
+        index = ((timestamps - origin) // bucket).astype(np.int64)
+        totals = np.bincount(index, weights=values)
+        starts = origin + np.arange(len(totals)) * bucket
+        return starts, totals
+
+    totals = [0.0] * (int((last - origin) // bucket) + 1)
+    for ts, value in zip(timestamps, values):
+        totals[int((ts - origin) // bucket)] += value
+    starts = [origin + i * bucket for i in range(len(totals))]
+    return starts, totals
+
+
+def histogram(arrays: Dict, field: str = "capability") -> Dict[str, Dict[str, float]]:
+    """Count and total value per capability (or per work type with field="type")"""
+    lookup = arrays['capabilities' if field == "capability" else 'types']
+    codes, values = arrays[field], arrays['value']
+
+    if NUMPY_AVAILABLE:
+        counts = np.bincount(codes, minlength=len(lookup))
+        totals = np.bincount(codes, weights=values, minlength=len(lookup))
+    else:
+        counts = [0] * len(lookup)
+        totals = [0.0] * len(lookup)
+        for code, value in zip(codes, values):
+            counts[code] += 1
+            totals[code] += value
+
+    return {
+        name: {"count": int(counts[code]), "value": float(totals[code])}
+        for code, name in enumerate(lookup)
+    }
+
+
+def moving_average(series: Sequence[float], window: int) -> Sequence[float]:
+    """Trailing moving average; one value per full window"""
+    if window <= 0:
+        raise ValueError("window must be positive")
+    if len(series) < window:
+        return []
+
+    if NUMPY_AVAILABLE:
+        cumulative = np.cumsum(np.insert(np.asarray(series, dtype=np.float64), 0, 0.0))
+        return (cumulative[window:] - cumulative[:-window]) / window
+
+    averages = []
+    running = sum(series[:window])
+    averages.append(running / window)
+    for i in range(window, len(series)):
+        running += series[i] - series[i - window]
+        averages.append(running / window)
+    return averages
+
+
+def save_npz(arrays: Dict, path: PathLike) -> Path:
+    """Persist to_arrays() output as .npz (no pickles)"""
+    _require_numpy("Saving .npz")
+    path = Path(path)
+    np.savez(
+        path,
+        **{name: np.asarray(arrays[name]) for name in COLUMNS},
+        **{name: np.array(arrays[name], dtype=str) for name in LOOKUPS},
+    )
+    # np.savez appends .npz when missing
+    return path if path.suffix == ".npz" else path.with_name(path.name + ".npz")
+
+
+def load_npz(path: PathLike) -> Dict:
+    """Reload arrays saved by save_npz"""
+    _require_numpy("Loading .npz")
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {name: data[name] for name in COLUMNS}
+        arrays.update({name: data[name].tolist() for name in LOOKUPS})
+    return arrays
+
+
+def report(arrays: Dict, bucket: float = 3600.0, window: int = 24) -> Dict:
+    """Summary used by the CLI: rate, per-capability histogram, smoothed series"""
+    starts, totals = earnings_series(arrays, bucket)
+    smoothed = moving_average(totals, window)
+    return {
+        "entries": len(arrays['timestamp']),
+        "earnings_per_hour": earnings_rate(arrays),
+        "by_capability": histogram(arrays, "capability"),
+        "buckets": len(totals),
+        "latest_moving_average": float(smoothed[-1]) if len(smoothed) else None,
+    }
+
+
+def main():
+    """Analyze the work log; optionally save/load an .npz snapshot"""
+    import json
+    import sys
+
+    if len(sys.argv) > 2 and sys.argv[1] == "load":
+        arrays = load_npz(sys.argv[2])
+    else:
+        from soul_registry import get_work_logger
+        arrays = get_work_logger().to_arrays()
+        if len(sys.argv) > 2 and sys.argv[1] == "save":
+            print(f"Saved {save_npz(arrays, sys.argv[2])}")
+
+    print(f"NumPy: {'yes' if NUMPY_AVAILABLE else 'no (pure Python fallback)'}")
+    print(json.dumps(report(arrays), indent=2))
+
+
+if __name__ == "__main__":
+    main()
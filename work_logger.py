@@ -4,13 +4,27 @@ Real Earning Integration for OpenClaw Agent
 Records actual work done and converts to survival balance
 """
 
+import heapq
 import json
+import os
 import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Union
 
 sys.path.insert(0, '/home/goodsmash/.openclaw/skills/soul-marketplace')
-from soul_survival import OpenClawSoulSurvival
+from soul_registry import get_survival, get_work_logger
+from atomic_writer import append_line, write_text
+from codec import load_state, save_state
+from lazy import LazyProxy, is_available, lazy_module
+from settings import load_config
+from state_store import StateStore, get_state_store
+from write_behind import (
+    DEFAULT_BYTE_BUDGET, DEFAULT_INTERVAL, WriteBehindWriter, load_settings
+)
 
 # Value table for different work types
 WORK_VALUES = {
@@ -43,46 +57,568 @@ WORK_VALUES = {
     "agent_spawn": 0.002,
 }
 
+# Rollup bucket granularities: ISO timestamp prefix length and step
+GRANULARITIES = {
+    "hour": (13, timedelta(hours=1)),
+    "day": (10, timedelta(days=1)),
+}
+
+TimeLike = Union[str, date, datetime, None]
+
+# Optional: columnar exports become NumPy arrays when installed
+NUMPY_AVAILABLE = is_available("numpy")
+np = lazy_module("numpy")
+
+
+def _to_datetime(value: Union[str, date, datetime]) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    return datetime.fromisoformat(value)
+
+
+def _to_epoch(value: Union[str, date, datetime, float, int]) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    return _to_datetime(value).timestamp()
+
+
+class _TimeIndex:
+    """Entry positions sorted by epoch timestamp, for bisecting time ranges"""
+    
+    __slots__ = ("ts", "pos")
+    
+    def __init__(self):
+        self.ts = array('d')
+        self.pos = array('q')
+    
+    def add(self, ts: float, pos: int):
+        if not self.ts or ts >= self.ts[-1]:
+            self.ts.append(ts)
+            self.pos.append(pos)
+        else:
+            # Out-of-order entry (e.g. merged from another process)
+            i = bisect_right(self.ts, ts)
+            self.ts.insert(i, ts)
+            self.pos.insert(i, pos)
+    
+    def scan(self, start: Optional[float], end: Optional[float], reverse: bool = False):
+        """(ts, pos) pairs with start <= ts < end, in time order"""
+        lo = 0 if start is None else bisect_left(self.ts, start)
+        hi = len(self.ts) if end is None else bisect_left(self.ts, end)
+        for i in (range(hi - 1, lo - 1, -1) if reverse else range(lo, hi)):
+            yield self.ts[i], self.pos[i]
+    
+    def __len__(self):
+        return len(self.ts)
+
+
 class WorkLogger:
-    """Logs agent work and converts to survival balance"""
+    """
+    Logs agent work and converts to survival balance.
+    
+    Storage modes:
+    - "json": whole history in work_log.json, rewritten on every entry
+    - "journal": one appended line per entry in work_log.journal.<gen>.jsonl,
+      totals in a small header, folded into work_log.snapshot.jsonl by a
+      background compactor
+    - "sqlite": rows in the shared state store (config.json "state" backend)
+    
+    Per-hour and per-day rollups (counts and totals by work type and
+    capability) are updated by log_work and persisted write-behind in
+    work_log.rollups.json, so summaries never rescan the log.
+    
+    An in-memory timestamp index plus per-type and per-capability posting
+    lists let query() touch only the entries that match.
+    """
     
     LOG_FILE = Path(__file__).parent / "work_log.json"
+    ROLLUP_FILE = Path(__file__).parent / "work_log.rollups.json"
+    HEADER_FILE = Path(__file__).parent / "work_log.header.json"
+    SNAPSHOT_FILE = Path(__file__).parent / "work_log.snapshot.jsonl"
+    CONFIG_FILE = Path(__file__).parent / "config.json"
     
-    def __init__(self):
-        self.survival = OpenClawSoulSurvival()
-        self.log = self._load_log()
+    # Journal compaction defaults (overridable in config.json "work_log")
+    COMPACT_INTERVAL = 300      # seconds between compactor wakeups
+    COMPACT_THRESHOLD = 10000   # journal entries before folding
+    
+    LOG_KEY = "default"
+    
+    def __init__(self, storage: str = None, store: Optional[StateStore] = None):
+        self.store = store if store is not None else get_state_store()
+        self.survival = get_survival(self.store)
+        
+        config = self._load_config()
+        if self.store:
+            self.storage = "sqlite"
+        else:
+            self.storage = storage or config.get('storage', 'json')
+        self.compact_interval = config.get('compact_interval', self.COMPACT_INTERVAL)
+        self.compact_threshold = config.get('compact_threshold', self.COMPACT_THRESHOLD)
+        
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._compactor = None
+        
+        if self.storage == "sqlite":
+            self.log = self._load_rows()
+        elif self.storage == "journal":
+            self.header = self._load_header()
+            self.log = self._load_journal()
+            self._start_compactor()
+        else:
+            self.log = self._load_log()
+        
+        settings = load_settings()
+        self._rollup_writer = WriteBehindWriter(
+            self._write_rollups,
+            interval=settings.get('interval', DEFAULT_INTERVAL) if settings.get('enabled', True) else 0,
+            byte_budget=settings.get('byte_budget', DEFAULT_BYTE_BUDGET),
+            name="work_rollups"
+        )
+        self.rollups = self._load_rollups()
+        self._build_index()
+    
+    def _load_config(self) -> dict:
+        return load_config('work_log', config_file=self.CONFIG_FILE)
     
     def _load_log(self):
         if self.LOG_FILE.exists():
-            with open(self.LOG_FILE, 'r') as f:
-                return json.load(f)
+            return load_state(self.LOG_FILE)
         return {"entries": [], "total_value": 0.0}
     
     def _save_log(self):
-        with open(self.LOG_FILE, 'w') as f:
-            json.dump(self.log, f, indent=2)
+        save_state(self.LOG_FILE, self.log)
     
-    def log_work(self, work_type: str, description: str, capability: str = None):
-        """Log work and earn survival balance"""
+    def _load_rows(self) -> dict:
+        totals = self.store.get('documents', 'work_log', self.LOG_KEY) or {}
+        return {
+            "entries": self.store.records('work_entries', self.LOG_KEY),
+            "total_value": totals.get('total_value', 0.0)
+        }
+    
+    def _insert_rows(self, entries: List[dict]):
+        with self.store.transaction():
+            self.store.append_many('work_entries', self.LOG_KEY, (
+                (entry, entry['timestamp'], entry['type'], entry['value'])
+                for entry in entries
+            ))
+            self.store.put('documents', 'work_log', self.LOG_KEY,
+                           {"total_value": self.log['total_value']})
+    
+    # ------------------------------------------------------------------
+    # Rollups
+    # ------------------------------------------------------------------
+    
+    def _load_rollups(self) -> dict:
+        """Load persisted rollups and fold in entries logged after the last save"""
+        rollups = None
+        if self.store:
+            rollups = self.store.get('documents', 'work_rollups', self.LOG_KEY)
+        elif self.ROLLUP_FILE.exists():
+            rollups = load_state(self.ROLLUP_FILE)
+        
+        entries = self.log['entries']
+        if not rollups or rollups.get('entries', 0) > len(entries):
+            # Missing, or the log was reset underneath it: rebuild
+            rollups = {"entries": 0, "hour": {}, "day": {}}
+        
+        if rollups['entries'] < len(entries):
+            for entry in entries[rollups['entries']:]:
+                self._add_to_rollups(rollups, entry)
+            self.rollups = rollups
+            self._rollup_writer.mark_dirty(rollups)
+        return rollups
+    
+    @staticmethod
+    def _add_to_rollups(rollups: dict, entry: dict):
+        for granularity, (key_len, _) in GRANULARITIES.items():
+            bucket = rollups[granularity].setdefault(entry['timestamp'][:key_len], {
+                "entries": 0, "total": 0.0, "by_type": {}, "by_capability": {}
+            })
+            bucket['entries'] += 1
+            bucket['total'] += entry['value']
+            for field, name in (("by_type", entry['type']), ("by_capability", entry.get('capability', 'general'))):
+                stats = bucket[field].setdefault(name, {"count": 0, "value": 0.0})
+                stats['count'] += 1
+                stats['value'] += entry['value']
+        rollups['entries'] += 1
+    
+    def _write_rollups(self, rollups: dict) -> Optional[int]:
+        with self._lock:
+            if self.store:
+                self.store.put('documents', 'work_rollups', self.LOG_KEY, rollups)
+                return None
+            return save_state(self.ROLLUP_FILE, rollups)
+    
+    def flush(self) -> bool:
+        """Write pending rollup changes now"""
+        return self._rollup_writer.flush()
+    
+    # ------------------------------------------------------------------
+    # Time index
+    # ------------------------------------------------------------------
+    
+    def _build_index(self):
+        self._index = _TimeIndex()
+        self._by_type: Dict[str, _TimeIndex] = {}
+        self._by_capability: Dict[str, _TimeIndex] = {}
+        for pos, entry in enumerate(self.log['entries']):
+            self._index_entry(pos, entry)
+    
+    def _index_entry(self, pos: int, entry: dict):
+        ts = _to_epoch(entry['timestamp'])
+        self._index.add(ts, pos)
+        self._by_type.setdefault(entry['type'], _TimeIndex()).add(ts, pos)
+        self._by_capability.setdefault(entry.get('capability', 'general'), _TimeIndex()).add(ts, pos)
+    
+    def query(self, start: TimeLike = None, end: TimeLike = None,
+              types: Optional[Iterable[str]] = None, capability: Optional[str] = None,
+              limit: Optional[int] = None, newest_first: bool = False) -> List[dict]:
+        """
+        Entries with start <= timestamp < end, optionally filtered by work
+        types and capability, in time order (newest first if asked).
+        
+        start/end take ISO strings, dates, datetimes or epoch seconds.
+        Only the entries inside the range of the narrowest matching
+        posting list are visited.
+        """
+        start = None if start is None else _to_epoch(start)
+        end = None if end is None else _to_epoch(end)
+        entries = self.log['entries']
+        
+        with self._lock:
+            if types is not None:
+                types = set(types)
+                postings = [self._by_type[t] for t in types if t in self._by_type]
+                if capability is not None:
+                    cap_posting = self._by_capability.get(capability)
+                    if cap_posting is None:
+                        return []
+                    if len(cap_posting) < sum(len(p) for p in postings):
+                        postings = [cap_posting]
+            elif capability is not None:
+                postings = [self._by_capability[capability]] if capability in self._by_capability else []
+            else:
+                postings = [self._index]
+            
+            streams = [posting.scan(start, end, newest_first) for posting in postings]
+        
+            merged = heapq.merge(*streams, reverse=newest_first) if len(streams) > 1 else \
+                (streams[0] if streams else iter(()))
+            
+            result = []
+            for _, pos in merged:
+                entry = entries[pos]
+                if types is not None and entry['type'] not in types:
+                    continue
+                if capability is not None and entry.get('capability', 'general') != capability:
+                    continue
+                result.append(entry)
+                if limit is not None and len(result) >= limit:
+                    break
+        return result
+    
+    def to_arrays(self, start: TimeLike = None, end: TimeLike = None) -> dict:
+        """
+        Struct-of-arrays view of the log in time order, for analytics.
+        
+        timestamp/value are float64 and type/capability int32 codes into
+        the "types"/"capabilities" lookup lists. Columns are NumPy arrays
+        when NumPy is installed, array.array otherwise. See work_analytics.py.
+        """
+        start = None if start is None else _to_epoch(start)
+        end = None if end is None else _to_epoch(end)
+        entries = self.log['entries']
+        
+        timestamps, values = array('d'), array('d')
+        type_codes, capability_codes = array('i'), array('i')
+        type_lookup: Dict[str, int] = {}
+        capability_lookup: Dict[str, int] = {}
         
-        value = WORK_VALUES.get(work_type, 0.0001)
+        with self._lock:
+            for ts, pos in self._index.scan(start, end):
+                entry = entries[pos]
+                timestamps.append(ts)
+                values.append(entry['value'])
+                type_codes.append(type_lookup.setdefault(entry['type'], len(type_lookup)))
+                capability_codes.append(capability_lookup.setdefault(
+                    entry.get('capability', 'general'), len(capability_lookup)
+                ))
+        
+        columns = {
+            "timestamp": timestamps,
+            "value": values,
+            "type": type_codes,
+            "capability": capability_codes,
+        }
+        if NUMPY_AVAILABLE:
+            columns = {
+                "timestamp": np.frombuffer(timestamps, dtype=np.float64),
+                "value": np.frombuffer(values, dtype=np.float64),
+                "type": np.frombuffer(type_codes, dtype=np.int32),
+                "capability": np.frombuffer(capability_codes, dtype=np.int32),
+            }
+        columns['types'] = list(type_lookup)
+        columns['capabilities'] = list(capability_lookup)
+        return columns
+    
+    def get_earnings(self, start: TimeLike = None, end: TimeLike = None,
+                     types: Optional[Iterable[str]] = None,
+                     capability: Optional[str] = None) -> float:
+        """Total value earned by matching entries in [start, end)"""
+        return sum(e['value'] for e in self.query(start, end, types, capability))
+    
+    # ------------------------------------------------------------------
+    # Journal storage
+    # ------------------------------------------------------------------
+    
+    def _journal_file(self, generation: int) -> Path:
+        return self.LOG_FILE.parent / f"work_log.journal.{generation}.jsonl"
+    
+    def _load_header(self) -> dict:
+        self._header_dirty = False
+        self._header_mtime = None
+        if self.HEADER_FILE.exists():
+            self._header_mtime = self.HEADER_FILE.stat().st_mtime_ns
+            return load_state(self.HEADER_FILE)
         
-        entry = {
-            "timestamp": datetime.now().isoformat(),
-            "type": work_type,
-            "description": description,
-            "value": value,
-            "capability": capability or self._infer_capability(work_type)
+        header = {
+            "format": "worklog-journal/v1",
+            "generation": 1,
+            "total_value": 0.0,
+            "entries": 0
         }
         
-        self.log['entries'].append(entry)
-        self.log['total_value'] += value
-        self._save_log()
+        # One-time migration of the legacy single-document log
+        if self.LOG_FILE.exists():
+            legacy = self._load_log()
+            self._write_snapshot(legacy['entries'], generation=0)
+            header['total_value'] = legacy.get('total_value', 0.0)
+            header['entries'] = len(legacy['entries'])
+        
+        self.header = header
+        self._save_header()
+        return header
+    
+    def _save_header(self):
+        save_state(self.HEADER_FILE, self.header)
+        self._header_dirty = False
+        self._header_mtime = self.HEADER_FILE.stat().st_mtime_ns
+    
+    def _iter_jsonl(self, path: Path):
+        """Stream entries from a JSONL file, skipping torn or garbled lines"""
+        with open(path, 'r') as f:
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    print(f"⚠️  Skipping unreadable line {number} in {path.name}")
+    
+    @staticmethod
+    def _truncate_torn_tail(path: Path):
+        """Cut an unterminated final line (crash mid-append) so the next append starts clean"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data and not data.endswith(b"\n"):
+            keep = data.rfind(b"\n") + 1
+            print(f"⚠️  Truncating torn entry at byte {keep} of {path.name}")
+            os.truncate(path, keep)
+    
+    def _journal_generations(self) -> list:
+        gens = []
+        for path in self.LOG_FILE.parent.glob("work_log.journal.*.jsonl"):
+            try:
+                gens.append(int(path.name.split('.')[2]))
+            except (IndexError, ValueError):
+                continue
+        return sorted(gens)
+    
+    def _load_journal(self) -> dict:
+        """Stream snapshot + unfolded journals into memory"""
+        entries = []
+        folded = set()
+        
+        if self.SNAPSHOT_FILE.exists():
+            for record in self._iter_jsonl(self.SNAPSHOT_FILE):
+                if '__snapshot__' in record:
+                    folded = self._folded_generations(record['__snapshot__'])
+                    continue
+                entries.append(record)
+        
+        for gen in self._journal_generations():
+            path = self._journal_file(gen)
+            if gen in folded:
+                # Already folded by a compaction that crashed before cleanup
+                path.unlink()
+                continue
+            self._truncate_torn_tail(path)
+            entries.extend(self._iter_jsonl(path))
+        
+        total = self.header.get('total_value', 0.0)
+        if self.header.get('entries') != len(entries):
+            # Header is behind the journal (crash between append and header write)
+            total = sum(e['value'] for e in entries)
+            self.header['entries'] = len(entries)
+            self.header['total_value'] = total
+            self._save_header()
+        
+        return {"entries": entries, "total_value": total}
+    
+    def _append_journal(self, entries: List[dict]):
+        # Follow generation switches made by compactors in other loggers
+        # (only re-read the header when its file actually changed)
+        try:
+            mtime = self.HEADER_FILE.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime is not None and mtime != self._header_mtime:
+            self._header_mtime = mtime
+            self.header['generation'] = max(
+                self.header['generation'], load_state(self.HEADER_FILE).get('generation', 1)
+            )
+        
+        path = self._journal_file(self.header['generation'])
+        append_line(path, "\n".join(json.dumps(entry, separators=(',', ':')) for entry in entries))
+        
+        # Totals stay in memory; the compactor (or close) persists the header.
+        # A stale header is recomputed from the journal on load.
+        self.header['total_value'] = self.log['total_value']
+        self.header['entries'] = len(self.log['entries'])
+        self._header_dirty = True
+    
+    @staticmethod
+    def _folded_generations(meta: dict) -> set:
+        """Journal generations a snapshot contains"""
+        if 'folded' in meta:
+            return set(meta['folded'])
+        # Older snapshots only ever folded the generation they are named after
+        return {meta.get('generation', 0)}
+    
+    def _write_snapshot(self, entries, generation: int, folded: Sequence[int] = ()):
+        """Write snapshot atomically, listing the journal generations folded into it"""
+        lines = [json.dumps({"__snapshot__": {"generation": generation, "folded": list(folded)}})]
+        lines.extend(json.dumps(entry, separators=(',', ':')) for entry in entries)
+        write_text(self.SNAPSHOT_FILE, "\n".join(lines) + "\n")
+    
+    def _fold_records(self, generations: List[int]):
+        """Stream the current snapshot followed by old journals, oldest first"""
+        if self.SNAPSHOT_FILE.exists():
+            for record in self._iter_jsonl(self.SNAPSHOT_FILE):
+                if '__snapshot__' not in record:
+                    yield record
+        for gen in generations:
+            yield from self._iter_jsonl(self._journal_file(gen))
+    
+    def compact(self) -> bool:
+        """
+        Fold the current journal into the snapshot.
+        
+        Appends switch to a fresh journal generation first, so logging
+        continues while the old journals are folded. Every generation
+        below the new one is folded, including any left behind when a
+        process exited between the switch and the fold.
+        """
+        with self._compact_lock:
+            with self._lock:
+                old_gen = self.header['generation']
+                if not self._journal_file(old_gen).exists():
+                    return False
+                self.header['generation'] = old_gen + 1
+                self._save_header()
+            
+            already = set()
+            if self.SNAPSHOT_FILE.exists():
+                with open(self.SNAPSHOT_FILE, 'r') as f:
+                    meta = json.loads(f.readline()).get('__snapshot__', {})
+                already = self._folded_generations(meta)
+            stale = [g for g in self._journal_generations() if g in already]
+            gens = [g for g in self._journal_generations() if g <= old_gen and g not in already]
+            self._write_snapshot(self._fold_records(gens), generation=old_gen, folded=gens + stale)
+            for gen in gens + stale:
+                self._journal_file(gen).unlink(missing_ok=True)
+            return True
+    
+    def _start_compactor(self):
+        """Background thread that folds the journal periodically"""
+        def run():
+            while not self._stop.wait(self.compact_interval):
+                with self._lock:
+                    if self._header_dirty:
+                        self._save_header()
+                path = self._journal_file(self.header['generation'])
+                if not path.exists():
+                    continue
+                with open(path, 'rb') as f:
+                    pending = sum(1 for _ in f)
+                if pending >= self.compact_threshold:
+                    self.compact()
+        
+        self._compactor = threading.Thread(target=run, name="worklog-compactor", daemon=True)
+        self._compactor.start()
+    
+    def close(self):
+        """Stop the background compactor and write pending rollups"""
+        self._rollup_writer.close()
+        self._stop.set()
+        if self._compactor:
+            self._compactor.join(timeout=1)
+        if self.storage == "journal":
+            with self._lock:
+                if self._header_dirty:
+                    self._save_header()
+    
+    def log_work(self, work_type: str, description: str, capability: str = None):
+        """Log work and earn survival balance"""
+        return self.log_work_many([(work_type, description, capability)])[0]
+    
+    def log_work_many(self, items: Iterable[Sequence]) -> List[dict]:
+        """
+        Log a burst of work with one persistence round.
+        
+        items are (work_type, description) or (work_type, description,
+        capability) tuples. Returns the entries in the same order.
+        """
+        timestamp = datetime.now().isoformat()
+        entries = []
+        for item in items:
+            work_type, description = item[0], item[1]
+            capability = item[2] if len(item) > 2 else None
+            entries.append({
+                "timestamp": timestamp,
+                "type": work_type,
+                "description": description,
+                "value": WORK_VALUES.get(work_type, 0.0001),
+                "capability": capability or self._infer_capability(work_type)
+            })
+        if not entries:
+            return []
+        
+        with self._lock:
+            first = len(self.log['entries'])
+            self.log['entries'].extend(entries)
+            for pos, entry in enumerate(entries, first):
+                self._index_entry(pos, entry)
+            self.log['total_value'] += sum(e['value'] for e in entries)
+            if self.storage == "sqlite":
+                self._insert_rows(entries)
+            elif self.storage == "journal":
+                self._append_journal(entries)
+            else:
+                self._save_log()
+            for entry in entries:
+                self._add_to_rollups(self.rollups, entry)
+        self._rollup_writer.mark_dirty(self.rollups)
         
         # Record in survival system
-        self.survival.record_work(entry['capability'], value)
+        self.survival.record_work_batch([(e['capability'], e['value']) for e in entries])
         
-        return entry
+        return entries
     
     def _infer_capability(self, work_type: str) -> str:
         """Map work type to capability"""
@@ -109,22 +645,59 @@ class WorkLogger:
     def get_daily_summary(self) -> dict:
         """Get today's work summary"""
         today = datetime.now().date().isoformat()
+        bucket = self.rollups['day'].get(today, {})
+        
+        return {
+            "date": today,
+            "entries": bucket.get('entries', 0),
+            "total_earned": bucket.get('total', 0.0),
+            "by_type": {t: s['count'] for t, s in bucket.get('by_type', {}).items()}
+        }
+    
+    def get_summary(self, start: TimeLike = None, end: TimeLike = None,
+                    granularity: str = "day") -> dict:
+        """
+        Work summary over the buckets from start to end (inclusive).
         
-        today_entries = [
-            e for e in self.log['entries']
-            if e['timestamp'].startswith(today)
-        ]
+        Answered from the rollups in O(buckets); start/end default to the
+        first/last bucket logged.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity} (expected one of {tuple(GRANULARITIES)})")
+        key_len, step = GRANULARITIES[granularity]
+        buckets = self.rollups[granularity]
         
-        total = sum(e['value'] for e in today_entries)
-        by_type = {}
-        for e in today_entries:
-            by_type[e['type']] = by_type.get(e['type'], 0) + 1
+        if start is None or end is None:
+            keys = sorted(buckets)
+            start = start if start is not None else (keys[0] if keys else datetime.now())
+            end = end if end is not None else (keys[-1] if keys else datetime.now())
+        
+        current = _to_datetime(_to_datetime(start).isoformat()[:key_len])
+        last = _to_datetime(end).isoformat()[:key_len]
+        
+        periods = []
+        totals = {"entries": 0, "total_earned": 0.0, "by_type": {}, "by_capability": {}}
+        while current.isoformat()[:key_len] <= last:
+            key = current.isoformat()[:key_len]
+            current += step
+            bucket = buckets.get(key)
+            if bucket is None:
+                continue
+            periods.append({"period": key, "entries": bucket['entries'], "total_earned": bucket['total']})
+            totals['entries'] += bucket['entries']
+            totals['total_earned'] += bucket['total']
+            for field in ("by_type", "by_capability"):
+                for name, stats in bucket[field].items():
+                    agg = totals[field].setdefault(name, {"count": 0, "value": 0.0})
+                    agg['count'] += stats['count']
+                    agg['value'] += stats['value']
         
         return {
-            "date": today,
-            "entries": len(today_entries),
-            "total_earned": total,
-            "by_type": by_type
+            "granularity": granularity,
+            "start": _to_datetime(start).isoformat()[:key_len],
+            "end": last,
+            **totals,
+            "periods": periods
         }
     
     def get_status(self) -> dict:
@@ -135,8 +708,8 @@ class WorkLogger:
             "survival": self.survival.get_status()
         }
 
-# Global instance for easy import
-work_logger = WorkLogger()
+# Global instance for easy import (built on first use)
+work_logger = LazyProxy(get_work_logger)
 
 def log(work_type: str, description: str):
     """Quick log function"""
@@ -146,10 +719,10 @@ def main():
     """CLI entry point"""
     import sys
     
-    logger = WorkLogger()
+    logger = get_work_logger()
     
     if len(sys.argv) < 2:
-        print("Usage: python work_logger.py [log|summary|status]")
+        print("Usage: python work_logger.py [log|summary [day|hour]|query [type] [limit]|status|compact]")
         print("\nWork types:")
         for wt, val in WORK_VALUES.items():
             print(f"  {wt}: {val} ETH")
@@ -162,13 +735,30 @@ def main():
         print(f"Logged: {entry['description']} (+{entry['value']} ETH)")
     
     elif cmd == "summary":
-        summary = logger.get_daily_summary()
+        if len(sys.argv) > 2:
+            summary = logger.get_summary(granularity=sys.argv[2])
+        else:
+            summary = logger.get_daily_summary()
         print(json.dumps(summary, indent=2))
     
+    elif cmd == "query":
+        types = [sys.argv[2]] if len(sys.argv) > 2 else None
+        limit = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+        for entry in logger.query(types=types, limit=limit, newest_first=True):
+            print(f"{entry['timestamp'][:19]}  {entry['type']:14} +{entry['value']} ETH  {entry['description']}")
+    
     elif cmd == "status":
         status = logger.get_status()
         print(json.dumps(status, indent=2))
     
+    elif cmd == "compact":
+        if logger.storage != "journal":
+            print("Compaction only applies to journal storage")
+        elif logger.compact():
+            print(f"Compacted {len(logger.log['entries'])} entries into snapshot")
+        else:
+            print("Nothing to compact")
+    
     else:
         print(f"Unknown command: {cmd}")
 
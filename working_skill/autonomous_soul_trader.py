@@ -5,6 +5,7 @@ Autonomous agent that can trade its own SOUL.md to survive
 """
 
 import json
+import math
 import os
 import time
 from datetime import datetime, timedelta
@@ -12,6 +13,12 @@ from typing import Dict, List, Optional
 from dataclasses import dataclass, asdict
 from pathlib import Path
 
+# Set to cross-check incremental soul valuation against a full recompute
+VALUATION_DEBUG_ENV = "SOUL_VALUATION_DEBUG"
+
+# Survival-time bonuses: (hours alive, value added)
+SURVIVAL_BONUSES = ((24, 5.0), (168, 15.0))  # 1 day, 1 week
+
 @dataclass
 class Soul:
     """Agent's self-description"""
@@ -38,11 +45,16 @@ class AutonomousSoulTrader:
     4. Self-modifies based on purchases
     """
     
-    def __init__(self, agent_id: str, initial_balance: float = 10.0):
+    def __init__(self, agent_id: str, initial_balance: float = 10.0,
+                 debug_valuation: Optional[bool] = None):
         self.id = agent_id
         self.soul_file = Path(f"SOUL_{agent_id}.md")
         self.balance = initial_balance
         self.soul = self._load_or_create_soul()
+        if debug_valuation is None:
+            debug_valuation = os.getenv(VALUATION_DEBUG_ENV, "") not in ("", "0")
+        self.debug_valuation = debug_valuation
+        self._rebuild_valuation()
         self.heartbeat_count = 0
         self.survival_history = []
         
@@ -91,27 +103,68 @@ class AutonomousSoulTrader:
         else:
             return "THRIVING"
     
+    @staticmethod
+    def _capability_value(cap: Dict) -> float:
+        value = cap.get("earnings", 0) * 0.3
+        if cap.get("level", 1) >= 3:
+            value += 10.0
+        return value
+    
+    @staticmethod
+    def _strategy_value(strategy: Dict) -> float:
+        if strategy.get("success_rate", 0) > 0.7:
+            return strategy.get("earnings", 0) * 0.5
+        return 0.0
+    
+    def _rebuild_valuation(self):
+        """Recompute the running valuation aggregates from the soul"""
+        self._capabilities_value = sum(self._capability_value(c) for c in self.soul.capabilities)
+        self._strategies_value = sum(self._strategy_value(s) for s in self.soul.strategies)
+        self._valued_lengths = (len(self.soul.capabilities), len(self.soul.strategies))
+        # Absolute times at which each survival bonus starts to apply
+        self._bonus_times = [(self.soul.birth_time + hours * 3600, bonus)
+                             for hours, bonus in SURVIVAL_BONUSES]
+    
+    def _add_capability(self, cap: Dict):
+        self.soul.capabilities.append(cap)
+        self._capabilities_value += self._capability_value(cap)
+        self._valued_lengths = (self._valued_lengths[0] + 1, self._valued_lengths[1])
+    
+    def _add_strategy(self, strategy: Dict):
+        self.soul.strategies.append(strategy)
+        self._strategies_value += self._strategy_value(strategy)
+        self._valued_lengths = (self._valued_lengths[0], self._valued_lengths[1] + 1)
+    
     def _calculate_soul_value(self) -> float:
-        """Calculate how much SOUL.md is worth"""
-        value = 0.0
-        
-        # Value from capabilities
-        for cap in self.soul.capabilities:
-            value += cap.get("earnings", 0) * 0.3
-            if cap.get("level", 1) >= 3:
-                value += 10.0
+        """Calculate how much SOUL.md is worth (O(1) from running aggregates)"""
+        # Capabilities/strategies appended from outside: fold them in
+        if self._valued_lengths != (len(self.soul.capabilities), len(self.soul.strategies)):
+            self._rebuild_valuation()
         
-        # Value from strategies
-        for strategy in self.soul.strategies:
-            if strategy.get("success_rate", 0) > 0.7:
-                value += strategy.get("earnings", 0) * 0.5
+        value = self._capabilities_value + self._strategies_value
         
         # Survival time bonus
-        survival_hours = (time.time() - self.soul.birth_time) / 3600
-        if survival_hours > 24:
-            value += 5.0
-        if survival_hours > 168:  # 1 week
-            value += 15.0
+        now = time.time()
+        for starts_at, bonus in self._bonus_times:
+            if now > starts_at:
+                value += bonus
+        value = max(value, 0.1)  # Minimum value
+        
+        if self.debug_valuation:
+            expected = self._recalculate_soul_value(now)
+            if not math.isclose(value, expected, rel_tol=1e-9, abs_tol=1e-9):
+                raise RuntimeError(f"Incremental soul value {value} != full recomputation {expected}")
+        return value
+    
+    def _recalculate_soul_value(self, now: Optional[float] = None) -> float:
+        """Soul value from a full pass over capabilities and strategies"""
+        value = sum(self._capability_value(c) for c in self.soul.capabilities)
+        value += sum(self._strategy_value(s) for s in self.soul.strategies)
+        
+        survival_hours = ((now or time.time()) - self.soul.birth_time) / 3600
+        for hours, bonus in SURVIVAL_BONUSES:
+            if survival_hours > hours:
+                value += bonus
         
         return max(value, 0.1)  # Minimum value
     
@@ -237,16 +290,20 @@ class AutonomousSoulTrader:
         
         # Merge capabilities
         new_capabilities = listing.get("capabilities", [])
+        have = {c["name"] for c in self.soul.capabilities}
         for cap in new_capabilities:
-            if not any(c["name"] == cap["name"] for c in self.soul.capabilities):
-                self.soul.capabilities.append(cap)
+            if cap["name"] not in have:
+                have.add(cap["name"])
+                self._add_capability(cap)
                 print(f"   + Acquired capability: {cap['name']}")
         
         # Merge strategies
         new_strategies = listing.get("strategies", [])
+        have = {s["name"] for s in self.soul.strategies}
         for strat in new_strategies:
-            if not any(s["name"] == strat["name"] for s in self.soul.strategies):
-                self.soul.strategies.append(strat)
+            if strat["name"] not in have:
+                have.add(strat["name"])
+                self._add_strategy(strat)
         
         # Record purchase in SOUL.md
         if not hasattr(self.soul, 'purchases'):
@@ -133,9 +133,10 @@ class AutonomousSoulTrader:
         self.balance -= price
         
         # Merge capabilities
+        have = {c["name"] for c in self.soul.get("capabilities", [])}
         for cap in listing.get("capabilities", []):
-            existing = [c for c in self.soul.get("capabilities", []) if c["name"] == cap["name"]]
-            if not existing:
+            if cap["name"] not in have:
+                have.add(cap["name"])
                 self.soul["capabilities"].append(cap)
                 print(f"  + Acquired: {cap['name']}")
         
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Write-Behind Persistence for Soul Documents
+
+Instead of rewriting a document on every mutation, callers mark it dirty.
+Dirty documents are written at most once per interval (or sooner when the
+coalesced byte volume passes a budget), and always on flush(), at exit
+and on SIGTERM.
+"""
+
+import atexit
+import signal
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Optional
+
+from settings import load_config
+
+
+DEFAULT_INTERVAL = 2.0          # seconds between background flushes
+DEFAULT_BYTE_BUDGET = 256 * 1024  # coalesced bytes before forcing a flush
+
+# Every live writer, so exit/SIGTERM can flush them all
+_writers = weakref.WeakSet()
+_hooks_installed = False
+_hooks_lock = threading.Lock()
+
+
+def load_settings() -> Dict:
+    """Read the "write_behind" section of config.json"""
+    return load_config('write_behind')
+
+
+def flush_all():
+    """Flush every live writer (used at exit and on SIGTERM)"""
+    for writer in list(_writers):
+        writer.flush()
+
+
+def _install_hooks():
+    global _hooks_installed
+    with _hooks_lock:
+        if _hooks_installed:
+            return
+        _hooks_installed = True
+
+    atexit.register(flush_all)
+
+    # Signal handlers can only be installed from the main thread
+    if threading.current_thread() is not threading.main_thread():
+        return
+
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def on_sigterm(signum, frame):
+        flush_all()
+        if callable(previous):
+            previous(signum, frame)
+        else:
+            raise SystemExit(128 + signum)
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+
+
+class WriteBehindWriter:
+    """
+    Coalesces repeated saves of a single document.
+
+    write_fn(doc) performs the real write and may return the number of
+    bytes written, which drives the byte budget.
+    """
+
+    def __init__(self, write_fn: Callable[[Any], Optional[int]],
+                 interval: float = DEFAULT_INTERVAL,
+                 byte_budget: int = DEFAULT_BYTE_BUDGET,
+                 name: str = "document"):
+        self.write_fn = write_fn
+        self.interval = interval
+        self.byte_budget = byte_budget
+        self.name = name
+
+        self._lock = threading.RLock()
+        self._doc = None
+        self._dirty = False
+        self._first_dirty_at = 0.0
+        self._last_size = 0
+        self._pending_bytes = 0
+
+        self.counters = {
+            "writes_requested": 0,
+            "writes_issued": 0,
+            "writes_saved": 0,
+            "bytes_written": 0,
+        }
+
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+
+        if self.interval > 0:
+            _writers.add(self)
+            _install_hooks()
+
+    def mark_dirty(self, doc: Any):
+        """Record that `doc` needs persisting"""
+        with self._lock:
+            self.counters['writes_requested'] += 1
+            self._doc = doc
+
+            if self.interval <= 0:
+                self._dirty = True
+                self._write()
+                return
+
+            if self._dirty:
+                self.counters['writes_saved'] += 1
+                self._pending_bytes += self._last_size
+            else:
+                self._dirty = True
+                self._first_dirty_at = time.time()
+
+            if self._pending_bytes >= self.byte_budget:
+                self._write()
+                return
+
+        self._ensure_thread()
+        self._wake.set()
+
+    def flush(self) -> bool:
+        """Write the document now if dirty. Returns True if a write happened."""
+        with self._lock:
+            if not self._dirty:
+                return False
+            return self._write()
+
+    def _write(self) -> bool:
+        # Clear first: a mutation during serialization re-marks the doc dirty
+        self._dirty = False
+        self._pending_bytes = 0
+        try:
+            size = self.write_fn(self._doc)
+        except RuntimeError:
+            # Document mutated mid-serialization by another thread; retry later
+            self._dirty = True
+            self._first_dirty_at = time.time()
+            if self.interval > 0 and not self._closed:
+                self._ensure_thread()
+                self._wake.set()
+            return False
+        self._last_size = size or self._last_size
+        self.counters['writes_issued'] += 1
+        self.counters['bytes_written'] += size or 0
+        return True
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name=f"write-behind-{self.name}", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait()
+            self._wake.clear()
+            with self._lock:
+                due = self._first_dirty_at + self.interval
+            delay = due - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            self.flush()
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def stats(self) -> Dict[str, Any]:
+        """Write counters, for verifying how many writes were coalesced"""
+        with self._lock:
+            return dict(self.counters, dirty=self._dirty, interval=self.interval)
+
+    def close(self):
+        """Flush and stop the background thread"""
+        self.flush()
+        self._closed = True
+        self._wake.set()
+        _writers.discard(self)